@@ -0,0 +1,357 @@
+"""Single-pass extraction and validation of planner actions from model output.
+
+- `ActionStreamParser` scans text once, left to right, and can be fed in chunks: `feed(chunk)`
+  returns the action objects completed by `chunk`, so the streaming planner can start on early
+  steps while later ones are still being generated.
+- Strings / escapes and bracket depth are tracked, so `]` or `}` inside strings and nested
+  arrays (`hotkey.keys`) never end an action early. Prose and ```json fences around the plan
+  are skipped; a `[` or `{` in prose is dropped as soon as the next character shows it isn't
+  JSON (an array must start with an object, an object with a key), so it can't swallow the plan.
+- The plan is the first non-empty array of objects; without one, the loose `{"type": ...}`
+  objects found in the text. A plan wrapped in an object (`{"actions": [...]}`, `{"plan": [...]}`,
+  as JSON-mode replies look) is taken from the wrapper's first list of objects once it closes. Scanning jumps between structural characters with precompiled
+  patterns and every completed object is decoded once, so the cost is linear in the text size.
+- `validate_actions(actions)` checks each action against `ACTION_SCHEMA` (known type, required
+  fields, field types). Problems are dicts `{'level', 'code', 'index', 'field', 'offset',
+  'message'}`; `level` is 'error' (plan must not run) or 'warning' (unknown extra field), and
+  `index` is 1-based — the array element for parse errors, the plan position for validation.
+
+Usage:
+  actions, problems = parse_plan(model_text)
+  parser = ActionStreamParser(); parser.feed(chunk); ...; parser.finish(); parser.plan
+  python samus_manus_mvp/action_parser.py bench --sizes 10 100 1000
+"""
+import json
+import re
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# field -> (kind, required) per action type; kinds are checked by _KIND_CHECKS
+ACTION_SCHEMA: Dict[str, Dict[str, Tuple[str, bool]]] = {
+    'click': {'x': ('number', True), 'y': ('number', True), 'button': ('string', False)},
+    'double_click': {'x': ('number', True), 'y': ('number', True)},
+    'find_click': {'img': ('string', True), 'confidence': ('number', False), 'timeout': ('number', False),
+                   'button': ('string', False)},
+    'type': {'text': ('string', True)},
+    'press': {'key': ('string', False)},
+    'hotkey': {'keys': ('strings', True)},
+    'screenshot': {'out': ('string', False)},
+    'wait': {'seconds': ('number', False)},
+    'wait_change': {'region': ('box', False), 'timeout': ('number', False), 'threshold': ('number', False)},
+    'wait_settle': {'region': ('box', False), 'timeout': ('number', False), 'stable': ('number', False)},
+    'wait_image': {'img': ('string', True), 'timeout': ('number', False), 'confidence': ('number', False)},
+    'web_wait': {'selector': ('string', False), 'state': ('string', False), 'timeout': ('number', False),
+                 'session': ('string', False)},
+    'web_open': {'url': ('string', True), 'session': ('string', False), 'headful': ('bool', False)},
+    'web_click_text': {'text': ('string', True), 'session': ('string', False), 'timeout': ('number', False)},
+    'web_click': {'selector': ('string', True), 'session': ('string', False), 'timeout': ('number', False)},
+    'web_fill': {'selector': ('string', True), 'value': ('string', False), 'session': ('string', False)},
+    'web_screenshot': {'out': ('string', False), 'session': ('string', False)},
+    'web_close': {'session': ('string', False)},
+    'done': {},
+}
+
+
+def _is_number(v) -> bool:
+    if isinstance(v, bool):
+        return False
+    if isinstance(v, (int, float)):
+        return True
+    try:
+        float(v)  # "0.5" is accepted: execute_action converts with float() / int()
+        return isinstance(v, str)
+    except Exception:
+        return False
+
+
+_KIND_CHECKS = {
+    'number': _is_number,
+    'string': lambda v: isinstance(v, str),
+    'bool': lambda v: isinstance(v, bool),
+    'strings': lambda v: isinstance(v, list) and all(isinstance(k, str) for k in v),
+    'box': lambda v: isinstance(v, list) and len(v) == 4 and all(_is_number(k) for k in v),
+}
+
+_KIND_NAMES = {'number': 'a number', 'string': 'a string', 'bool': 'true/false', 'strings': 'a list of strings',
+               'box': 'a list [x, y, width, height]'}
+
+_OPEN = re.compile(r'[\[{]')
+_STRUCT = re.compile(r'[\[\]{}"]')
+_STR_END = re.compile(r'["\\]')
+_NON_WS = re.compile(r'\S')
+
+_OUT, _ARRAY, _OBJECT = 0, 1, 2
+
+
+def problem(code: str, message: str, index: Optional[int] = None, field: Optional[str] = None,
+            offset: Optional[int] = None, level: str = 'error') -> Dict[str, Any]:
+    return {'level': level, 'code': code, 'index': index, 'field': field, 'offset': offset, 'message': message}
+
+
+def _wrapped_plan(obj: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Objects of the first list of objects among a wrapper object's values (nested wrappers too)."""
+    for value in obj.values():
+        if isinstance(value, list) and value and all(isinstance(a, dict) for a in value):
+            return value
+        if isinstance(value, dict) and 'type' not in value:
+            found = _wrapped_plan(value)
+            if found:
+                return found
+    return []
+
+
+class ActionStreamParser:
+    def __init__(self):
+        self.actions: List[Dict[str, Any]] = []   # objects of the plan array, in order
+        self.loose: List[Dict[str, Any]] = []     # `{"type": ...}` objects outside any array
+        self.errors: List[Dict[str, Any]] = []
+        self.closed = False       # the plan array's `]` was seen; later text is ignored
+        self._buf = ''
+        self._offset = 0          # position of _buf[0] in the whole text
+        self._pos = 0             # next character of _buf to scan
+        self._mode = _OUT
+        self._in_array = False    # the current object is an element of the plan array
+        self._expect = None       # characters allowed next after an opening `[` / top-level `{`
+        self._element = 0         # elements seen in the current array
+        self._err_mark = 0        # errors recorded before the current array started
+        self._depth = 0
+        self._start = None        # _buf offset of the current object's `{`
+        self._in_str = False
+        self._esc = False
+
+    @property
+    def plan(self) -> List[Dict[str, Any]]:
+        return self.actions or self.loose
+
+    def feed(self, chunk: str) -> List[Dict[str, Any]]:
+        if self.closed or not chunk:
+            return []
+        self._buf += chunk
+        out = []
+        buf, i, n = self._buf, self._pos, len(self._buf)
+        while i < n:
+            if self._in_str:
+                if self._esc:
+                    self._esc = False
+                    i += 1
+                    continue
+                m = _STR_END.search(buf, i)
+                if m is None:
+                    i = n
+                    break
+                i = m.end()
+                if buf[m.start()] == '\\':
+                    self._esc = True
+                else:
+                    self._in_str = False
+                continue
+            if self._expect is not None:
+                m = _NON_WS.search(buf, i)
+                if m is None:
+                    i = n
+                    break
+                i = m.start()
+                if buf[i] not in self._expect:   # `[see below]`, `{name}`: prose, not JSON
+                    self._mode, self._start = _OUT, None
+                self._expect = None
+                continue
+            if self._mode == _OUT:
+                m = _OPEN.search(buf, i)
+                if m is None:
+                    i = n
+                    break
+                i = m.start()
+                if buf[i] == '[':
+                    self._mode, self._expect = _ARRAY, '{]'
+                    self._element, self._err_mark = 0, len(self.errors)
+                else:
+                    self._mode, self._in_array, self._expect = _OBJECT, False, '"}'
+                    self._depth, self._start = 1, i
+                i += 1
+                continue
+            if self._mode == _ARRAY:
+                m = _NON_WS.search(buf, i)
+                if m is None:
+                    i = n
+                    break
+                i = m.start()
+                c = buf[i]
+                if c == '{':
+                    self._mode, self._in_array, self._depth, self._start = _OBJECT, True, 1, i
+                    self._element += 1
+                elif c == ']':
+                    if self.actions:
+                        self.closed = True
+                        i += 1
+                        break
+                    self._mode = _OUT    # `[]` or `[{x}]` in prose: keep looking for the plan
+                    del self.errors[self._err_mark:]
+                elif c != ',':
+                    if self.actions:
+                        k = self._element + 1
+                        self.errors.append(problem('not_object', f'action {k}: not an object', index=k,
+                                                   offset=self._offset + i))
+                        self.closed = True
+                        break
+                    self._mode = _OUT
+                    del self.errors[self._err_mark:]
+                i += 1
+                continue
+            # inside an object: only quotes and brackets matter
+            m = _STRUCT.search(buf, i)
+            if m is None:
+                i = n
+                break
+            i = m.start()
+            c = buf[i]
+            if c == '"':
+                self._in_str = True
+            elif c in '{[':
+                self._depth += 1
+            else:
+                self._depth -= 1
+                if self._depth == 0:
+                    obj = self._decode(buf[self._start:i + 1], self._offset + self._start)
+                    if self._in_array:
+                        self._mode = _ARRAY
+                        if obj is not None:
+                            self.actions.append(obj)
+                            out.append(obj)
+                    else:
+                        self._mode = _OUT
+                        if isinstance(obj, dict) and 'type' in obj:
+                            self.loose.append(obj)
+                        elif isinstance(obj, dict) and not self.actions:
+                            wrapped = _wrapped_plan(obj)
+                            if wrapped:
+                                self.actions.extend(wrapped)
+                                out.extend(wrapped)
+                                self.closed = True
+                                i += 1
+                                self._start = None
+                                break
+                    self._start = None
+            i += 1
+        # keep only the unfinished object (the scanned prefix is never looked at again)
+        keep = self._start if self._start is not None else i
+        self._buf, self._pos = buf[keep:], i - keep
+        self._offset += keep
+        if self._start is not None:
+            self._start = 0
+        return out
+
+    def _decode(self, text: str, offset: int) -> Optional[Any]:
+        try:
+            return json.loads(text)
+        except Exception as e:
+            if self._in_array:
+                n = self._element
+                self.errors.append(problem('invalid_json', f'action {n}: invalid JSON ({e})', index=n, offset=offset))
+            return None
+
+    def finish(self) -> List[Dict[str, Any]]:
+        """End of input: flags a cut-off plan array; returns loose objects if they are the plan."""
+        if self.actions and not self.closed:
+            self.errors.append(problem('truncated', 'plan array not closed', offset=self._offset + len(self._buf)))
+        self.closed = True
+        return [] if self.actions else list(self.loose)
+
+
+def scan_actions(text: str) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """`(actions, parse_errors)` from arbitrary model output."""
+    parser = ActionStreamParser()
+    parser.feed(text or '')
+    parser.finish()
+    return parser.plan, parser.errors
+
+
+def validate_action(action: Any, index: int, schema: Dict[str, Dict[str, Tuple[str, bool]]] = ACTION_SCHEMA) -> List[Dict[str, Any]]:
+    if not isinstance(action, dict):
+        return [problem('not_object', f'action {index}: not an object', index=index)]
+    atype = action.get('type')
+    fields = schema.get(atype) if isinstance(atype, str) else None
+    if fields is None:
+        return [problem('unknown_type', f'action {index}: unknown type {atype!r}', index=index, field='type')]
+    out = []
+    for name, (kind, required) in fields.items():
+        if name not in action:
+            if required:
+                out.append(problem('missing_field', f'action {index} ({atype}): missing {name!r}', index=index, field=name))
+        elif not _KIND_CHECKS[kind](action[name]):
+            out.append(problem('bad_type', f'action {index} ({atype}): {name!r} must be {_KIND_NAMES[kind]}', index=index, field=name))
+    for name in action:
+        if name != 'type' and name not in fields:
+            out.append(problem('unknown_field', f'action {index} ({atype}): unknown field {name!r}',
+                               index=index, field=name, level='warning'))
+    return out
+
+
+def validate_actions(actions: Iterable[Any], schema: Dict[str, Dict[str, Tuple[str, bool]]] = ACTION_SCHEMA) -> List[Dict[str, Any]]:
+    """Problems with a complete plan (no 'error'-level entries means it can run)."""
+    out = []
+    count = 0
+    for count, action in enumerate(actions, 1):
+        out.extend(validate_action(action, count, schema))
+    if not count:
+        out.append(problem('empty', 'empty plan'))
+    return out
+
+
+def errors_only(problems: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    return [p for p in problems if p.get('level') == 'error']
+
+
+def parse_plan(text: str, schema: Dict[str, Dict[str, Tuple[str, bool]]] = ACTION_SCHEMA):
+    """`(actions, problems)`: scan `text` once, then validate what was found."""
+    actions, problems = scan_actions(text)
+    return actions, problems + validate_actions(actions, schema)
+
+
+# ---- benchmark ----
+
+def noisy_output(n_actions: int, noise: int = 20) -> str:
+    """Model-like reply: prose with stray brackets / braces, an example, then a fenced plan."""
+    prose = ('Sure! [Note: the {placeholder} values] are examples; see docs [1], [2]. '
+             'Steps like {"name": x} or [a, b] are not part of the plan. ')
+    plan = []
+    for k in range(n_actions):
+        plan.append({'type': 'hotkey', 'keys': ['ctrl', ']']} if k % 3 == 0 else
+                    {'type': 'type', 'text': f'line {k} with "quotes", [brackets] and {{braces}}'} if k % 3 == 1 else
+                    {'type': 'wait', 'seconds': 0.1})
+    plan.append({'type': 'done'})
+    return prose * noise + '\n```json\n' + json.dumps(plan, indent=1) + '\n```\n' + prose * noise
+
+
+def bench(sizes: Iterable[int] = (10, 100, 1000, 10000), repeat: int = 3) -> List[Dict[str, Any]]:
+    rows = []
+    for size in sizes:
+        text = noisy_output(size, noise=max(20, size // 5))
+        best = float('inf')
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            actions, problems = parse_plan(text)
+            best = min(best, time.perf_counter() - t0)
+        rows.append({'actions': size + 1, 'chars': len(text), 'seconds': best,
+                     'mb_per_s': len(text) / best / 1e6 if best else 0.0,
+                     'found': len(actions), 'errors': len(errors_only(problems))})
+    return rows
+
+
+if __name__ == '__main__':
+    import argparse
+
+    ap = argparse.ArgumentParser(prog='action_parser', description='Planner output parsing')
+    sub = ap.add_subparsers(dest='cmd', required=True)
+    bp = sub.add_parser('bench', help='Parse + validate time on large, noisy model outputs')
+    bp.add_argument('--sizes', type=int, nargs='+', default=[10, 100, 1000, 10000])
+    pp = sub.add_parser('check', help='Parse and validate a saved model reply')
+    pp.add_argument('path')
+    args = ap.parse_args()
+    if args.cmd == 'bench':
+        for r in bench(args.sizes):
+            print(f"{r['actions']:>6} actions  {r['chars']:>9} chars  {r['seconds'] * 1000:8.2f} ms  "
+                  f"{r['mb_per_s']:6.1f} MB/s  found={r['found']} errors={r['errors']}")
+    else:
+        with open(args.path, 'r', encoding='utf-8') as f:
+            actions, problems = parse_plan(f.read())
+        print(json.dumps({'actions': actions, 'problems': problems}, indent=2))
@@ -0,0 +1,310 @@
+"""Typed actions and the handler registry behind `samus_agent.execute_action`.
+
+- Each action type is a slotted dataclass; `compile_action(dict)` builds one with its fields
+  coerced once (`float(seconds)`, `int(x)`, ...), so executing a plan doesn't re-parse them per
+  step. A type that is unknown or doesn't coerce compiles to `Invalid`, whose result message is
+  what executing the raw action used to return.
+- `register_action(name, cls, handler)` maps a type name to `(cls, handler)`; dispatch is one
+  dict lookup. Handlers are called as `handler(action, apply) -> str`.
+- Plugins add action types: each module named in `SAMUS_ACTION_PLUGINS` (comma-separated) is
+  imported by `load_plugins()` and its `register(register_action)` is called. New types' fields
+  are added to `action_parser.ACTION_SCHEMA`, so plans using them validate.
+- `bench(steps)` measures dispatch overhead on a synthetic simulation-mode plan.
+
+Usage (a plugin module):
+  @dataclass(slots=True)
+  class Scroll(Action):
+      type: ClassVar[str] = 'scroll'
+      amount: int = 0
+
+  def register(register_action):
+      register_action('scroll', Scroll, lambda a, apply: f'(sim) scroll {a.amount}', doc='scroll (amount)')
+  python samus_manus_mvp/action_registry.py bench --steps 10000
+"""
+from dataclasses import MISSING, dataclass, field, fields
+import importlib
+import logging
+import os
+import time
+from typing import Any, Callable, ClassVar, Dict, List, Optional, Tuple
+
+# same resolution order as samus_agent, so both see one ACTION_SCHEMA
+try:
+    from action_parser import ACTION_SCHEMA
+except Exception:
+    from samus_manus_mvp.action_parser import ACTION_SCHEMA
+
+
+@dataclass(slots=True)
+class Action:
+    type: ClassVar[str] = ''
+
+
+@dataclass(slots=True)
+class Invalid(Action):
+    type: ClassVar[str] = 'invalid'
+    name: str = ''
+    message: str = ''
+
+
+@dataclass(slots=True)
+class Wait(Action):
+    type: ClassVar[str] = 'wait'
+    seconds: float = 1.0
+
+
+@dataclass(slots=True)
+class WaitChange(Action):
+    type: ClassVar[str] = 'wait_change'
+    region: Optional[List[int]] = None
+    timeout: float = 10.0
+    threshold: float = 2.0
+
+
+@dataclass(slots=True)
+class WaitSettle(Action):
+    type: ClassVar[str] = 'wait_settle'
+    region: Optional[List[int]] = None
+    timeout: float = 10.0
+    stable: float = 0.3
+
+
+@dataclass(slots=True)
+class WaitImage(Action):
+    type: ClassVar[str] = 'wait_image'
+    img: str = ''
+    timeout: float = 10.0
+    confidence: float = 0.8
+
+
+@dataclass(slots=True)
+class Screenshot(Action):
+    type: ClassVar[str] = 'screenshot'
+    out: str = 'screen.png'
+
+
+@dataclass(slots=True)
+class Click(Action):
+    type: ClassVar[str] = 'click'
+    x: Optional[int] = None
+    y: Optional[int] = None
+    button: str = 'left'
+
+
+@dataclass(slots=True)
+class DoubleClick(Action):
+    type: ClassVar[str] = 'double_click'
+    x: Optional[int] = None
+    y: Optional[int] = None
+
+
+@dataclass(slots=True)
+class FindClick(Action):
+    type: ClassVar[str] = 'find_click'
+    img: str = ''
+    confidence: float = 0.8
+    timeout: float = 3.0
+    button: str = 'left'
+
+
+@dataclass(slots=True)
+class WebOpen(Action):
+    type: ClassVar[str] = 'web_open'
+    url: str = 'about:blank'
+    session: str = 'default'
+    headful: bool = False
+
+
+@dataclass(slots=True)
+class WebClickText(Action):
+    type: ClassVar[str] = 'web_click_text'
+    text: str = ''
+    session: str = 'default'
+    timeout: float = 5000
+
+
+@dataclass(slots=True)
+class WebClick(Action):
+    type: ClassVar[str] = 'web_click'
+    selector: str = ''
+    session: str = 'default'
+    timeout: float = 5000
+
+
+@dataclass(slots=True)
+class WebFill(Action):
+    type: ClassVar[str] = 'web_fill'
+    selector: str = ''
+    value: str = ''
+    session: str = 'default'
+
+
+@dataclass(slots=True)
+class WebWait(Action):
+    type: ClassVar[str] = 'web_wait'
+    selector: str = ''
+    state: str = 'visible'
+    timeout: float = 10000
+    session: str = 'default'
+
+
+@dataclass(slots=True)
+class WebScreenshot(Action):
+    type: ClassVar[str] = 'web_screenshot'
+    out: str = 'webhands.png'
+    session: str = 'default'
+
+
+@dataclass(slots=True)
+class WebClose(Action):
+    type: ClassVar[str] = 'web_close'
+    session: str = 'default'
+
+
+@dataclass(slots=True)
+class Type(Action):
+    type: ClassVar[str] = 'type'
+    text: str = ''
+
+
+@dataclass(slots=True)
+class Press(Action):
+    type: ClassVar[str] = 'press'
+    key: str = 'enter'
+
+
+@dataclass(slots=True)
+class Hotkey(Action):
+    type: ClassVar[str] = 'hotkey'
+    keys: List[str] = field(default_factory=list)
+
+
+@dataclass(slots=True)
+class Done(Action):
+    type: ClassVar[str] = 'done'
+
+
+BUILTIN_ACTIONS = (Wait, WaitChange, WaitSettle, WaitImage, Screenshot, Click, DoubleClick, FindClick, WebOpen,
+                   WebClickText, WebClick, WebFill, WebWait, WebScreenshot, WebClose, Type, Press, Hotkey, Done)
+
+# type name -> (cls, handler); aliases point at the same entry
+REGISTRY: Dict[str, Tuple[type, Callable[[Any, bool], str]]] = {}
+_HANDLERS: Dict[type, Callable[[Any, bool], str]] = {Invalid: lambda a, apply: a.message}
+# extra "name (fields)" entries for the planner prompt, from plugins
+PLUGIN_DOCS: List[str] = []
+
+# per class: [(field name, coerce function or None)] built once at registration
+_FIELDS: Dict[type, List[Tuple[str, Optional[Callable]]]] = {}
+_COERCE = {float: float, int: lambda v: int(float(v)), Optional[int]: lambda v: int(float(v)), bool: bool, str: str,
+           Optional[List[int]]: lambda v: [int(float(k)) for k in v]}
+_KINDS = {float: 'number', int: 'number', Optional[int]: 'number', bool: 'bool', str: 'string',
+          List[str]: 'strings', list: 'strings', Optional[List[int]]: 'box'}
+
+
+def register_action(name: str, cls, handler: Callable[[Any, bool], str], aliases: Tuple[str, ...] = (),
+                    doc: Optional[str] = None):
+    """Map action type `name` (and `aliases`) to `cls` / `handler`; new types join ACTION_SCHEMA."""
+    _FIELDS[cls] = [(f.name, _COERCE.get(f.type)) for f in fields(cls)]
+    _HANDLERS[cls] = handler
+    for n in (name,) + tuple(aliases):
+        REGISTRY[n] = (cls, handler)
+    if name not in ACTION_SCHEMA:
+        ACTION_SCHEMA[name] = {f.name: (_KINDS.get(f.type, 'string'), f.default is MISSING and f.default_factory is MISSING)
+                               for f in fields(cls)}
+        if doc:
+            PLUGIN_DOCS.append(doc)
+
+
+def compile_action(action: Any) -> Action:
+    """Typed, coerced action for a plan entry (`Invalid` when it can't run)."""
+    if isinstance(action, Action):
+        return action
+    name = action.get('type') if isinstance(action, dict) else None
+    entry = REGISTRY.get(name)
+    if entry is None:
+        return Invalid(name=str(name), message=f'Unknown action type: {name}')
+    cls = entry[0]
+    kwargs = {}
+    for fname, coerce in _FIELDS[cls]:
+        value = action.get(fname)
+        if value is None:
+            continue  # missing (or null): the dataclass default applies
+        if coerce is not None:
+            try:
+                value = coerce(value)
+            except (TypeError, ValueError):
+                return Invalid(name=name, message=f'{name}: invalid {fname} {value!r}')
+        kwargs[fname] = value
+    return cls(**kwargs)
+
+
+def compile_plan(actions: List[Any]) -> List[Action]:
+    return [compile_action(a) for a in actions]
+
+
+def dispatch(action: Any, apply: bool) -> str:
+    a = action if isinstance(action, Action) else compile_action(action)
+    return _HANDLERS[type(a)](a, apply)
+
+
+def load_plugins(spec: Optional[str] = None) -> List[str]:
+    """Import the plugin modules named in `spec` / SAMUS_ACTION_PLUGINS and call their `register`."""
+    loaded = []
+    for name in (spec if spec is not None else os.getenv('SAMUS_ACTION_PLUGINS', '')).split(','):
+        name = name.strip()
+        if not name:
+            continue
+        try:
+            importlib.import_module(name).register(register_action)
+            loaded.append(name)
+        except Exception as e:
+            logging.info("Action plugin %s not loaded: %s", name, e)
+    return loaded
+
+
+# ---- benchmark ----
+
+def synthetic_plan(steps: int) -> List[Dict[str, Any]]:
+    """Simulation-safe plan (no sleeping, no files, no browser): clicks, typing, keys, a web step."""
+    cycle = [{'type': 'click', 'x': '10', 'y': 20}, {'type': 'type', 'text': 'hello'},
+             {'type': 'press', 'key': 'tab'}, {'type': 'hotkey', 'keys': ['ctrl', 's']},
+             {'type': 'double_click', 'x': 5, 'y': 6}, {'type': 'web_fill', 'selector': '#q', 'value': 'x'}]
+    return [dict(cycle[i % len(cycle)]) for i in range(steps)]
+
+
+def bench(execute: Callable[[Any, bool], str], steps: int = 10000, repeat: int = 3) -> Dict[str, float]:
+    """Best-of-`repeat` timings: dispatching raw dicts vs. a plan compiled once."""
+    plan = synthetic_plan(steps)
+    raw = compiled = compile_time = float('inf')
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for a in plan:
+            execute(a, False)
+        raw = min(raw, time.perf_counter() - t0)
+        t0 = time.perf_counter()
+        typed = compile_plan(plan)
+        t1 = time.perf_counter()
+        for a in typed:
+            execute(a, False)
+        compile_time = min(compile_time, t1 - t0)
+        compiled = min(compiled, time.perf_counter() - t1)
+    return {'steps': steps, 'raw_s': raw, 'compile_s': compile_time, 'compiled_s': compiled,
+            'raw_us_per_step': raw / steps * 1e6, 'compiled_us_per_step': compiled / steps * 1e6}
+
+
+if __name__ == '__main__':
+    import argparse
+
+    ap = argparse.ArgumentParser(prog='action_registry', description='Action dispatch')
+    sub = ap.add_subparsers(dest='cmd', required=True)
+    bp = sub.add_parser('bench', help='Dispatch overhead on a synthetic simulation-mode plan')
+    bp.add_argument('--steps', type=int, default=10000)
+    args = ap.parse_args()
+    try:
+        from samus_manus_mvp.samus_agent import execute_action
+    except Exception:
+        from samus_agent import execute_action
+    r = bench(execute_action, args.steps)
+    print(f"{r['steps']} steps  raw dicts: {r['raw_s'] * 1000:.1f} ms ({r['raw_us_per_step']:.2f} us/step)  "
+          f"compile: {r['compile_s'] * 1000:.1f} ms  compiled: {r['compiled_s'] * 1000:.1f} ms "
+          f"({r['compiled_us_per_step']:.2f} us/step)")
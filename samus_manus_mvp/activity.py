@@ -0,0 +1,81 @@
+"""User activity / AFK detection for the heartbeat.
+
+- Last activity comes from the memory `activity` table (one row per source, updated on every
+  `Memory.add`), so a check is a single indexed lookup instead of scanning recent memories.
+- When the OS can tell us how long the keyboard / mouse have been idle (Windows
+  `GetLastInputInfo`; `xprintidle` on X11 if installed), that is used too: the user counts as
+  active if either signal says so.
+
+Usage:
+  from samus_manus_mvp.activity import is_afk
+  if is_afk(threshold_minutes=15): ...
+"""
+import ctypes
+import os
+import shutil
+import subprocess
+import sys
+import time
+from typing import Iterable, Optional
+
+# memory record types that mean "the user did something"; rows written by the heartbeat and
+# by the runs it drives are tracked separately (`heartbeat:<type>`, `heartbeat_run:<type>`,
+# `worker:<type>`, see memory.activity_source and samus_agent.run_task's `source`)
+ACTIVITY_SOURCES = ('approval', 'action', 'task')
+
+
+def os_idle_seconds() -> Optional[float]:
+    """Seconds since the last keyboard / mouse input, or None if the OS can't tell us."""
+    if sys.platform == 'win32':
+        try:
+            class LASTINPUTINFO(ctypes.Structure):
+                _fields_ = [('cbSize', ctypes.c_uint), ('dwTime', ctypes.c_uint)]
+
+            info = LASTINPUTINFO()
+            info.cbSize = ctypes.sizeof(info)
+            if ctypes.windll.user32.GetLastInputInfo(ctypes.byref(info)):
+                millis = (ctypes.windll.kernel32.GetTickCount() - info.dwTime) & 0xFFFFFFFF
+                return millis / 1000.0
+        except Exception:
+            return None
+        return None
+    if os.environ.get('DISPLAY') and shutil.which('xprintidle'):
+        try:
+            out = subprocess.run(['xprintidle'], capture_output=True, text=True, timeout=1)
+            return int(out.stdout.strip()) / 1000.0
+        except Exception:
+            return None
+    return None
+
+
+def _memory():
+    try:
+        from samus_manus_mvp.memory import get_memory
+    except Exception:
+        from memory import get_memory
+    return get_memory()
+
+
+def idle_seconds(mem=None, sources: Iterable[str] = ACTIVITY_SOURCES, use_os: bool = True) -> Optional[float]:
+    """Seconds since the user was last active (smallest of the available signals), or None."""
+    signals = []
+    try:
+        mem = mem or _memory()
+        last = mem.last_activity(sources)
+        if last:
+            signals.append(max(0.0, time.time() - float(last)))
+    except Exception:
+        pass
+    if use_os:
+        os_idle = os_idle_seconds()
+        if os_idle is not None:
+            signals.append(os_idle)
+    return min(signals) if signals else None
+
+
+def is_afk(threshold_minutes: float, mem=None, use_os: bool = True) -> bool:
+    """True when the user has been idle for at least `threshold_minutes` (0 disables)."""
+    if not threshold_minutes or threshold_minutes <= 0:
+        return False
+    idle = idle_seconds(mem, use_os=use_os)
+    return idle is not None and idle >= threshold_minutes * 60
@@ -0,0 +1,312 @@
+#!/usr/bin/env python3
+"""Warm `samus_agent` worker pool for isolated heartbeat tasks.
+
+- Each worker is a long-lived Python process that imports `samus_agent` and opens memory
+  once (optionally pre-launching a headless WebHands browser), then serves tasks.
+- Requests / responses are newline-delimited JSON over the worker's stdin / stdout; anything
+  else the agent or its libraries print is redirected to the worker's stderr.
+- A worker is recycled after `max_tasks` tasks or when its RSS exceeds `max_rss_mb`.
+- Per-task timeouts kill only the worker running that task; the pool respawns it lazily.
+
+Usage (programmatic):
+  pool = AgentWorkerPool(size=2, task_timeout=300)
+  output, result = pool.run('Take a screenshot', apply=False)
+  pool.close()
+
+Worker protocol (one JSON object per line):
+  -> {"id": 1, "op": "run", "task": "...", "apply": false}
+  <- {"id": 1, "ok": true, "output": "...", "result": {...}, "rss_mb": 61.2}
+  -> {"id": 2, "op": "ping", "sleep": 0}    (health check; `sleep` delays the reply)
+  -> {"op": "exit"}
+"""
+from pathlib import Path
+import json
+import os
+import queue
+import subprocess
+import sys
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+try:
+    from samus_manus_mvp.metrics import REGISTRY
+except Exception:
+    from metrics import REGISTRY
+
+BASE = Path(__file__).parent
+SPAWN_SECONDS = REGISTRY.histogram('agent_worker_spawn_seconds', 'Worker process start-up time (until ready)')
+DEFAULT_TASK_TIMEOUT = 300.0
+DEFAULT_MAX_TASKS = 50
+DEFAULT_MAX_RSS_MB = 800.0
+STARTUP_TIMEOUT = 60.0
+
+
+def _rss_mb() -> Optional[float]:
+    """Current resident set size of this process in MB (best-effort, cross-platform)."""
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss / 1e6
+    except Exception:
+        pass
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 1e6
+    except Exception:
+        pass
+    try:
+        import resource
+        # peak, not current — still a usable recycling signal
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 1e6 if sys.platform == 'darwin' else peak / 1e3
+    except Exception:
+        return None
+
+
+# ---- worker side ----
+
+def worker_main(prelaunch_web: bool = False):
+    # keep the protocol channel private: stray prints go to stderr instead of corrupting it
+    proto = os.fdopen(os.dup(sys.stdout.fileno()), 'w', encoding='utf-8', buffering=1)
+    os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+    sys.stdout = sys.stderr
+
+    try:
+        from samus_manus_mvp import samus_agent
+    except Exception:
+        import samus_agent
+    try:
+        if samus_agent.get_memory is not None:
+            samus_agent.get_memory()
+    except Exception:
+        pass
+    if prelaunch_web and samus_agent.WebHands is not None:
+        try:
+            samus_agent.WEB_HANDS_WARM.append(samus_agent.WebHands(headful=False))
+        except Exception as e:
+            print('web prelaunch failed:', e, file=sys.stderr)
+
+    def reply(msg):
+        proto.write(json.dumps(msg, default=str) + '\n')
+        proto.flush()
+
+    reply({'ready': True, 'pid': os.getpid()})
+    for line in sys.stdin:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            req = json.loads(line)
+        except Exception as e:
+            reply({'ok': False, 'error': f'bad request: {e}'})
+            continue
+        op = req.get('op')
+        if op == 'exit':
+            break
+        if op == 'ping':
+            time.sleep(float(req.get('sleep') or 0))
+            reply({'id': req.get('id'), 'ok': True, 'rss_mb': _rss_mb()})
+            continue
+        if op != 'run':
+            reply({'id': req.get('id'), 'ok': False, 'error': f'unknown op: {op}'})
+            continue
+        import io
+        buf = io.StringIO()
+        try:
+            res = samus_agent.run_task(req.get('task', ''), apply=bool(req.get('apply')), approve_each=False, out=buf,
+                                      plan=req.get('plan'), session=req.get('session'), source='worker')
+            reply({'id': req.get('id'), 'ok': True, 'output': buf.getvalue(), 'result': res, 'rss_mb': _rss_mb()})
+        except Exception as e:
+            reply({'id': req.get('id'), 'ok': False, 'output': buf.getvalue(), 'error': str(e), 'rss_mb': _rss_mb()})
+    for wh in list(getattr(samus_agent, 'WEB_HANDS_WARM', [])):
+        try:
+            wh.close()
+        except Exception:
+            pass
+
+
+# ---- pool side ----
+
+class _Worker:
+    def __init__(self, cmd, env=None, cwd=None):
+        self.proc = subprocess.Popen(
+            cmd, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+            text=True, encoding='utf-8', env=env, cwd=cwd, bufsize=1,
+        )
+        self.lines: 'queue.Queue[Optional[str]]' = queue.Queue()
+        self.tasks = 0
+        self.rss_mb = None
+        self._next_id = 0
+        threading.Thread(target=self._pump, daemon=True).start()
+
+    def _pump(self):
+        try:
+            for line in self.proc.stdout:
+                self.lines.put(line)
+        except Exception:
+            pass
+        self.lines.put(None)  # EOF
+
+    def read(self, timeout: float) -> Dict[str, Any]:
+        deadline = time.monotonic() + timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise TimeoutError('worker timed out')
+            try:
+                line = self.lines.get(timeout=remaining)
+            except queue.Empty:
+                raise TimeoutError('worker timed out')
+            if line is None:
+                raise RuntimeError(f'worker exited (code {self.proc.poll()})')
+            try:
+                return json.loads(line)
+            except Exception:
+                continue
+
+    def request(self, payload: Dict[str, Any], timeout: float) -> Dict[str, Any]:
+        self._next_id += 1
+        payload = dict(payload, id=self._next_id)
+        self.proc.stdin.write(json.dumps(payload) + '\n')
+        self.proc.stdin.flush()
+        while True:
+            msg = self.read(timeout)
+            if msg.get('id') == self._next_id:
+                return msg
+
+    def alive(self) -> bool:
+        return self.proc.poll() is None
+
+    def stop(self, timeout: float = 2.0):
+        if not self.alive():
+            return
+        try:
+            self.proc.stdin.write(json.dumps({'op': 'exit'}) + '\n')
+            self.proc.stdin.flush()
+            self.proc.wait(timeout=timeout)
+        except Exception:
+            self.kill()
+
+    def kill(self):
+        try:
+            self.proc.kill()
+            self.proc.wait(timeout=5)
+        except Exception:
+            pass
+
+
+class AgentWorkerPool:
+    def __init__(self, size: int = 1, max_tasks: int = DEFAULT_MAX_TASKS, max_rss_mb: float = DEFAULT_MAX_RSS_MB,
+                 task_timeout: float = DEFAULT_TASK_TIMEOUT, prelaunch_web: bool = False, env: Optional[dict] = None):
+        self.size = max(1, int(size))
+        self.max_tasks = max_tasks
+        self.max_rss_mb = max_rss_mb
+        self.task_timeout = task_timeout
+        self.prelaunch_web = prelaunch_web
+        self.env = env
+        self._idle: 'queue.Queue[Optional[_Worker]]' = queue.Queue()
+        for _ in range(self.size):
+            self._idle.put(None)  # slot; a worker is spawned on first use
+        self._lock = threading.Lock()
+        self._all = set()
+        self.stats = {'spawned': 0, 'recycled': 0, 'timeouts': 0, 'tasks': 0}
+
+    def _spawn(self) -> _Worker:
+        # as a module from the repo root, so the worker imports the `samus_manus_mvp` package
+        # (and its memory, which honours SAMUS_MEMORY_DB) rather than the legacy root modules
+        cmd = [sys.executable, '-m', 'samus_manus_mvp.agent_pool', '--worker']
+        if self.prelaunch_web:
+            cmd.append('--prelaunch-web')
+        env = dict(os.environ, **(self.env or {}))
+        start = time.perf_counter()
+        w = _Worker(cmd, env=env, cwd=str(BASE.parent))
+        try:
+            w.read(STARTUP_TIMEOUT)  # wait for the ready banner (imports done)
+        except Exception:
+            w.kill()
+            raise
+        SPAWN_SECONDS.observe(time.perf_counter() - start)
+        with self._lock:
+            self._all.add(w)
+            self.stats['spawned'] += 1
+        return w
+
+    def _retire(self, w: _Worker, kill: bool = False):
+        with self._lock:
+            self._all.discard(w)
+        if kill:
+            w.kill()
+        else:
+            w.stop()
+
+    def warm(self):
+        """Spawn all workers now instead of on first use."""
+        slots = [self._idle.get() for _ in range(self.size)]
+        for i, w in enumerate(slots):
+            if w is None or not w.alive():
+                try:
+                    slots[i] = self._spawn()
+                except Exception:
+                    slots[i] = None
+        for w in slots:
+            self._idle.put(w)
+
+    def run(self, task: str, apply: bool = False, timeout: Optional[float] = None,
+            plan: Optional[list] = None, session: Optional[str] = None) -> Tuple[str, Dict[str, Any]]:
+        """Run one task on an idle worker; returns `(output_text, structured_result)`."""
+        timeout = self.task_timeout if timeout is None else timeout
+        w = self._idle.get()
+        try:
+            if w is None or not w.alive():
+                w = self._spawn()
+            req = {'op': 'run', 'task': task, 'apply': bool(apply)}
+            if plan is not None:
+                req['plan'] = plan
+            if session:
+                req['session'] = session
+            msg = w.request(req, timeout=timeout)
+        except TimeoutError:
+            self.stats['timeouts'] += 1
+            if w is not None:
+                self._retire(w, kill=True)
+            self._idle.put(None)
+            err = f'timed out after {timeout:g}s'
+            return f'Error running task: {err}', {'task': task, 'status': 'timeout', 'error': err, 'steps': []}
+        except Exception as e:
+            if w is not None:
+                self._retire(w, kill=True)
+            self._idle.put(None)
+            return f'Error running task: {e}', {'task': task, 'status': 'error', 'error': str(e), 'steps': []}
+
+        self.stats['tasks'] += 1
+        w.tasks += 1
+        w.rss_mb = msg.get('rss_mb')
+        if w.tasks >= self.max_tasks or (w.rss_mb and self.max_rss_mb and w.rss_mb > self.max_rss_mb):
+            self.stats['recycled'] += 1
+            self._retire(w)
+            w = None
+        self._idle.put(w)
+        if not msg.get('ok'):
+            err = msg.get('error') or 'worker error'
+            return (msg.get('output') or '') + f'Error running task: {err}', {'task': task, 'status': 'error', 'error': err, 'steps': []}
+        return msg.get('output') or '', msg.get('result') or {}
+
+    def close(self):
+        with self._lock:
+            workers = list(self._all)
+            self._all.clear()
+        for w in workers:
+            w.stop()
+
+
+if __name__ == '__main__':
+    import argparse
+
+    ap = argparse.ArgumentParser(prog='agent_pool', description='samus_agent worker process (used by heartbeat --isolate)')
+    ap.add_argument('--worker', action='store_true', help='Serve tasks over stdin/stdout (JSON lines)')
+    ap.add_argument('--prelaunch-web', action='store_true', help='Launch a headless WebHands browser up front')
+    args = ap.parse_args()
+    if args.worker:
+        worker_main(prelaunch_web=args.prelaunch_web)
+    else:
+        ap.print_help()
@@ -0,0 +1,203 @@
+"""Asynchronous, prioritized TTS announcements for the heartbeat daemon.
+
+- `say(text, priority, key)` only enqueues; a single background thread does the speaking,
+  so task execution never waits for `runAndWait`.
+- Lower priority numbers are spoken first (`ALERT` < `TASK` < `STATUS`); equal priorities are
+  spoken in order.
+- Messages with the same `key` coalesce: a newer "heartbeat" / "status" line replaces the
+  queued one instead of piling up behind it. When more than `max_pending` messages are
+  waiting, the lowest-priority, oldest ones are dropped.
+- Speech goes to the persistent TTS server (`tools/tts_server.py`, ws://127.0.0.1:8766) when
+  it is running and the `websockets` package is installed — playback is acknowledged before
+  the next message, so coalescing still applies — and to the local `speak` function otherwise.
+
+Usage:
+  ann = Announcer(speak).start()
+  ann.say('Running task: ...', priority=TASK)
+  ann.say('Heartbeat at 10:00. Pending tasks: 2', priority=STATUS, key='heartbeat')
+  ann.close()
+"""
+import heapq
+import itertools
+import json
+import socket
+import threading
+import time
+from typing import Callable, Optional
+
+try:
+    from websockets.sync.client import connect as ws_connect
+except Exception:
+    ws_connect = None
+
+ALERT, TASK, STATUS = 0, 1, 2
+TTS_HOST = '127.0.0.1'
+TTS_PORT = 8766
+SERVER_PROBE_INTERVAL = 30.0
+PLAYBACK_TIMEOUT = 60.0
+DEFAULT_MAX_PENDING = 32
+
+
+class _ServerClient:
+    """Connection to tools/tts_server.py (probed at most every SERVER_PROBE_INTERVAL seconds)."""
+
+    def __init__(self, host: str = TTS_HOST, port: int = TTS_PORT):
+        self.host, self.port = host, port
+        self._ws = None
+        self._next_probe = 0.0
+
+    def _listening(self) -> bool:
+        try:
+            with socket.create_connection((self.host, self.port), timeout=0.2):
+                return True
+        except OSError:
+            return False
+
+    def speak(self, text: str) -> bool:
+        """True if the server played `text`; False means use the local fallback."""
+        if ws_connect is None:
+            return False
+        if self._ws is None:
+            now = time.monotonic()
+            if now < self._next_probe:
+                return False
+            self._next_probe = now + SERVER_PROBE_INTERVAL
+            if not self._listening():
+                return False
+            try:
+                self._ws = ws_connect(f'ws://{self.host}:{self.port}', open_timeout=2)
+                self._ws.recv(timeout=2)  # ready banner
+            except Exception:
+                self.close()
+                return False
+        try:
+            self._ws.send(json.dumps({'text': text, 'wait': True}))
+            reply = json.loads(self._ws.recv(timeout=PLAYBACK_TIMEOUT))
+            return bool(reply.get('ok'))
+        except Exception:
+            self.close()
+            return False
+
+    def close(self):
+        ws, self._ws = self._ws, None
+        if ws is not None:
+            try:
+                ws.close()
+            except Exception:
+                pass
+
+
+class Announcer:
+    def __init__(self, speak_fn: Callable[[str], None], use_server: bool = True,
+                 max_pending: int = DEFAULT_MAX_PENDING,
+                 on_spoken: Optional[Callable[[str, float, str], None]] = None):
+        self.speak_fn = speak_fn
+        self.server = _ServerClient() if use_server else None
+        self.max_pending = max(1, int(max_pending))
+        self.on_spoken = on_spoken
+        self.stats = {'queued': 0, 'spoken': 0, 'coalesced': 0, 'dropped': 0, 'server': 0, 'errors': 0}
+        self._heap = []           # [priority, seq, text, key, live]
+        self._keyed = {}          # key -> queued entry
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._busy = False
+        self._closed = False
+        self._thread = None
+
+    def start(self) -> 'Announcer':
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._loop, name='announcer', daemon=True)
+            self._thread.start()
+        return self
+
+    def say(self, text: str, priority: int = STATUS, key: Optional[str] = None):
+        """Queue `text`; never blocks on speech."""
+        with self._cond:
+            if self._closed:
+                return
+            if key is not None and key in self._keyed:
+                self._keyed.pop(key)[4] = False  # the newer line wins
+                self.stats['coalesced'] += 1
+            entry = [priority, next(self._seq), text, key, True]
+            heapq.heappush(self._heap, entry)
+            if key is not None:
+                self._keyed[key] = entry
+            self.stats['queued'] += 1
+            self._trim()
+            self._cond.notify()
+
+    def pending(self) -> int:
+        with self._cond:
+            return sum(1 for e in self._heap if e[4])
+
+    def _trim(self):
+        live = [e for e in self._heap if e[4]]
+        for e in sorted(live, key=lambda e: (-e[0], e[1]))[:max(0, len(live) - self.max_pending)]:
+            e[4] = False
+            if e[3] is not None and self._keyed.get(e[3]) is e:
+                del self._keyed[e[3]]
+            self.stats['dropped'] += 1
+
+    def _next(self):
+        with self._cond:
+            while True:
+                while self._heap and not self._heap[0][4]:
+                    heapq.heappop(self._heap)
+                if self._heap:
+                    entry = heapq.heappop(self._heap)
+                    if entry[3] is not None and self._keyed.get(entry[3]) is entry:
+                        del self._keyed[entry[3]]
+                    self._busy = True
+                    return entry[2]
+                self._busy = False
+                self._cond.notify_all()
+                if self._closed:
+                    return None
+                self._cond.wait()
+
+    def _loop(self):
+        while True:
+            text = self._next()
+            if text is None:
+                break
+            start = time.perf_counter()
+            via = 'local'
+            try:
+                if self.server is not None and self.server.speak(text):
+                    via = 'server'
+                    self.stats['server'] += 1
+                else:
+                    self.speak_fn(text)
+                self.stats['spoken'] += 1
+            except Exception:
+                self.stats['errors'] += 1
+            if self.on_spoken is not None:
+                try:
+                    self.on_spoken(text, time.perf_counter() - start, via)
+                except Exception:
+                    pass
+        if self.server is not None:
+            self.server.close()
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until everything queued has been spoken; False on timeout."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while self._busy or any(e[4] for e in self._heap):
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    def close(self, timeout: float = 5.0):
+        """Speak what is queued (up to `timeout` seconds), then stop the thread."""
+        if self._thread is not None:
+            self.flush(timeout)
+        with self._cond:
+            self._closed = True
+            self._heap.clear()
+            self._keyed.clear()
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
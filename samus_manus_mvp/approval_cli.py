@@ -5,6 +5,9 @@ Usage examples:
   python samus_manus_mvp/approval_cli.py list --limit 50
   python samus_manus_mvp/approval_cli.py list --auto-only --since-seconds 86400
   python samus_manus_mvp/approval_cli.py list --task "screenshot"
+  python samus_manus_mvp/approval_cli.py search "type:click task:screenshot since:1d"
+  python samus_manus_mvp/approval_cli.py export --format columnar
+  python samus_manus_mvp/approval_cli.py output task-12     # full output (task id, blob hash or task text)
 """
 from pathlib import Path
 import argparse
@@ -12,8 +15,20 @@ import json
 import time
 from datetime import datetime
 
+try:
+    from samus_manus_mvp import audit_index, audit_columnar
+    from samus_manus_mvp.blob_store import BlobStore, BLOB_DIR, task_output
+    from samus_manus_mvp.task_queue import TaskQueue
+except Exception:
+    import audit_index
+    import audit_columnar
+    from blob_store import BlobStore, BLOB_DIR, task_output
+    from task_queue import TaskQueue
+
 BASE = Path(__file__).parent
 AUDIT_PATH = BASE / 'approval_audit.log'
+COLUMNAR_PATH = BASE / 'approval_audit.columnar'
+TASKS_DB = BASE / 'tasks.db'
 
 
 def load_audits(path: Path | None = None):
@@ -91,6 +106,39 @@ def cmd_list(limit: int = 50, auto_only: bool = False, task: str | None = None,
         print(f"{ts} | {auto_flag} | {approval} | {task_text} | step:{step} | {question}")
 
 
+def cmd_search(query: str, limit: int = 20, raw: bool = False):
+    """Ranked search over the audit log (see `audit_index` for the query syntax)."""
+    try:
+        hits = audit_index.search(query, AUDIT_PATH, limit=limit)
+    except ValueError as e:
+        print(f'Invalid query: {e}')
+        return
+    if raw:
+        for _, a in hits:
+            print(json.dumps(a, default=str))
+        return
+    for score, a in hits:
+        ts = a.get('ts')
+        try:
+            ts = datetime.fromtimestamp(float(ts)).isoformat(sep=' ')
+        except Exception:
+            ts = str(ts)
+        auto_flag = 'auto' if a.get('auto') else 'manual'
+        approval = a.get('approval') or a.get('answer')
+        question = a.get('question') or summarize_action(a.get('action'))
+        print(f"{score:6.2f} | {ts} | {auto_flag} | {approval} | {a.get('task')} | {question}")
+
+
+def cmd_export(fmt: str = 'columnar', out: str | None = None, rebuild: bool = False):
+    """Export the audit log for analytics. Columnar exports append only new lines."""
+    if fmt != 'columnar':
+        raise ValueError(f'unsupported export format: {fmt}')
+    out_dir = Path(out) if out else COLUMNAR_PATH
+    res = audit_columnar.export_columnar(AUDIT_PATH, out_dir, rebuild=rebuild)
+    print(f"exported {res['added']} new rows ({res['rows']} total) -> {out_dir}")
+    return res
+
+
 def cmd_aa(action: str = 'last', n_or_when=None, text_only: bool = False, when: str | None = None):
     """Convenience: `aa last N`, `aa list today`, or `aa flamegraph`.
 
@@ -185,6 +233,31 @@ def cmd_aa(action: str = 'last', n_or_when=None, text_only: bool = False, when:
     raise ValueError('unsupported aa action')
 
 
+def cmd_output(ref: str):
+    """Print the full output of a heartbeat task (by task id, blob hash, or latest audit entry for a task text)."""
+    store = BlobStore(BASE / BLOB_DIR)
+    if store.exists(ref):
+        print(store.get_text(ref))
+        return
+    record = None
+    if TASKS_DB.exists():
+        q = TaskQueue(TASKS_DB)
+        try:
+            record = q.get(ref, archived=True)
+        finally:
+            q.close()
+    if record is None:
+        for a in reversed(load_audits()):
+            act = a.get('action')
+            if a.get('task') == ref and isinstance(act, dict) and ('result' in act or 'result_blob' in act):
+                record = act
+                break
+    if record is None:
+        print(f'No task output found for {ref!r}.')
+        return
+    print(task_output(record, store))
+
+
 def main():
     ap = argparse.ArgumentParser(prog='approval', description='Approval audit CLI')
     sub = ap.add_subparsers(dest='cmd', required=True)
@@ -197,6 +270,18 @@ def main():
     p.add_argument('--raw', action='store_true', help='Print raw JSON lines')
     p.set_defaults(func=lambda a: cmd_list(a.limit, a.auto_only, a.task, a.since_seconds, a.raw))
 
+    ps = sub.add_parser('search', help='Ranked, fielded search (e.g. "type:click task:screenshot since:1d")')
+    ps.add_argument('query', nargs='+')
+    ps.add_argument('--limit', type=int, default=20)
+    ps.add_argument('--raw', action='store_true', help='Print raw JSON lines')
+    ps.set_defaults(func=lambda a: cmd_search(' '.join(a.query), a.limit, a.raw))
+
+    pe = sub.add_parser('export', help='Export the audit log (columnar: dictionary-encoded, NumPy-loadable)')
+    pe.add_argument('--format', dest='fmt', choices=['columnar'], default='columnar')
+    pe.add_argument('--out', help='Output directory (default approval_audit.columnar next to the log)')
+    pe.add_argument('--rebuild', action='store_true', help='Discard the existing export and re-read the whole log')
+    pe.set_defaults(func=lambda a: cmd_export(a.fmt, a.out, a.rebuild))
+
     p2 = sub.add_parser('aa', help='Convenience auto-approval helpers (alias for approval audit)')
     p2.add_argument('action', nargs='?', choices=['last','list','flamegraph'], default='last')
     p2.add_argument('n', nargs='?', default=None, help='Number for last N OR keyword like "today" for list')
@@ -204,6 +289,10 @@ def main():
     p2.add_argument('--text', dest='text_only', action='store_true', help='Print only the question text')
     p2.set_defaults(func=lambda a: cmd_aa(a.action, a.n, a.text_only, a.when))
 
+    po = sub.add_parser('output', help='Print the full output of a heartbeat task')
+    po.add_argument('ref', help='Task id (e.g. task-12), blob hash, or exact task text')
+    po.set_defaults(func=lambda a: cmd_output(a.ref))
+
     args = ap.parse_args()
     args.func(args)
 
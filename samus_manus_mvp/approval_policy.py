@@ -0,0 +1,173 @@
+"""Approval policy engine — precompiled auto-approval decisions for `run_task`.
+
+- Remembered approvals (memory records of type `approval`) are compiled into two hash maps,
+  keyed by exact task text and by action type, so each step's lookup is O(1).
+- Optional explicit rules from `approval_policy.json` (allow / deny) match on task and/or
+  action type with exact values, globs (`Take a *`) or regexes (`re:^web_`).
+- The policy subscribes to memory writes, so approvals remembered mid-run apply immediately.
+
+Precedence (first hit wins):
+  1. deny rules   2. allow rules   3. remembered approval for the exact task
+  4. remembered approval for the action type   5. no decision (ask the user)
+
+`approval_policy.json` example:
+  {"rules": [
+    {"effect": "deny",  "type": "hotkey"},
+    {"effect": "allow", "task": "Take a *"},
+    {"effect": "allow", "type": "re:^web_(open|screenshot)$"}
+  ]}
+"""
+from pathlib import Path
+import fnmatch
+import json
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+BASE = Path(__file__).parent
+POLICY_PATH = BASE / 'approval_policy.json'
+_GLOB_CHARS = set('*?[')
+
+
+def _compile(pattern: str):
+    """Return ('exact', value) or ('pattern', compiled regex) for one rule field."""
+    if pattern.startswith('re:'):
+        return 'pattern', re.compile(pattern[3:])
+    if _GLOB_CHARS & set(pattern):
+        return 'pattern', re.compile(fnmatch.translate(pattern), re.IGNORECASE)
+    return 'exact', pattern
+
+
+def _answer(effect: str) -> str:
+    return 'y' if effect == 'allow' else 'n'
+
+
+class ApprovalPolicy:
+    def __init__(self, rules: Optional[List[Dict[str, Any]]] = None):
+        # remembered approvals: newest record wins
+        self.by_task: Dict[str, str] = {}
+        self.by_type: Dict[str, str] = {}
+        # explicit rules, per effect: exact single-field rules go into hash maps,
+        # everything else (globs, regexes, task+type combos) into a short pattern list
+        self._exact: Dict[str, Dict[str, Dict[str, bool]]] = {
+            'deny': {'task': {}, 'type': {}}, 'allow': {'task': {}, 'type': {}},
+        }
+        self._patterns: Dict[str, list] = {'deny': [], 'allow': []}
+        self._memo: Dict[Tuple[str, str], Optional[str]] = {}
+        self._mem = None
+        for rule in rules or []:
+            self.add_rule(rule)
+
+    # --- building ---
+    def add_rule(self, rule: Dict[str, Any]):
+        effect = str(rule.get('effect', 'allow')).lower()
+        if effect not in ('allow', 'deny'):
+            raise ValueError(f'unknown policy effect: {effect}')
+        fields = {k: _compile(str(rule[k])) for k in ('task', 'type') if rule.get(k) is not None}
+        if not fields:
+            raise ValueError('policy rule needs a `task` and/or `type`')
+        if len(fields) == 1:
+            (field, (kind, value)), = fields.items()
+            if kind == 'exact':
+                self._exact[effect][field][value] = True
+                self._memo.clear()
+                return
+        self._patterns[effect].append(fields)
+        self._memo.clear()
+
+    def learn(self, record: Dict[str, Any]):
+        """Fold one memory record into the maps (ignored unless it is an `approval`)."""
+        if record.get('type') != 'approval':
+            return
+        ans = str(record.get('text') or '').strip().lower()
+        if not ans:
+            return
+        md = record.get('metadata') or {}
+        if md.get('task'):
+            self.by_task[md['task']] = ans
+        act = md.get('action')
+        if isinstance(act, dict) and act.get('type'):
+            self.by_type[act['type']] = ans
+        self._memo.clear()
+
+    # --- deciding ---
+    @staticmethod
+    def _match(fields, task: str, atype: str) -> bool:
+        values = {'task': task, 'type': atype}
+        for field, (kind, value) in fields.items():
+            v = values[field]
+            if kind == 'exact':
+                if v != value:
+                    return False
+            elif not value.match(v):
+                return False
+        return True
+
+    def _rule_decision(self, task: str, atype: str) -> Optional[str]:
+        for effect in ('deny', 'allow'):
+            exact = self._exact[effect]
+            if task in exact['task'] or atype in exact['type']:
+                return _answer(effect)
+            for fields in self._patterns[effect]:
+                if self._match(fields, task, atype):
+                    return _answer(effect)
+        return None
+
+    def decide(self, task: str, action: Dict[str, Any]) -> Optional[str]:
+        """Return the auto answer ('y' / 'n' / remembered text) or None to ask the user."""
+        atype = str(action.get('type') or '') if isinstance(action, dict) else ''
+        key = (task, atype)
+        if key in self._memo:
+            return self._memo[key]
+        ans = self._rule_decision(task, atype)
+        if ans is None:
+            ans = self.by_task.get(task) or self.by_type.get(atype)
+        self._memo[key] = ans
+        return ans
+
+    def close(self):
+        """Stop following memory writes (call when the run is over)."""
+        if self._mem is not None:
+            try:
+                self._mem.unsubscribe(self.learn)
+            except Exception:
+                pass
+            self._mem = None
+
+
+def load_rules(path: Path = None) -> List[Dict[str, Any]]:
+    path = Path(path) if path else POLICY_PATH
+    if not path.exists():
+        return []
+    try:
+        data = json.loads(path.read_text(encoding='utf-8'))
+    except Exception:
+        return []
+    return data.get('rules', []) if isinstance(data, dict) else []
+
+
+def load_policy(mem=None, path: Path = None, limit: int = 1000) -> ApprovalPolicy:
+    """Compile rules + remembered approvals once; keeps itself current via `mem.subscribe`."""
+    policy = ApprovalPolicy()
+    for rule in load_rules(path):
+        try:
+            policy.add_rule(rule)
+        except Exception:
+            continue
+    if mem is None:
+        return policy
+    try:
+        by_type = getattr(mem, 'by_type', None)
+        if by_type is not None:
+            rows = by_type('approval', limit)
+        else:
+            rows = [r for r in mem.all(limit) if r.get('type') == 'approval']
+        # rows are newest first; replay oldest -> newest so the latest answer wins
+        for r in reversed(rows):
+            policy.learn(r)
+    except Exception:
+        pass
+    subscribe = getattr(mem, 'subscribe', None)
+    if subscribe is not None:
+        subscribe(policy.learn)
+        policy._mem = mem
+    return policy
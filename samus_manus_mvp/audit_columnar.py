@@ -0,0 +1,227 @@
+"""Columnar export of `approval_audit.log` for fast analytics (NumPy-friendly).
+
+Layout of an export directory (default `approval_audit.columnar/` next to the log):
+- `meta.json`     row count, source byte offset, column kinds and string dictionaries
+- `<col>.f64`     float64 values (NaN = missing) — `ts`, `step` and numeric action fields
+- `<col>.i32`     int32 dictionary codes (-1 = missing) — `task`, `type`, `answer`, string action fields
+- `auto.i8`       1 / 0 (-1 = missing)
+
+Action dicts are flattened into `action.<key>` columns (lists are joined with '+').
+A column's kind is fixed the first time a key is seen; values that don't fit it are stored
+as missing. Exports are incremental: only lines appended since the last run are parsed
+and appended to the column files.
+
+Usage:
+  python samus_manus_mvp/approval_cli.py export --format columnar
+  cols, dicts = load_columnar(path)   # numpy arrays, e.g. cols['ts'] > cutoff
+"""
+from array import array
+from pathlib import Path
+import json
+import math
+import os
+import sys
+from typing import Any, Dict, List, Tuple
+
+try:
+    import numpy as np
+except Exception:
+    np = None
+
+FORMAT_VERSION = 1
+# fixed columns (always present) and their kinds
+BASE_COLUMNS = {'ts': 'f64', 'step': 'f64', 'auto': 'i8', 'task': 'dict', 'type': 'dict', 'answer': 'dict'}
+_SUFFIX = {'f64': '.f64', 'dict': '.i32', 'i8': '.i8'}
+_TYPECODE = {'f64': 'd', 'dict': 'i', 'i8': 'b'}
+_ITEMSIZE = {'f64': 8, 'dict': 4, 'i8': 1}
+_MISSING = {'f64': math.nan, 'dict': -1, 'i8': -1}
+
+
+def _new_meta() -> Dict[str, Any]:
+    return {'version': FORMAT_VERSION, 'rows': 0, 'offset': 0, 'columns': dict(BASE_COLUMNS), 'dicts': {}}
+
+
+def _load_meta(out_dir: Path) -> Dict[str, Any]:
+    p = out_dir / 'meta.json'
+    if p.exists():
+        try:
+            return json.loads(p.read_text(encoding='utf-8'))
+        except Exception:
+            pass
+    return _new_meta()
+
+
+def _save_meta(out_dir: Path, meta: Dict[str, Any]):
+    tmp = out_dir / 'meta.json.tmp'
+    tmp.write_text(json.dumps(meta), encoding='utf-8')
+    os.replace(tmp, out_dir / 'meta.json')
+
+
+def _column_path(out_dir: Path, name: str, kind: str) -> Path:
+    return out_dir / (name + _SUFFIX[kind])
+
+
+def _float(v) -> float:
+    try:
+        return float(v)
+    except Exception:
+        return math.nan
+
+
+def _flatten(entry: Dict[str, Any]) -> Dict[str, Any]:
+    act = entry.get('action') if isinstance(entry.get('action'), dict) else {}
+    auto = entry.get('auto')
+    row = {
+        'ts': _float(entry.get('ts')),
+        'step': _float(entry.get('step')) if entry.get('step') is not None else math.nan,
+        'auto': -1 if auto is None else int(bool(auto)),
+        'task': entry.get('task'),
+        'type': act.get('type'),
+        'answer': entry.get('approval') or entry.get('answer'),
+    }
+    for k, v in act.items():
+        if k == 'type':
+            continue
+        if isinstance(v, (list, tuple)):
+            v = '+'.join(str(x) for x in v)
+        elif isinstance(v, dict):
+            v = json.dumps(v, sort_keys=True)
+        row['action.' + k] = v
+    return row
+
+
+def _kind_for(value) -> str:
+    if isinstance(value, (bool, int, float)):
+        return 'f64'
+    return 'dict'
+
+
+def _read_new_lines(src: Path, offset: int) -> Tuple[List[Dict[str, Any]], int]:
+    with open(src, 'rb') as f:
+        f.seek(offset)
+        chunk = f.read()
+    end = chunk.rfind(b'\n')
+    if end < 0:
+        return [], offset
+    rows = []
+    for line in chunk[:end].split(b'\n'):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            entry = json.loads(line.decode('utf-8'))
+        except Exception:
+            continue
+        if isinstance(entry, dict):
+            rows.append(_flatten(entry))
+    return rows, offset + end + 1
+
+
+def export_columnar(src: Path, out_dir: Path, rebuild: bool = False) -> Dict[str, int]:
+    """Append audit lines newer than the last export to the columnar files in `out_dir`.
+
+    Returns `{'rows': total_rows, 'added': new_rows}`.
+    """
+    src = Path(src)
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    meta = _load_meta(out_dir)
+    size = src.stat().st_size if src.exists() else 0
+    if rebuild or meta.get('version') != FORMAT_VERSION or size < meta.get('offset', 0):
+        for name, kind in meta.get('columns', {}).items():
+            try:
+                _column_path(out_dir, name, kind).unlink()
+            except FileNotFoundError:
+                pass
+        meta = _new_meta()
+    n_old = meta['rows']
+    columns: Dict[str, str] = meta['columns']
+
+    # recover from an interrupted export: trim column files back to the committed row count
+    for name, kind in columns.items():
+        p = _column_path(out_dir, name, kind)
+        if p.exists() and p.stat().st_size > n_old * _ITEMSIZE[kind]:
+            with open(p, 'r+b') as f:
+                f.truncate(n_old * _ITEMSIZE[kind])
+
+    if not src.exists():
+        return {'rows': n_old, 'added': 0}
+    rows, new_offset = _read_new_lines(src, meta.get('offset', 0))
+    if not rows:
+        meta['offset'] = new_offset
+        _save_meta(out_dir, meta)
+        return {'rows': n_old, 'added': 0}
+
+    # discover new action columns (backfilled with missing values for older rows)
+    for row in rows:
+        for k, v in row.items():
+            if k not in columns and v is not None:
+                columns[k] = _kind_for(v)
+                # drop leftovers of an interrupted run that never made it into meta.json
+                try:
+                    _column_path(out_dir, k, columns[k]).unlink()
+                except FileNotFoundError:
+                    pass
+                if n_old:
+                    arr = array(_TYPECODE[columns[k]], [_MISSING[columns[k]]]) * n_old
+                    _write(out_dir, k, columns[k], arr)
+
+    dicts: Dict[str, List[str]] = meta['dicts']
+    lookups = {name: {v: i for i, v in enumerate(dicts.get(name, []))} for name, kind in columns.items() if kind == 'dict'}
+    for name, kind in columns.items():
+        arr = array(_TYPECODE[kind])
+        if kind == 'dict':
+            values = dicts.setdefault(name, [])
+            lookup = lookups[name]
+            for row in rows:
+                v = row.get(name)
+                if v is None or (isinstance(v, (bool, int, float)) and name.startswith('action.')):
+                    arr.append(-1)
+                    continue
+                v = str(v)
+                code = lookup.get(v)
+                if code is None:
+                    code = lookup[v] = len(values)
+                    values.append(v)
+                arr.append(code)
+        elif kind == 'f64':
+            for row in rows:
+                v = row.get(name)
+                arr.append(math.nan if v is None or isinstance(v, str) else _float(v))
+        else:
+            for row in rows:
+                v = row.get(name)
+                arr.append(-1 if v is None else int(v))
+        _write(out_dir, name, kind, arr)
+
+    meta['rows'] = n_old + len(rows)
+    meta['offset'] = new_offset
+    meta['source'] = str(src)
+    _save_meta(out_dir, meta)
+    return {'rows': meta['rows'], 'added': len(rows)}
+
+
+def _write(out_dir: Path, name: str, kind: str, arr: array):
+    # column files are little-endian on disk regardless of host byte order
+    if sys.byteorder != 'little':
+        arr.byteswap()
+    with open(_column_path(out_dir, name, kind), 'ab') as f:
+        arr.tofile(f)
+
+
+def load_columnar(out_dir: Path):
+    """Load an export as `(columns, dicts)`: numpy arrays keyed by column name plus the
+    string dictionaries for dictionary-encoded columns (index with the int32 codes)."""
+    if np is None:
+        raise RuntimeError('numpy is required to load columnar exports')
+    out_dir = Path(out_dir)
+    meta = _load_meta(out_dir)
+    dtypes = {'f64': '<f8', 'dict': '<i4', 'i8': 'i1'}
+    cols = {}
+    for name, kind in meta['columns'].items():
+        p = _column_path(out_dir, name, kind)
+        if not p.exists():
+            cols[name] = np.full(meta['rows'], _MISSING[kind], dtype=dtypes[kind])
+            continue
+        cols[name] = np.fromfile(p, dtype=dtypes[kind], count=meta['rows'])
+    return cols, {k: np.array(v, dtype=object) for k, v in meta['dicts'].items()}
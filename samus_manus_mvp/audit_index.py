@@ -0,0 +1,293 @@
+"""Indexed search over `approval_audit.log` (inverted index + fielded queries).
+
+- `AuditIndex(path)` tails the JSONL audit log incrementally: only bytes appended since
+  the last refresh are parsed, so repeated searches don't re-read months of history.
+- Inverted indexes on tokens of `question`, `task` and the flattened `action` dict, plus
+  exact-value indexes for action `type`, `auto` and the approval answer.
+- `search('type:click task:screenshot since:1d')` parses a fielded query and ranks hits
+  with BM25 over the text fields (ties broken by recency).
+- `match='any'` lets an entry hit any of the free words instead of all of them (fielded
+  terms and filters still all apply): knowledge.retrieve passes whole task sentences, which
+  would almost never match every word.
+
+Query syntax:
+  words               free text; every word must appear in question, task or action
+                      (any of them with match='any')
+  word*               prefix match
+  task:x  question:x (or q:x)  action:x   word restricted to one field
+  type:click          exact action type
+  auto:yes|no         auto-approved vs manual entries
+  answer:y            exact approval/answer value
+  since:1d            newer than 1d / 6h / 30m / 45s / 2w (or an epoch timestamp); any other
+                      value is rejected with ValueError rather than ignored
+"""
+from pathlib import Path
+import json
+import math
+import os
+import re
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+TEXT_FIELDS = ('question', 'task', 'action')
+FIELD_ALIASES = {'q': 'question', 'question': 'question', 'task': 'task', 'action': 'action'}
+_TOKEN_RE = re.compile(r'[a-z0-9_]+')
+_SINCE_RE = re.compile(r'^(\d+(?:\.\d+)?)([smhdw]?)$')
+_UNITS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400, 'w': 604800, '': 1}
+
+# BM25 parameters
+_K1 = 1.2
+_B = 0.75
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN_RE.findall((text or '').lower())
+
+
+def _flatten_action(act: Any) -> str:
+    """Flatten an action dict into one string of its keys' values (nested lists included)."""
+    if not act:
+        return ''
+    if isinstance(act, dict):
+        return ' '.join(_flatten_action(v) for v in act.values())
+    if isinstance(act, (list, tuple)):
+        return ' '.join(_flatten_action(v) for v in act)
+    return str(act)
+
+
+def parse_since(value: str, now: Optional[float] = None) -> Optional[float]:
+    """Return the cutoff timestamp for a `since:` value, or None when unparseable.
+
+    Bare numbers larger than ~3 years of seconds are treated as epoch timestamps.
+    """
+    m = _SINCE_RE.match((value or '').strip().lower())
+    if not m:
+        return None
+    n = float(m.group(1))
+    unit = m.group(2)
+    if not unit and n > 1e8:
+        return n
+    return (now if now is not None else time.time()) - n * _UNITS[unit]
+
+
+def parse_query(query: str, now: Optional[float] = None) -> Dict[str, Any]:
+    """Split a query string into free terms, per-field terms and exact filters (ValueError on a bad `since:`)."""
+    parsed: Dict[str, Any] = {'terms': [], 'fields': {}, 'type': None, 'auto': None, 'answer': None, 'since': None}
+    for raw in re.findall(r'\S+:"[^"]*"|"[^"]*"|\S+', query or ''):
+        key, sep, val = raw.partition(':')
+        if sep and val:
+            key = key.lower()
+            val = val.strip('"')
+            if key in FIELD_ALIASES:
+                field = FIELD_ALIASES[key]
+                parsed['fields'].setdefault(field, []).extend(_query_tokens(val))
+                continue
+            if key == 'type':
+                parsed['type'] = val.lower()
+                continue
+            if key == 'auto':
+                parsed['auto'] = val.lower() in ('1', 'y', 'yes', 'true', 'auto')
+                continue
+            if key in ('answer', 'approval'):
+                parsed['answer'] = val.lower()
+                continue
+            if key == 'since':
+                parsed['since'] = parse_since(val, now=now)
+                if parsed['since'] is None:
+                    raise ValueError(f'invalid since:{val} (use 1d / 6h / 30m / 45s / 2w or an epoch timestamp)')
+                continue
+        parsed['terms'].extend(_query_tokens(raw.strip('"')))
+    return parsed
+
+
+def _query_tokens(text: str) -> List[str]:
+    # keep a trailing '*' so prefix queries survive tokenization
+    out = []
+    for word in (text or '').split():
+        prefix = word.endswith('*')
+        toks = tokenize(word)
+        if prefix and toks:
+            toks[-1] += '*'
+        out.extend(toks)
+    return out
+
+
+class AuditIndex:
+    """Incrementally maintained inverted index over one audit log file."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self.entries: List[Dict[str, Any]] = []
+        self._ts: List[float] = []
+        # postings[field][token] -> {doc_id: term frequency}
+        self._postings: Dict[str, Dict[str, Dict[int, int]]] = {f: {} for f in TEXT_FIELDS}
+        self._lengths: Dict[str, List[int]] = {f: [] for f in TEXT_FIELDS}
+        self._total_len: Dict[str, int] = {f: 0 for f in TEXT_FIELDS}
+        self._by_type: Dict[str, List[int]] = {}
+        self._offset = 0
+        self._ino = None
+
+    # --- maintenance ---
+    def refresh(self) -> int:
+        """Index lines appended since the last refresh. Returns the number of new entries."""
+        with self._lock:
+            try:
+                st = os.stat(self.path)
+            except OSError:
+                self._reset()
+                return 0
+            # rotated or truncated file: rebuild from scratch
+            if st.st_size < self._offset or (self._ino is not None and st.st_ino != self._ino):
+                self._reset()
+            self._ino = st.st_ino
+            if st.st_size == self._offset:
+                return 0
+            added = 0
+            with open(self.path, 'rb') as f:
+                f.seek(self._offset)
+                chunk = f.read()
+            # only consume complete lines; a partially written tail is picked up next time
+            end = chunk.rfind(b'\n')
+            if end < 0:
+                return 0
+            for line in chunk[:end].split(b'\n'):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    entry = json.loads(line.decode('utf-8'))
+                except Exception:
+                    continue
+                if isinstance(entry, dict):
+                    self._add(entry)
+                    added += 1
+            self._offset += end + 1
+            return added
+
+    def _add(self, entry: Dict[str, Any]):
+        doc = len(self.entries)
+        self.entries.append(entry)
+        try:
+            self._ts.append(float(entry.get('ts') or 0))
+        except Exception:
+            self._ts.append(0.0)
+        act = entry.get('action')
+        texts = {
+            'question': str(entry.get('question') or ''),
+            'task': str(entry.get('task') or ''),
+            'action': _flatten_action(act),
+        }
+        for field, text in texts.items():
+            toks = tokenize(text)
+            self._lengths[field].append(len(toks))
+            self._total_len[field] += len(toks)
+            postings = self._postings[field]
+            for tok in toks:
+                docs = postings.setdefault(tok, {})
+                docs[doc] = docs.get(doc, 0) + 1
+        atype = act.get('type') if isinstance(act, dict) else None
+        if atype:
+            self._by_type.setdefault(str(atype).lower(), []).append(doc)
+
+    # --- querying ---
+    def _docs_for(self, field: str, term: str) -> Dict[int, int]:
+        postings = self._postings[field]
+        if term.endswith('*'):
+            prefix = term[:-1]
+            merged: Dict[int, int] = {}
+            for tok, docs in postings.items():
+                if tok.startswith(prefix):
+                    for d, tf in docs.items():
+                        merged[d] = merged.get(d, 0) + tf
+            return merged
+        return postings.get(term, {})
+
+    def _bm25(self, field: str, docs: Dict[int, int]) -> Dict[int, float]:
+        n = len(self.entries)
+        df = len(docs)
+        idf = math.log(1 + (n - df + 0.5) / (df + 0.5))
+        avg = (self._total_len[field] / n) if n else 0.0
+        lengths = self._lengths[field]
+        out = {}
+        for d, tf in docs.items():
+            norm = 1 - _B + _B * (lengths[d] / avg if avg else 0.0)
+            out[d] = idf * tf * (_K1 + 1) / (tf + _K1 * norm)
+        return out
+
+    def search(self, query: str, limit: int = 20, match: str = 'all') -> List[Tuple[float, Dict[str, Any]]]:
+        """Return up to `limit` `(score, entry)` pairs, best first; `match` is 'all' or 'any' free words."""
+        if match not in ('all', 'any'):
+            raise ValueError(f'unknown match mode: {match}')
+        q = parse_query(query)
+        self.refresh()
+        # score under the lock: a concurrent refresh() mutates (or resets) the maps read below
+        with self._lock:
+            return self._search(q, limit, match)
+
+    def _search(self, q: Dict[str, Any], limit: int, match: str = 'all') -> List[Tuple[float, Dict[str, Any]]]:
+        scores: Optional[Dict[int, float]] = None
+
+        def intersect(hits: Dict[int, float]):
+            nonlocal scores
+            if scores is None:
+                scores = dict(hits)
+            else:
+                scores = {d: s + hits[d] for d, s in scores.items() if d in hits}
+
+        # free terms: each must hit at least one text field (scores summed across fields);
+        # with match='any' an entry needs just one of them and sums the scores of those it hits
+        union: Dict[int, float] = {}
+        for term in q['terms']:
+            hits: Dict[int, float] = {}
+            for field in TEXT_FIELDS:
+                for d, s in self._bm25(field, self._docs_for(field, term)).items():
+                    hits[d] = hits.get(d, 0.0) + s
+            if match == 'any':
+                for d, s in hits.items():
+                    union[d] = union.get(d, 0.0) + s
+            else:
+                intersect(hits)
+        if match == 'any' and q['terms']:
+            intersect(union)
+        for field, terms in q['fields'].items():
+            for term in terms:
+                intersect(self._bm25(field, self._docs_for(field, term)))
+        if q['type']:
+            intersect({d: 0.0 for d in self._by_type.get(q['type'], [])})
+
+        candidates = scores.keys() if scores is not None else range(len(self.entries))
+        results = []
+        for d in candidates:
+            e = self.entries[d]
+            if q['since'] is not None and self._ts[d] < q['since']:
+                continue
+            if q['auto'] is not None and bool(e.get('auto')) != q['auto']:
+                continue
+            if q['answer'] is not None and str(e.get('approval') or e.get('answer') or '').lower() != q['answer']:
+                continue
+            results.append(((scores or {}).get(d, 0.0), self._ts[d], d))
+        results.sort(key=lambda r: (r[0], r[1], r[2]), reverse=True)
+        return [(s, self.entries[d]) for s, _, d in results[:limit]]
+
+
+# one index per audit file, shared by knowledge.retrieve and approval_cli
+_INDEXES: Dict[str, AuditIndex] = {}
+_INDEXES_LOCK = threading.Lock()
+
+
+def get_index(path: Path) -> AuditIndex:
+    key = str(Path(path).resolve())
+    with _INDEXES_LOCK:
+        idx = _INDEXES.get(key)
+        if idx is None:
+            idx = _INDEXES[key] = AuditIndex(Path(path))
+    return idx
+
+
+def search(query: str, path: Path, limit: int = 20, match: str = 'all') -> List[Tuple[float, Dict[str, Any]]]:
+    return get_index(path).search(query, limit=limit, match=match)
@@ -0,0 +1,131 @@
+"""Content-addressed store for task outputs (zlib-compressed, deduplicated by SHA-256).
+
+- `put(data)` stores a blob under its hash (`blobs/ab/cdef...`) and returns the hex digest;
+  identical outputs (e.g. a recurring task printing the same thing) are stored once.
+  Writes are atomic (temp file + `os.replace`).
+- `offload(text)` is what the heartbeat uses: short outputs stay inline, long ones go to the
+  store and only a short summary (the tail, where the outcome is printed) + the hash are kept
+  in `tasks.json`, memory and the audit log.
+- `task_output(task)` returns the full output of a task record, fetching the blob if needed.
+
+Usage:
+  store = BlobStore(BASE / 'blobs')
+  digest = store.put('long output...')
+  store.get_text(digest)
+  python samus_manus_mvp/blob_store.py <digest>     # print a stored output
+"""
+from pathlib import Path
+import hashlib
+import os
+import threading
+import zlib
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+BASE = Path(__file__).parent
+BLOB_DIR = 'blobs'
+# outputs up to this many characters stay inline; longer ones keep this much as a summary
+INLINE_CHARS = 512
+SUMMARY_CHARS = 240
+
+
+class BlobStore:
+    def __init__(self, root):
+        self.root = Path(root)
+
+    def _path(self, digest: str) -> Path:
+        digest = digest.lower()
+        if len(digest) != 64 or any(c not in '0123456789abcdef' for c in digest):
+            raise ValueError(f'not a blob hash: {digest!r}')
+        return self.root / digest[:2] / digest[2:]
+
+    def put(self, data) -> str:
+        raw = data.encode('utf-8') if isinstance(data, str) else bytes(data)
+        digest = hashlib.sha256(raw).hexdigest()
+        path = self._path(digest)
+        if path.exists():
+            return digest
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f'.{path.name}.{os.getpid()}.{threading.get_ident()}.tmp')
+        tmp.write_bytes(zlib.compress(raw, 6))
+        os.replace(tmp, path)
+        return digest
+
+    def get(self, digest: str) -> Optional[bytes]:
+        try:
+            return zlib.decompress(self._path(digest).read_bytes())
+        except (OSError, zlib.error):
+            return None
+
+    def get_text(self, digest: str) -> Optional[str]:
+        raw = self.get(digest)
+        return None if raw is None else raw.decode('utf-8', errors='replace')
+
+    def exists(self, digest: str) -> bool:
+        try:
+            return self._path(digest).exists()
+        except ValueError:
+            return False
+
+    def digests(self) -> Iterable[str]:
+        if not self.root.exists():
+            return
+        for sub in sorted(self.root.iterdir()):
+            if sub.is_dir() and len(sub.name) == 2:
+                for p in sorted(sub.iterdir()):
+                    if not p.name.startswith('.'):
+                        yield sub.name + p.name
+
+    def gc(self, keep: Iterable[str]) -> int:
+        """Delete blobs not in `keep` (hashes still referenced by tasks); returns how many."""
+        keep = set(keep)
+        removed = 0
+        for digest in list(self.digests()):
+            if digest not in keep:
+                try:
+                    self._path(digest).unlink()
+                    removed += 1
+                except OSError:
+                    pass
+        return removed
+
+
+def summarize(text: str, limit: int = SUMMARY_CHARS) -> str:
+    """Short inline form of an output: its tail (the outcome is printed last)."""
+    text = text.rstrip()
+    if len(text) <= limit:
+        return text
+    tail = text[-limit:]
+    if '\n' in tail:
+        tail = tail.split('\n', 1)[1]
+    return f'[... {len(text) - len(tail)} chars in blob]\n{tail}'
+
+
+def offload(text: Any, store: BlobStore, inline: int = INLINE_CHARS) -> Tuple[str, Optional[str]]:
+    """`(inline_text, digest)`: long outputs go to `store`, short ones stay inline (digest None)."""
+    text = text if isinstance(text, str) else str(text)
+    if len(text) <= inline:
+        return text, None
+    return summarize(text), store.put(text)
+
+
+def task_output(task: Dict[str, Any], store: BlobStore) -> str:
+    """Full output of a task (or audit) record: the blob if it has one, else the inline result."""
+    digest = task.get('result_blob')
+    if digest:
+        text = store.get_text(digest)
+        if text is not None:
+            return text
+    return str(task.get('result') or '')
+
+
+if __name__ == '__main__':
+    import sys
+
+    if len(sys.argv) != 2:
+        print('usage: blob_store.py <digest>')
+        sys.exit(2)
+    out = BlobStore(BASE / BLOB_DIR).get_text(sys.argv[1])
+    if out is None:
+        print('blob not found')
+        sys.exit(1)
+    print(out)
@@ -0,0 +1,166 @@
+"""Context-window packer for the planner prompt.
+
+- `estimate_tokens(text)`: fast local approximation of BPE token counts (no tokenizer download).
+- `pack(hits, budget)`: greedily packs the highest-scoring fused retrieval hits
+  (see `retrieval.fuse`) into a token budget, skipping near-duplicate snippets.
+- `planner_context(task)`: retrieve + pack, cached per task (TTL) so repeated tasks don't
+  pay for retrieval again and prompt size stays bounded however large memory grows.
+"""
+from collections import OrderedDict
+import re
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+DEFAULT_BUDGET_TOKENS = 400
+MAX_SNIPPET_TOKENS = 120
+DUPLICATE_THRESHOLD = 0.8
+CACHE_TTL = 600.0
+CACHE_SIZE = 128
+
+_PIECE_RE = re.compile(r"[A-Za-z]+|\d+|[^\sA-Za-z\d]")
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate token count: ~1 token per short word, long words split every ~6 chars,
+    digits in groups of 3, punctuation 1 each (close enough to BPE for budgeting)."""
+    n = 0
+    for piece in _PIECE_RE.findall(text or ''):
+        c = piece[0]
+        if c.isalpha():
+            n += 1 + (len(piece) - 1) // 6
+        elif c.isdigit():
+            n += (len(piece) + 2) // 3
+        else:
+            n += 1
+    return n
+
+
+def truncate_tokens(text: str, max_tokens: int) -> str:
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    # bisect on character length; estimate_tokens is monotone enough for this
+    lo, hi = 0, len(text)
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if estimate_tokens(text[:mid]) + 1 <= max_tokens:
+            lo = mid
+        else:
+            hi = mid - 1
+    return text[:lo].rstrip() + '…'
+
+
+def _shingles(text: str, n: int = 3) -> set:
+    words = re.findall(r'\w+', (text or '').lower())
+    if len(words) < n:
+        return {' '.join(words)} if words else set()
+    return {' '.join(words[i:i + n]) for i in range(len(words) - n + 1)}
+
+
+def _is_duplicate(sh: set, kept: Iterable[set], threshold: float) -> bool:
+    if not sh:
+        return True
+    for other in kept:
+        inter = len(sh & other)
+        if not inter:
+            continue
+        # containment in either direction catches a snippet that is a substring of another
+        if inter / min(len(sh), len(other)) >= threshold:
+            return True
+    return False
+
+
+def pack(hits: List[Dict[str, Any]], budget: int = DEFAULT_BUDGET_TOKENS,
+         max_snippet_tokens: int = MAX_SNIPPET_TOKENS, exclude: Iterable[str] = ()) -> Dict[str, Any]:
+    """Greedily pack hits (best first) into `budget` tokens.
+
+    Returns `{'text', 'tokens', 'used', 'dropped'}`; `used` keeps the packed hits in order.
+    Text in `exclude` (e.g. the persona already in the prompt) counts as already present.
+    """
+    kept_shingles = [_shingles(t) for t in exclude if t]
+    lines, used = [], []
+    tokens = dropped = 0
+    for hit in sorted(hits, key=lambda h: h.get('score', 0.0), reverse=True):
+        text = ' '.join(str(hit.get('text') or '').split())
+        if not text:
+            continue
+        sh = _shingles(text)
+        if _is_duplicate(sh, kept_shingles, DUPLICATE_THRESHOLD):
+            dropped += 1
+            continue
+        text = truncate_tokens(text, max_snippet_tokens)
+        origin = ','.join(hit.get('sources') or {}) or 'ctx'
+        line = f"- [{origin}] {text}"
+        cost = estimate_tokens(line) + 1
+        if tokens + cost > budget:
+            # keep scanning: a smaller, lower-ranked snippet may still fit
+            dropped += 1
+            continue
+        lines.append(line)
+        used.append(hit)
+        kept_shingles.append(sh)
+        tokens += cost
+    return {'text': '\n'.join(lines), 'tokens': tokens, 'used': used, 'dropped': dropped}
+
+
+def _normalize_task(task: str) -> str:
+    return ' '.join((task or '').lower().split())
+
+
+class ContextCache:
+    """Small LRU of packed contexts keyed by normalized task text, with a TTL."""
+
+    def __init__(self, ttl: float = CACHE_TTL, size: int = CACHE_SIZE):
+        self.ttl = ttl
+        self.size = size
+        self._items: 'OrderedDict[Any, tuple]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            item = self._items.get(key)
+            if item is None or time.time() - item[0] > self.ttl:
+                self._items.pop(key, None)
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return item[1]
+
+    def put(self, key, value: Dict[str, Any]):
+        with self._lock:
+            self._items[key] = (time.time(), value)
+            self._items.move_to_end(key)
+            while len(self._items) > self.size:
+                self._items.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+
+_CACHE = ContextCache()
+
+
+def planner_context(task: str, budget: int = DEFAULT_BUDGET_TOKENS, persona: Optional[str] = None,
+                    retrieve=None, latency_budget: float = 0.5) -> Dict[str, Any]:
+    """Retrieve fused context for `task` and pack it into `budget` tokens (cached per task)."""
+    key = (_normalize_task(task), budget, persona or '')
+    cached = _CACHE.get(key)
+    if cached is not None:
+        return cached
+    if retrieve is None:
+        try:
+            from samus_manus_mvp.knowledge import retrieve
+        except Exception:
+            from knowledge import retrieve
+    res = retrieve(task, top_k=8, budget=latency_budget)
+    packed = pack(res.get('fused') or [], budget=budget, exclude=[persona] if persona else ())
+    _CACHE.put(key, packed)
+    return packed
+
+
+def clear_cache():
+    _CACHE.clear()
@@ -1,6 +1,6 @@
 """Lightweight hardware stubs used for testing and CI.
 
-Provides module-like objects for: pyautogui, sounddevice, pyttsx3, vosk.
+Provides module-like objects for: pyautogui, pyperclip, sounddevice, pyttsx3, vosk.
 These are *ONLY* intended for tests / CI where real hardware or native
 bindings are unavailable.
 """
@@ -13,6 +13,12 @@ from PIL import Image
 pyautogui = ModuleType('pyautogui')
 pyautogui.FAILSAFE = True
 pyautogui.PAUSE = 0.0
+# input calls in order, with the PAUSE in effect: (name, args, PAUSE)
+pyautogui.calls = []
+
+
+def _pg_log(name, *args):
+    pyautogui.calls.append((name, args, pyautogui.PAUSE))
 
 class _FakeLoc:
     def __init__(self, x, y):
@@ -24,14 +30,16 @@ def _pg_moveTo(x, y, duration=0):
 
 def _pg_click(x=0, y=0, clicks=1, interval=0.0, button='left'):
     _pg_click.last = (x, y, clicks, interval, button)
+    _pg_log('click', x, y, button)
 
 def _pg_doubleClick(x=None, y=None):
     _pg_doubleClick.last = (x, y)
 
 def _pg_write(text, interval=0.02):
     _pg_write.last = (text, interval)
+    _pg_log('write', text, interval)
 
-def _pg_screenshot(out=None):
+def _pg_screenshot(out=None, region=None):
     # return a small white image or save if out provided
     img = Image.new('RGB', (8, 8), 'white')
     if out:
@@ -47,9 +55,11 @@ def _pg_locateCenterOnScreen(img, confidence=None):
 
 def _pg_press(key):
     _pg_press.last = key
+    _pg_log('press', key)
 
 def _pg_hotkey(*keys):
     _pg_hotkey.last = keys
+    _pg_log('hotkey', *keys)
 
 def _pg_scroll(amount):
     _pg_scroll.last = amount
@@ -69,6 +79,19 @@ pyautogui.hotkey = _pg_hotkey
 pyautogui.scroll = _pg_scroll
 pyautogui.dragTo = _pg_dragTo
 
+# --- pyperclip stub ---
+pyperclip = ModuleType('pyperclip')
+pyperclip.buffer = ''
+
+def _clip_copy(text):
+    pyperclip.buffer = str(text)
+
+def _clip_paste():
+    return pyperclip.buffer
+
+pyperclip.copy = _clip_copy
+pyperclip.paste = _clip_paste
+
 # --- sounddevice stub ---
 sounddevice = ModuleType('sounddevice')
 
@@ -127,4 +150,4 @@ vosk.Model = _FakeModel
 vosk.KaldiRecognizer = _FakeKaldiRecognizer
 
 # Expose for tests to import easily
-__all__ = ['pyautogui', 'sounddevice', 'pyttsx3', 'vosk']
+__all__ = ['pyautogui', 'pyperclip', 'sounddevice', 'pyttsx3', 'vosk']
@@ -2,14 +2,61 @@
 """
 Local heartbeat watcher + task runner (no external services).
 - Announces via local TTS (pyttsx3) if available.
-- Periodically checks `samus_manus_mvp/tasks.json` for pending tasks and runs them (simulated by default).
+- Periodically checks the task queue (`tasks.db`, see task_queue.py) for pending tasks and runs
+  them (simulated by default). `tasks.json` stays a hand-editable view: edits are imported on
+  the next check and the file is rewritten after each run.
+- Tasks run in-process through `samus_agent.run_task` (imported once); `--isolate` runs each
+  task on a warm worker process (agent_pool.py) with a per-task timeout (`--task-timeout`,
+  state `task_timeout`, or a task's own `timeout` field); timed-out tasks are marked failed.
+- The loop sleeps until the periodic tick (`--interval`), the next cron-scheduled task
+  (a task's `schedule`, see wakeup.py) or a change to the task queue, whichever is first.
+- The running loop serves a localhost control API (heartbeat_ipc.py: state, interval, enqueue,
+  trigger, live events) so the UI and overlay don't have to restart it or poll files.
+- Independent pending tasks run concurrently (task_scheduler.py): GUI tasks one at a time,
+  browser tasks one at a time per session, simulated tasks in parallel, at most
+  `--max-concurrency` (state `max_concurrency`, default 4) at once.
+- Tasks may declare `depends_on` (ids) and a shared browser `session`: the batch runs as a DAG,
+  tasks on one session reuse its open browser, and identical tasks in a batch are planned once.
+  In-process tasks are planned before they are scheduled, so a plan with web actions runs on
+  its browser session's lane whatever the task text says.
+- Full task output goes to a content-addressed blob store (blob_store.py); `tasks.json`,
+  memory and the audit log keep a short summary and the `result_blob` hash.
+- With `--announce`, the running loop speaks through a background announcement queue
+  (announcer.py: priorities, stale heartbeat/status lines coalesced, tools/tts_server.py when
+  it is up), so speech never holds up tasks. `--once` runs speak synchronously.
 - Stores last heartbeat timestamp in `heartbeat_state.json`.
 """
+from concurrent.futures import ThreadPoolExecutor
 import json
 import time
 import argparse
+import atexit
+import io
+import os
 from pathlib import Path
 import subprocess
+import threading
+
+try:
+    from samus_manus_mvp.task_scheduler import TaskScheduler, DEFAULT_MAX_CONCURRENCY, classify, dependency_status
+    from samus_manus_mvp.task_queue import TaskQueue, DEFAULT_ARCHIVE_AFTER
+    from samus_manus_mvp.wakeup import Waker, next_run, next_wake
+    from samus_manus_mvp.state_store import get_store
+    from samus_manus_mvp.heartbeat_ipc import ControlServer, EventBus, write_token
+    from samus_manus_mvp.metrics import REGISTRY, METRICS_FILE, append_run, render_prometheus
+    from samus_manus_mvp.activity import is_afk as user_is_afk
+    from samus_manus_mvp.blob_store import BlobStore, BLOB_DIR, offload
+    from samus_manus_mvp.announcer import Announcer, ALERT, TASK, STATUS
+except Exception:
+    from task_scheduler import TaskScheduler, DEFAULT_MAX_CONCURRENCY, classify, dependency_status
+    from task_queue import TaskQueue, DEFAULT_ARCHIVE_AFTER
+    from wakeup import Waker, next_run, next_wake
+    from state_store import get_store
+    from heartbeat_ipc import ControlServer, EventBus, write_token
+    from metrics import REGISTRY, METRICS_FILE, append_run, render_prometheus
+    from activity import is_afk as user_is_afk
+    from blob_store import BlobStore, BLOB_DIR, offload
+    from announcer import Announcer, ALERT, TASK, STATUS
 
 # local helper TTS (optional)
 try:
@@ -21,54 +68,290 @@ except Exception:
 BASE = Path(__file__).parent
 STATE_PATH = BASE / 'heartbeat_state.json'
 TASKS_PATH = BASE / 'tasks.json'
+DEFAULT_TASK_TIMEOUT = 300
+# fields a control API client may set on a task; approval and plan fields stay local
+ENQUEUE_FIELDS = ('task', 'schedule', 'timeout', 'session', 'depends_on', 'resource')
 
 
 def load_state():
-    if not STATE_PATH.exists():
-        return {'last_heartbeat': None, 'last_task_check': None}
-    try:
-        return json.loads(STATE_PATH.read_text())
-    except Exception:
-        return {'last_heartbeat': None, 'last_task_check': None}
+    return get_store(STATE_PATH).read()
 
 
 def save_state(state: dict):
-    STATE_PATH.write_text(json.dumps(state, indent=2))
+    get_store(STATE_PATH).write(state)
 
 
-def load_tasks():
+_QUEUES = {}
+
+
+def task_queue():
+    """The SQLite task queue next to TASKS_PATH (`tasks.db`), synced with `tasks.json`."""
+    db_path = TASKS_PATH.with_suffix('.db')
+    q = _QUEUES.get(db_path)
+    if q is None:
+        q = _QUEUES[db_path] = TaskQueue(db_path)
     if not TASKS_PATH.exists():
-        TASKS_PATH.write_text(json.dumps({'tasks': []}, indent=2))
-        return []
+        q.export_json(TASKS_PATH)
+    else:
+        q.sync_json(TASKS_PATH)
+    return q
+
+
+def blob_store() -> BlobStore:
+    """Store for full task outputs (`BASE/blobs`); tasks keep a summary + `result_blob` hash."""
+    return BlobStore(BASE / BLOB_DIR)
+
+
+def _watched_paths():
+    db = TASKS_PATH.with_suffix('.db')
+    return [TASKS_PATH, db, db.with_name(db.name + '-wal')]
+
+
+# wakes the heartbeat loop early: on task-queue / tasks.json changes, or via `wake()`
+WAKER = Waker(_watched_paths())
+
+
+def wake(reason: str = 'notify'):
+    """Wake a sleeping heartbeat loop in this process (e.g. after enqueueing a task)."""
+    WAKER.notify(reason)
+
+
+# daemon events (heartbeat / task_started / task_done / state), streamed by the control API
+EVENTS = EventBus()
+_LOOP = {'next_tick': None}
+
+
+def start_control_server(port: int = 0) -> ControlServer:
+    """Serve the local control API (heartbeat_ipc.py) and advertise it in the state file."""
+
+    def get_state():
+        st = load_state()
+        st.pop('ipc_token', None)  # written by older versions
+        st['pending'] = task_queue().count('pending')
+        if _LOOP['next_tick'] is not None:
+            st['next_in'] = max(0.0, _LOOP['next_tick'] - time.time())
+        return st
+
+    def set_interval(interval):
+        interval = int(interval)
+        if interval < 1:
+            raise ValueError('interval must be >= 1 second')
+        get_store(STATE_PATH).update({'interval': interval, 'last_heartbeat': time.time()})
+        wake('interval')
+        return {'ok': True, 'interval': interval}
+
+    def enqueue(body):
+        if not isinstance(body.get('task'), str) or not body['task'].strip():
+            raise ValueError('`task` (text) is required')
+        body = {k: v for k, v in body.items() if k in ENQUEUE_FIELDS}
+        q = task_queue()
+        t = q.add(body)
+        q.export_json(TASKS_PATH)
+        wake('enqueue')
+        return {'ok': True, 'task': t}
+
+    def trigger():
+        wake('trigger')
+        return {'ok': True}
+
+    server = ControlServer({'state': get_state, 'set_interval': set_interval, 'enqueue': enqueue, 'trigger': trigger,
+                            'metrics': render_prometheus},
+                           EVENTS, port=port).start()
+    store = get_store(STATE_PATH)
+    store.subscribe(lambda st: EVENTS.publish('state', interval=st.get('interval'), last_heartbeat=st.get('last_heartbeat')))
+    write_token(server.token)
+    store.update({'ipc_port': server.port, 'ipc_token': None, 'ipc_pid': os.getpid()})
+    return server
+
+
+def load_tasks():
     try:
-        data = json.loads(TASKS_PATH.read_text())
-        return data.get('tasks', [])
+        return task_queue().list()
     except Exception:
         return []
 
 
 def save_tasks(tasks):
-    TASKS_PATH.write_text(json.dumps({'tasks': tasks}, indent=2))
+    q = task_queue()
+    for t in tasks:
+        q.upsert(t)
+    q.export_json(TASKS_PATH)
 
 
-def run_task_sim(task_text: str, apply: bool = False):
-    """Run the samus agent for a task (subprocess).
+def _agent():
+    """Import `samus_agent` once per process (planner, executor and memory stay warm)."""
+    try:
+        from samus_manus_mvp import samus_agent
+    except Exception:
+        import samus_agent
+    return samus_agent
 
-    - `apply=True` passes `--apply` to the agent so GUI actions are executed.
-    - `--no-approve` is always used so tasks run without interactive prompts.
+
+def run_task_inproc(task_text: str, apply: bool = False, plan: list | None = None, session: str | None = None):
+    """Run a task in this process; returns `(output_text, structured_result)`.
+
+    No interpreter startup, re-imports or startup restore per task. Output that the agent
+    would have printed is captured and returned like the subprocess path did.
     """
-    cmd = ['python', str(BASE / 'samus_agent.py'), 'run', task_text, '--no-approve']
-    if apply:
-        cmd.append('--apply')
+    buf = io.StringIO()
     try:
-        proc = subprocess.run(cmd, capture_output=True, text=True, timeout=120)
-        return proc.stdout + proc.stderr
+        res = _agent().run_task(task_text, apply=apply, approve_each=False, out=buf, plan=plan, session=session,
+                                source='heartbeat_run')
     except Exception as e:
-        return f'Error running task: {e}'
+        buf.write(f'Error running task: {e}\n')
+        res = {'task': task_text, 'status': 'error', 'error': str(e), 'steps': []}
+    return buf.getvalue(), res
+
+
+_WORKER_POOL = None
+
+
+def _worker_pool():
+    global _WORKER_POOL
+    if _WORKER_POOL is None:
+        try:
+            from samus_manus_mvp.agent_pool import AgentWorkerPool
+        except Exception:
+            from agent_pool import AgentWorkerPool
+        state = load_state()
+        _WORKER_POOL = AgentWorkerPool(
+            size=int(state.get('pool_size', 1) or 1),
+            max_tasks=int(state.get('pool_max_tasks', 50) or 50),
+            max_rss_mb=float(state.get('pool_max_rss_mb', 800) or 800),
+            task_timeout=float(state.get('task_timeout', DEFAULT_TASK_TIMEOUT) or DEFAULT_TASK_TIMEOUT),
+            prelaunch_web=bool(state.get('pool_prelaunch_web', False)),
+        )
+    return _WORKER_POOL
+
+
+def close_worker_pool():
+    global _WORKER_POOL
+    pool, _WORKER_POOL = _WORKER_POOL, None
+    if pool is not None:
+        pool.close()
+
+
+atexit.register(close_worker_pool)
+
+
+def run_task_isolated(task_text: str, apply: bool = False, timeout: float | None = None,
+                      plan: list | None = None, session: str | None = None):
+    """Run a task on a warm worker process (opt-in isolation); a timeout only recycles that worker."""
+    return _worker_pool().run(task_text, apply=apply, timeout=timeout, plan=plan, session=session)
 
 
-def check_once(announce: bool = False, global_auto_apply: bool = False, mode: str = 'whitelist'):
+def execute_task(task_text: str, apply: bool = False, isolate: bool = False, timeout: float | None = None,
+                 plan: list | None = None, session: str | None = None):
+    """Run the samus agent for a task; returns `(output_text, structured_result)`.
+
+    - `apply=True` executes real GUI actions.
+    - Tasks never prompt for approval (equivalent to `--no-approve`).
+    - `isolate=True` runs the task on a warm worker process (see agent_pool.py) with a
+      per-task `timeout` (the worker is killed when it runs out). In-process runs can't be
+      killed: when the heartbeat runs them, the scheduler stops waiting at the deadline and the
+      task fails as timed out (see task_scheduler.py).
+    - `plan` skips the planner; `session` runs web actions in that WebHands session. Open
+      sessions are only shared between tasks in-process (a worker keeps its own browsers).
+    """
+    if isolate:
+        return run_task_isolated(task_text, apply=apply, timeout=timeout, plan=plan, session=session)
+    return run_task_inproc(task_text, apply=apply, plan=plan, session=session)
+
+
+def run_task_sim(task_text: str, apply: bool = False, isolate: bool = False):
+    """Compatibility wrapper around `execute_task` returning only the output text."""
+    output, _ = execute_task(task_text, apply=apply, isolate=isolate)
+    return output
+
+
+# ---- metrics (see metrics.py; served at GET /metrics on the control API) ----
+CHECK_SECONDS = REGISTRY.histogram('heartbeat_check_seconds', 'Duration of one heartbeat check')
+TASK_SECONDS = REGISTRY.histogram('heartbeat_task_seconds', 'Run time of one task')
+TASKS_TOTAL = REGISTRY.counter('heartbeat_tasks_total', 'Tasks run, by final status')
+MEMORY_WRITES = REGISTRY.counter('heartbeat_memory_writes_total', 'Memory records written by the heartbeat')
+MEMORY_SECONDS = REGISTRY.histogram('heartbeat_memory_write_seconds', 'Time per heartbeat memory write')
+TTS_SECONDS = REGISTRY.histogram('heartbeat_tts_seconds', 'Time spent speaking one announcement')
+FILE_BYTES = REGISTRY.gauge('heartbeat_file_bytes', 'Size of heartbeat data files')
+SPAWN_SECONDS = REGISTRY.histogram('agent_worker_spawn_seconds', 'Worker process start-up time (until ready)')
+
+
+# background announcement queue; only the daemon loop starts one (one-shot runs speak inline)
+ANNOUNCER = None
+
+
+def start_announcer() -> Announcer:
+    global ANNOUNCER
+    if ANNOUNCER is None:
+        ANNOUNCER = Announcer(lambda text: speak(text),
+                              on_spoken=lambda text, secs, via: TTS_SECONDS.observe(secs, via=via)).start()
+    return ANNOUNCER
+
+
+def stop_announcer(timeout: float = 5.0):
+    global ANNOUNCER
+    ann, ANNOUNCER = ANNOUNCER, None
+    if ann is not None:
+        ann.close(timeout)
+
+
+def _say(run: dict, text: str, priority: int = STATUS, key: str | None = None):
+    """Announce `text`: queued when the announcer runs (`key` coalesces stale lines), else spoken now."""
+    start = time.perf_counter()
+    if ANNOUNCER is not None:
+        ANNOUNCER.say(text, priority=priority, key=key)
+        run['tts'] += time.perf_counter() - start
+        return
+    try:
+        speak(text)
+    finally:
+        elapsed = time.perf_counter() - start
+        run['tts'] += elapsed
+        TTS_SECONDS.observe(elapsed, via='inline')
+
+
+def _remember(run: dict, kind: str, text: str, metadata: dict):
+    """Best-effort memory write (timed and counted)."""
+    start = time.perf_counter()
+    try:
+        from samus_manus_mvp.memory import get_memory
+        get_memory().add(kind, text, metadata=metadata)
+    except Exception:
+        return
+    elapsed = time.perf_counter() - start
+    run['mem'] += elapsed
+    run['mem_n'] += 1
+    MEMORY_WRITES.inc(type=kind)
+    MEMORY_SECONDS.observe(elapsed)
+
+
+def _record_run(run: dict, started: float, spawn_before: float, n_tasks: int, n_failed: int):
+    sizes = {}
+    for name, path in (('audit', BASE / 'approval_audit.log'), ('tasks_json', TASKS_PATH), ('tasks_db', TASKS_PATH.with_suffix('.db'))):
+        try:
+            sizes[name] = path.stat().st_size
+        except OSError:
+            sizes[name] = 0
+        FILE_BYTES.set(sizes[name], file=name)
+    dur = time.perf_counter() - started
+    CHECK_SECONDS.observe(dur)
+    try:
+        append_run(BASE / METRICS_FILE, {
+            'ts': round(time.time(), 3), 'dur': round(dur, 4), 'tasks': n_tasks, 'failed': n_failed,
+            'task_s': run['task_s'], 'spawn_s': round(SPAWN_SECONDS.sum() - spawn_before, 4),
+            'mem_n': run['mem_n'], 'mem_s': round(run['mem'], 4), 'tts_s': round(run['tts'], 4),
+            'audit_b': sizes['audit'], 'tasks_b': sizes['tasks_json'], 'db_b': sizes['tasks_db'],
+        })
+    except Exception:
+        pass
+
+
+def check_once(announce: bool = False, global_auto_apply: bool = False, mode: str = 'whitelist', isolate: bool | None = None):
+    started = time.perf_counter()
+    run = {'tts': 0.0, 'mem': 0.0, 'mem_n': 0, 'task_s': []}
+    spawn_before = SPAWN_SECONDS.sum()
     state = load_state()
+    if isolate is None:
+        isolate = bool(state.get('isolate', False))
     tasks = load_tasks()
 
     # announce heartbeat
@@ -146,13 +429,13 @@ def check_once(announce: bool = False, global_auto_apply: bool = False, mode: st
         try:
             # keep TTS concise: mention count and whether audits exist
             if pending_count == 0:
-                speak(msg)
+                _say(run, msg, STATUS, key='heartbeat')
             else:
                 brief = msg + '. '
                 brief += ' ; '.join([f"{p.split(':',1)[1].strip()}" for p in pending_lines[:3]])
                 if len(pending_lines) > 3:
                     brief += f' and {len(pending_lines)-3} more pending.'
-                speak(brief)
+                _say(run, brief, STATUS, key='heartbeat')
         except Exception as e:
             print('TTS failed:', e)
 
@@ -161,101 +444,230 @@ def check_once(announce: bool = False, global_auto_apply: bool = False, mode: st
     processed_approval = False
     auto_announcements = []
 
-    for t in list(tasks):
-        if t.get('status') == 'pending':
-            print('Found pending task:', t.get('id'), t.get('task'))
-            if announce:
-                speak(f"Running task: {t.get('task')}")
+    def apply_for(t):
+        # determine whether to apply real GUI actions for this task
+        task_auto = bool(t.get('auto_approve') or t.get('auto_apply'))
+        if mode == 'global':
+            return global_auto_apply or task_auto
+        return task_auto  # whitelist mode
+
+    def timeout_for(t):
+        return float(t.get('timeout') or state.get('task_timeout') or DEFAULT_TASK_TIMEOUT)
+
+    # tasks that share a browser `session` keep it open until the last of them has run;
+    # tasks are planned once per text before they are scheduled (see below), and tasks with
+    # explicit `actions` skip the planner
+    sessions_left = {}
+    plans = {}
+    lock = threading.Lock()
+
+    def plan_for(t):
+        if isinstance(t.get('actions'), list):
+            return t['actions']
+        return plans.get(t.get('task'))
+
+    def prefetch(text):
+        try:
+            plan = _agent().plan_with_openai(text)
+            _agent()._remember_plan(text, plan, 'heartbeat_run')
+            return text, plan
+        except Exception as e:
+            print('Planning failed for', repr(text), '-', e)
+            return text, None
 
-            # persist 'task started' to memory so startup can remember in-progress work
+    def run_fn(t, apply_now, remaining):
+        session = t.get('session')
+        if session and not isolate:
+            _agent().WEB_HANDS_KEEP.add(session)
+        try:
+            return execute_task(t.get('task'), apply=apply_now, isolate=isolate, timeout=remaining,
+                                plan=plan_for(t), session=session)
+        finally:
+            if session and not isolate:
+                with lock:
+                    sessions_left[session] -= 1
+                    last = sessions_left[session] <= 0
+                if last:
+                    # on the session's lane thread (Playwright objects are thread-bound)
+                    _agent().close_web_session(session)
+
+    def succeeded(t, outcome):
+        return (outcome['value'][1] or {}).get('status') not in ('error', 'timeout')
+
+    # lease pending tasks so another heartbeat (or the UI) can't run them concurrently
+    queue = task_queue()
+    owner = f'heartbeat-{os.getpid()}'
+    now = time.time()
+    # running tasks whose lease expired were left behind by a runner that died: run them again
+    stale = set(queue.expired(now))
+    due = []
+    for t in tasks:
+        if t.get('status') != 'pending' and str(t.get('id')) not in stale:
+            continue
+        # scheduled tasks (cron `schedule`, or a hand-set `next_run_at`) wait for their time
+        if t.get('schedule') and t.get('next_run_at') is None:
             try:
-                from samus_manus_mvp.memory import get_memory
-                try:
-                    get_memory().add('task', t.get('task'), metadata={'source': 'heartbeat', 'task_id': t.get('id'), 'status': 'started'})
-                except Exception:
-                    pass
-            except Exception:
-                pass
+                t['next_run_at'] = next_run(t['schedule'], now)
+                queue.upsert(t)
+                changed = True
+            except Exception as e:
+                print('Bad schedule for task', t.get('id'), '-', e)
+        if t.get('next_run_at') is not None and float(t['next_run_at']) > now:
+            continue
+        due.append(t)
+    # dependencies outside this batch must already be done; otherwise wait (or block on failure)
+    by_id = {t.get('id'): t for t in tasks}
+    lookup = lambda i: by_id.get(i) or queue.get(i, archived=True)
+    settled = False
+    while not settled:
+        settled = True
+        batch = [str(t.get('id')) for t in due]
+        for t in list(due):
+            dep_state, dep = dependency_status(t, lookup, batch)
+            if dep_state == 'ready':
+                continue
+            due.remove(t)
+            settled = False
+            if dep_state == 'blocked':
+                t.update(status='blocked', result=f'Blocked: dependency {dep} failed or does not exist',
+                         completed_at=time.time())
+                queue.upsert(t)
+                changed = True
+                print('Task blocked:', t.get('id'), '- dependency', dep)
+    lease = max([timeout_for(t) for t in due] or [0]) + 60
+    to_run = queue.claim(owner, lease=lease, ids=[t.get('id') for t in due])
+    text_counts = {}
+    for t in to_run:
+        text_counts[t.get('task')] = text_counts.get(t.get('task'), 0) + 1
+        if t.get('session'):
+            sessions_left[t['session']] = sessions_left.get(t['session'], 0) + 1
+    for t in to_run:
+        print('Found pending task:', t.get('id'), t.get('task'))
+        EVENTS.publish('task_started', id=t.get('id'), task=t.get('task'))
+        if announce:
+            _say(run, f"Running task: {t.get('task')}", TASK)
+
+        # persist 'task started' to memory so startup can remember in-progress work
+        _remember(run, 'task', t.get('task'), {'source': 'heartbeat', 'task_id': t.get('id'), 'status': 'started'})
+
+    # plan up front (concurrently): identical tasks share one plan, and an in-process task whose
+    # plan has web actions must run on its browser session's lane, not on a compute/gui thread
+    max_concurrency = int(state.get('max_concurrency', DEFAULT_MAX_CONCURRENCY) or 1)
+    texts = {t.get('task') for t in to_run if not isinstance(t.get('actions'), list) and t.get('task')
+             and (text_counts[t.get('task')] > 1
+                  or (not isolate and not classify(t, apply_for(t)).startswith('browser:')))}
+    if texts:
+        with ThreadPoolExecutor(max_workers=min(len(texts), max_concurrency)) as ex:
+            plans.update((text, plan) for text, plan in ex.map(prefetch, sorted(texts)) if plan)
+
+    # independent tasks run concurrently under resource locks (see task_scheduler.py);
+    # results are handled here, on this thread, as each task finishes
+    scheduler = TaskScheduler(max_concurrency=max_concurrency)
+    for t, outcome in scheduler.run(to_run, run_fn, apply_for=apply_for, timeout_for=timeout_for, succeeded=succeeded,
+                                    plan_for=plan_for):
+        if outcome['status'] == 'deferred':
+            queue.release(t['id'], owner)
+            print('Task deferred (deadline passed before it could start):', t.get('id'))
+            continue
+        apply_now = apply_for(t)
+        if outcome['status'] == 'error':
+            result = f"Error running task: {outcome.get('error')}"
+            run_info = {'status': 'error'}
+        elif outcome['status'] == 'blocked':
+            result = f"Blocked: {outcome.get('error')}"
+            run_info = {'status': 'blocked'}
+        elif outcome['status'] == 'timeout':
+            # still running in-process: the scheduler stopped waiting for it at its deadline
+            result = f"Error running task: timed out after {timeout_for(t):g}s"
+            run_info = {'status': 'timeout'}
+        else:
+            result, run_info = outcome['value']
+        if run_info.get('status') == 'blocked':
+            t['status'] = 'blocked'
+        else:
+            t['status'] = 'failed' if run_info.get('status') in ('error', 'timeout') else 'done'
+        # full output goes to the blob store; the task keeps a short summary + the hash
+        try:
+            summary, digest = offload(result, blob_store())
+        except Exception:
+            summary, digest = result, None
+        t['result'] = summary
+        t['result_blob'] = digest
+        t['completed_at'] = time.time()
+        try:
+            rearm = next_run(t['schedule'], t['completed_at']) if t.get('schedule') else None
+        except Exception:
+            rearm = None
+        if rearm is not None:
+            # recurring task: record this run and re-arm it for its next slot
+            t.update(last_status=t['status'], last_run_at=t['completed_at'], status='pending', next_run_at=rearm)
+            queue.complete(t['id'], owner, 'pending', result=summary,
+                           extra={k: t[k] for k in ('last_status', 'last_run_at', 'next_run_at', 'result_blob')})
+        else:
+            queue.complete(t['id'], owner, t['status'], result=summary, extra={'result_blob': digest})
+        by_id.get(t['id'], {}).update(t)
+        changed = True
+        TASKS_TOTAL.inc(status=t['status'])
+        TASK_SECONDS.observe(outcome.get('elapsed') or 0.0, resource=outcome.get('resource'))
+        run['task_s'].append(round(outcome.get('elapsed') or 0.0, 4))
+        EVENTS.publish('task_done', id=t.get('id'), task=t.get('task'), status=t['status'],
+                       elapsed=outcome.get('elapsed'))
+        print('Task result:', result.splitlines()[:5])
 
-            # determine whether to apply real GUI actions for this task
-            task_auto = bool(t.get('auto_approve') or t.get('auto_apply'))
-            if mode == 'global':
-                apply_now = global_auto_apply or task_auto
-            else:  # whitelist mode
-                apply_now = task_auto
-
-            # run agent (apply if allowed for this task)
-            result = run_task_sim(t.get('task'), apply=apply_now)
-            t['status'] = 'done'
-            t['result'] = result
-            t['completed_at'] = time.time()
-            changed = True
-            print('Task result:', result.splitlines()[:5])
+        # persist task_result to memory for audit/restore
+        _remember(run, 'task_result', 'done', {'source': 'heartbeat', 'task_id': t.get('id'), 'task': t.get('task'), 'result': summary, 'result_blob': digest})
 
-            # persist task_result to memory for audit/restore
-            try:
-                from samus_manus_mvp.memory import get_memory
+        # audit-write when heartbeat performed an auto‑approved (whitelisted) run
+        try:
+            if apply_now and (t.get('auto_approve') or global_auto_apply):
                 try:
-                    get_memory().add('task_result', 'done', metadata={'source': 'heartbeat', 'task_id': t.get('id'), 'task': t.get('task'), 'result': (result[:1024] if isinstance(result, str) else str(result))})
+                    action_payload = {'type': 'task', 'text': t.get('task'), 'result': summary, 'result_blob': digest}
+                    # human question presented for this heartbeat-run
+                    question_text = f"Run task: {t.get('task')}"
+                    audit_entry = {
+                        'ts': time.time(),
+                        'auto': True,
+                        'approval': 'y',
+                        'answer': 'y',
+                        'question': question_text,
+                        'task': t.get('task'),
+                        'action': action_payload,
+                        'step': 0,
+                    }
+                    audit_path = BASE / 'approval_audit.log'
+                    with open(audit_path, 'a', encoding='utf-8') as af:
+                        af.write(json.dumps(audit_entry, default=str) + '\n')
+                    # collect for audible summary
+                    auto_announcements.append((question_text, 'y'))
                 except Exception:
                     pass
-            except Exception:
-                pass
+        except Exception:
+            pass
 
-            # audit-write when heartbeat performed an auto‑approved (whitelisted) run
-            try:
-                if apply_now and (t.get('auto_approve') or global_auto_apply):
-                    try:
-                        action_payload = {'type': 'task', 'text': t.get('task'), 'result': (result[:1024] if isinstance(result, str) else str(result))}
-                        # human question presented for this heartbeat-run
-                        question_text = f"Run task: {t.get('task')}"
-                        audit_entry = {
-                            'ts': time.time(),
-                            'auto': True,
-                            'approval': 'y',
-                            'answer': 'y',
-                            'question': question_text,
-                            'task': t.get('task'),
-                            'action': action_payload,
-                            'step': 0,
-                        }
-                        audit_path = BASE / 'approval_audit.log'
-                        with open(audit_path, 'a', encoding='utf-8') as af:
-                            af.write(json.dumps(audit_entry, default=str) + '\n')
-                        # collect for audible summary
-                        auto_announcements.append((question_text, 'y'))
-                    except Exception:
-                        pass
-            except Exception:
-                pass
+        # If this was an approval-generation task, remember to re-add one so approvals never block us
+        try:
+            if isinstance(t.get('task'), str) and t.get('task').lower().startswith('make an approval'):
+                processed_approval = True
+        except Exception:
+            pass
 
-            # If this was an approval-generation task, remember to re-add one so approvals never block us
+    # sessions whose remaining tasks were deferred or blocked don't stay open between runs
+    for session, left in sessions_left.items():
+        if left > 0 and not isolate:
             try:
-                if isinstance(t.get('task'), str) and t.get('task').lower().startswith('make an approval'):
-                    processed_approval = True
+                _agent().close_web_session(session)
             except Exception:
                 pass
 
     # If we processed an approval task, ensure a fresh "make an approval" pending task exists
     if processed_approval:
-        # compute next numeric id for tasks like "task-N"; ignore non-numeric suffixes
-        nt = [tt.get('id') for tt in tasks if isinstance(tt.get('id'), str) and tt.get('id').startswith('task-')]
-        nums = []
-        for x in nt:
-            try:
-                suffix = x.split('-', 1)[1]
-            except Exception:
-                continue
-            if suffix.isdigit():
-                nums.append(int(suffix))
-        next_n = (max(nums) + 1) if nums else 1
-        new_task = {
-            'id': f'task-{next_n}',
+        # the queue assigns the next numeric "task-N" id
+        new_task = queue.add({
             'task': 'make an approval',
             'status': 'pending',
             'created_at': int(time.time()),
             'auto_approve': True
-        }
+        })
         tasks.append(new_task)
         changed = True
         print('Appended new approval task:', new_task['id'])
@@ -268,7 +680,7 @@ def check_once(announce: bool = False, global_auto_apply: bool = False, mode: st
                 for q, ans in auto_announcements:
                     s = f"Auto-approved: {q}. Answer: {ans}."
                     try:
-                        speak(s)
+                        _say(run, s, ALERT)
                     except Exception:
                         pass
                     print('TTS:', s)
@@ -279,19 +691,28 @@ def check_once(announce: bool = False, global_auto_apply: bool = False, mode: st
                 interval = int(state.get('interval', 1800) or 1800)
                 status_msg = f"No auto-approvals performed. Pending tasks: {pending_now}. Recorded auto-approvals: {total_auto}. Next auto in {interval} seconds."
                 try:
-                    speak(status_msg)
+                    _say(run, status_msg, STATUS, key='status')
                 except Exception:
                     pass
                 print('TTS:', status_msg)
     except Exception:
         pass
 
+    # move long-finished tasks (and their results) out of the hot table and tasks.json
+    try:
+        if queue.archive(float(state.get('archive_after', DEFAULT_ARCHIVE_AFTER))):
+            changed = True
+    except Exception:
+        pass
     if changed:
-        save_tasks(tasks)
-
-    state['last_heartbeat'] = time.time()
-    state['last_task_check'] = time.time()
-    save_state(state)
+        queue.export_json(TASKS_PATH)
+
+    # merge (not overwrite) so settings changed meanwhile, e.g. the interval via IPC, survive
+    now = time.time()
+    get_store(STATE_PATH).update({'last_heartbeat': now, 'last_task_check': now})
+    _record_run(run, started, spawn_before, len(to_run), sum(1 for tt in to_run if tt.get('status') == 'failed'))
+    EVENTS.publish('heartbeat', pending=sum(1 for tt in tasks if tt.get('status') == 'pending'),
+                   ran=len(to_run), interval=state.get('interval'))
     return True
 
 
@@ -304,6 +725,11 @@ def main():
     ap.add_argument('--stop', action='store_true', help='Stop a background heartbeat (uses pid in heartbeat_state.json)')
     ap.add_argument('--auto-apply', action='store_true', help='When set, run pending tasks with --apply (agent performs real GUI actions)')
     ap.add_argument('--auto-apply-mode', choices=['global','whitelist'], help='How to apply --auto-apply: global=all pending tasks, whitelist=only tasks with `auto_approve`')
+    ap.add_argument('--isolate', action='store_true', help='Run each task in a reusable worker process instead of in-process')
+    ap.add_argument('--task-timeout', type=int, default=0, help='Seconds before an isolated task is killed (default 300)')
+    ap.add_argument('--max-concurrency', type=int, default=0, help='Max tasks running at once (default 4; 1 = sequential)')
+    ap.add_argument('--no-ipc', action='store_true', help='Do not serve the local control API (heartbeat_ipc.py)')
+    ap.add_argument('--ipc-port', type=int, default=0, help='Control API port on 127.0.0.1 (default: any free port)')
     ap.add_argument('--afk-threshold', type=int, default=0, help='Minutes of inactivity before heartbeat treats you as AFK (0=disabled)')
     ap.add_argument('--afk-mode', choices=['global','whitelist'], default='whitelist', help='When AFK: global=auto-apply all pending tasks; whitelist=only tasks marked auto_approve')
     args = ap.parse_args()
@@ -334,27 +760,21 @@ def main():
     effective_global_auto_apply = bool(args.auto_apply or state.get('auto_apply', False))
     afk_threshold = args.afk_threshold or int(state.get('afk_threshold', 0))
     afk_mode = args.afk_mode or state.get('afk_mode', 'whitelist')
+    isolate = bool(args.isolate or state.get('isolate', False))
+    if args.task_timeout or args.max_concurrency:
+        if args.task_timeout:
+            state['task_timeout'] = args.task_timeout
+        if args.max_concurrency:
+            state['max_concurrency'] = args.max_concurrency
+        save_state(state)
 
     # if running one check, honor effective preferences and exit
     if args.once:
         # compute AFK status for a one-shot run
-        is_afk = False
-        if afk_threshold > 0:
-            try:
-                from samus_manus_mvp.memory import get_memory
-                rows = get_memory().all(200)
-                last_ts = 0
-                for r in rows:
-                    if r.get('type') in ('approval', 'action', 'task'):
-                        last_ts = max(last_ts, int(r.get('created_at') or 0))
-                import time as _time
-                if last_ts and (_time.time() - last_ts) >= afk_threshold * 60:
-                    is_afk = True
-            except Exception:
-                is_afk = False
+        is_afk = user_is_afk(afk_threshold)
         if is_afk and afk_mode == 'global':
             effective_global_auto_apply = True
-        check_once(announce=args.announce, global_auto_apply=effective_global_auto_apply, mode=effective_mode)
+        check_once(announce=args.announce, global_auto_apply=effective_global_auto_apply, mode=effective_mode, isolate=isolate)
         return
 
     # spawn detached background heartbeat and exit
@@ -370,6 +790,16 @@ def main():
             cmd += ['--auto-apply']
         if args.auto_apply_mode:
             cmd += ['--auto-apply-mode', args.auto_apply_mode]
+        if args.isolate:
+            cmd += ['--isolate']
+        if args.task_timeout:
+            cmd += ['--task-timeout', str(args.task_timeout)]
+        if args.max_concurrency:
+            cmd += ['--max-concurrency', str(args.max_concurrency)]
+        if args.no_ipc:
+            cmd += ['--no-ipc']
+        if args.ipc_port:
+            cmd += ['--ipc-port', str(args.ipc_port)]
         try:
             devnull = subprocess.DEVNULL
             if os.name == 'nt':
@@ -393,33 +823,48 @@ def main():
             # fall through to foreground run
 
     print(f'Starting local heartbeat (interval={args.interval}s) — press Ctrl+C to stop')
+    get_store(STATE_PATH).update({'interval': args.interval})
+    server = None
+    if not args.no_ipc:
+        try:
+            server = start_control_server(args.ipc_port)
+            print(f'Control API on http://127.0.0.1:{server.port} (see heartbeat_ipc.py)')
+        except Exception as e:
+            print('Control API unavailable:', e)
+    if args.announce:
+        start_announcer()
     try:
         while True:
             # determine AFK status dynamically each loop (if configured)
-            is_afk = False
-            if afk_threshold > 0:
-                try:
-                    from samus_manus_mvp.memory import get_memory
-                    rows = get_memory().all(200)
-                    last_ts = 0
-                    for r in rows:
-                        if r.get('type') in ('approval', 'action', 'task'):
-                            last_ts = max(last_ts, int(r.get('created_at') or 0))
-                    if last_ts and (time.time() - last_ts) >= afk_threshold * 60:
-                        is_afk = True
-                except Exception:
-                    is_afk = False
+            is_afk = user_is_afk(afk_threshold)
             # if AFK and mode=global, treat this run as global auto-apply
             run_global_apply = effective_global_auto_apply or (is_afk and afk_mode == 'global')
             if is_afk and args.announce:
                 try:
-                    speak(f'User idle for {afk_threshold} minutes — running pending tasks')
+                    _say({'tts': 0.0}, f'User idle for {afk_threshold} minutes — running pending tasks', ALERT, key='afk')
                 except Exception:
                     pass
-            check_once(announce=args.announce, global_auto_apply=run_global_apply, mode=effective_mode)
-            time.sleep(args.interval)
+            check_once(announce=args.announce, global_auto_apply=run_global_apply, mode=effective_mode, isolate=isolate)
+            # sleep until the periodic tick or the next scheduled task, unless the queue changes
+            # first; a new interval set through the control API just moves the deadline
+            while True:
+                st = load_state()
+                _LOOP['next_tick'] = float(st.get('last_heartbeat') or time.time()) + int(st.get('interval') or args.interval)
+                timeout = next_wake(load_tasks(), time.time(), _LOOP['next_tick'] - time.time())
+                WAKER.rebaseline()
+                reason = WAKER.wait(timeout)
+                if reason != 'interval':
+                    break
+            if reason != 'timeout':
+                print('Heartbeat woken:', reason)
     except KeyboardInterrupt:
         print('\nHeartbeat stopped by user')
+    finally:
+        stop_announcer()
+        if server is not None:
+            server.stop()
+            write_token(None)
+            get_store(STATE_PATH).update({'ipc_port': None, 'ipc_pid': None})
 
 
 if __name__ == '__main__':
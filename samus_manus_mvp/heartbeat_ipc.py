@@ -0,0 +1,279 @@
+"""Local control API for the heartbeat daemon (HTTP on 127.0.0.1).
+
+The heartbeat loop serves this API so the UI and overlay can control it without restarting the
+process or polling files. It listens on an ephemeral localhost port, writes `ipc_port`
+into `heartbeat_state.json` and a random token into `heartbeat_ipc.token` (mode 0600, readable
+only by the owner). Clients must send the token in the `X-Samus-Token` header, so other local
+users can't drive the agent.
+
+Endpoints:
+  GET  /state              -> current state + `pending` count + `next_in` seconds
+  POST /interval {"interval": 60}          change the tick live (no restart)
+  POST /tasks    {"task": "...", ...}      enqueue a task (wakes the loop); only `heartbeat.ENQUEUE_FIELDS`
+                                           are kept, so a client can't pre-approve a task or supply its actions
+  POST /trigger                            run a heartbeat check now
+  GET  /metrics            Prometheus text exposition of the heartbeat metrics (metrics.py)
+  GET  /events             Server-Sent Events stream: `data: {"event": ..., ...}` lines,
+                           pushed as they happen (heartbeat, task_started, task_done, state)
+
+Client helpers (return None when no daemon is reachable):
+  get_state(), set_interval(60), enqueue('Take a screenshot'), trigger(), events()
+"""
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+import json
+import os
+import queue
+import secrets
+import threading
+import time
+import urllib.request
+from typing import Any, Callable, Dict, Iterator, Optional
+
+BASE = Path(__file__).parent
+TOKEN_PATH = BASE / 'heartbeat_ipc.token'
+HOST = '127.0.0.1'
+TOKEN_HEADER = 'X-Samus-Token'
+CLIENT_TIMEOUT = 2.0
+KEEPALIVE = 15.0
+
+
+class EventBus:
+    """Fan-out of daemon events to SSE subscribers (each gets a bounded queue)."""
+
+    def __init__(self, maxsize: int = 256):
+        self.maxsize = maxsize
+        self._subs = set()
+        self._lock = threading.Lock()
+
+    def subscribe(self) -> 'queue.Queue':
+        q = queue.Queue(maxsize=self.maxsize)
+        with self._lock:
+            self._subs.add(q)
+        return q
+
+    def unsubscribe(self, q):
+        with self._lock:
+            self._subs.discard(q)
+
+    def publish(self, event: str, **data):
+        if not self._subs:
+            return
+        msg = dict(data, event=event, ts=time.time())
+        with self._lock:
+            subs = list(self._subs)
+        for q in subs:
+            try:
+                q.put_nowait(msg)
+            except queue.Full:
+                pass  # slow subscriber: drop rather than block the heartbeat
+
+
+class ControlServer:
+    """Serves the control API; `handlers` maps operation name -> callable (see `heartbeat.main`)."""
+
+    def __init__(self, handlers: Dict[str, Callable], bus: EventBus, port: int = 0, token: Optional[str] = None):
+        self.handlers = handlers
+        self.bus = bus
+        self.token = token or secrets.token_hex(16)
+        self.httpd = ThreadingHTTPServer((HOST, port), self._handler_class())
+        self.httpd.daemon_threads = True
+        self.port = self.httpd.server_address[1]
+        self._thread = None
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _send(self, code: int, payload: Any):
+                body = json.dumps(payload, default=str).encode('utf-8')
+                self.send_response(code)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _authorized(self) -> bool:
+                if secrets.compare_digest(self.headers.get(TOKEN_HEADER, ''), server.token):
+                    return True
+                self._send(403, {'error': 'bad token'})
+                return False
+
+            def _body(self) -> Dict[str, Any]:
+                n = int(self.headers.get('Content-Length') or 0)
+                if not n:
+                    return {}
+                data = json.loads(self.rfile.read(n).decode('utf-8'))
+                return data if isinstance(data, dict) else {}
+
+            def _call(self, op: str, *args):
+                try:
+                    self._send(200, server.handlers[op](*args))
+                except (ValueError, KeyError, TypeError) as e:
+                    self._send(400, {'error': str(e)})
+                except Exception as e:
+                    self._send(500, {'error': str(e)})
+
+            def do_GET(self):
+                if not self._authorized():
+                    return
+                if self.path == '/state':
+                    self._call('state')
+                elif self.path == '/metrics' and 'metrics' in server.handlers:
+                    body = server.handlers['metrics']().encode('utf-8')
+                    self.send_response(200)
+                    self.send_header('Content-Type', 'text/plain; version=0.0.4')
+                    self.send_header('Content-Length', str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                elif self.path == '/events':
+                    self._stream()
+                else:
+                    self._send(404, {'error': 'not found'})
+
+            def do_POST(self):
+                if not self._authorized():
+                    return
+                try:
+                    body = self._body()
+                except Exception as e:
+                    self._send(400, {'error': f'bad json: {e}'})
+                    return
+                if self.path == '/interval':
+                    self._call('set_interval', body.get('interval'))
+                elif self.path == '/tasks':
+                    self._call('enqueue', body)
+                elif self.path == '/trigger':
+                    self._call('trigger')
+                else:
+                    self._send(404, {'error': 'not found'})
+
+            def _stream(self):
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/event-stream')
+                self.send_header('Cache-Control', 'no-cache')
+                self.end_headers()
+                q = server.bus.subscribe()
+                try:
+                    self.wfile.write(b': connected\n\n')
+                    self.wfile.flush()
+                    while True:
+                        try:
+                            msg = q.get(timeout=KEEPALIVE)
+                            chunk = 'data: ' + json.dumps(msg, default=str) + '\n\n'
+                        except queue.Empty:
+                            chunk = ': keepalive\n\n'
+                        self.wfile.write(chunk.encode('utf-8'))
+                        self.wfile.flush()
+                except (BrokenPipeError, ConnectionResetError, OSError):
+                    pass
+                finally:
+                    server.bus.unsubscribe(q)
+
+        return Handler
+
+    def start(self) -> 'ControlServer':
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name='heartbeat-ipc', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        try:
+            self.httpd.shutdown()
+            self.httpd.server_close()
+        except Exception:
+            pass
+
+
+def write_token(token: Optional[str], path: Path = None):
+    """Store the control token in a file only the owner can read; None removes it."""
+    path = Path(path) if path else TOKEN_PATH
+    if token is None:
+        try:
+            path.unlink()
+        except FileNotFoundError:
+            pass
+        return
+    fd = os.open(str(path), os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    try:
+        os.chmod(str(path), 0o600)  # an existing file keeps its mode on open
+    except OSError:
+        pass
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        f.write(token)
+
+
+def read_token(path: Path = None) -> Optional[str]:
+    try:
+        return (Path(path) if path else TOKEN_PATH).read_text(encoding='utf-8').strip() or None
+    except OSError:
+        return None
+
+
+# ---- client side ----
+
+def _endpoint(state: Optional[Dict[str, Any]] = None):
+    if state is None:
+        try:
+            from samus_manus_mvp.heartbeat_ui import load_state
+        except Exception:
+            from heartbeat_ui import load_state
+        state = load_state()
+    port, token = state.get('ipc_port'), state.get('ipc_token') or read_token()
+    if not port or not token:
+        return None
+    return f'http://{HOST}:{int(port)}', token
+
+
+def request(method: str, path: str, payload: Optional[Dict[str, Any]] = None, state: Optional[Dict[str, Any]] = None,
+            timeout: float = CLIENT_TIMEOUT) -> Optional[Dict[str, Any]]:
+    """Call the daemon; returns the decoded reply, or None if no daemon answers."""
+    ep = _endpoint(state)
+    if ep is None:
+        return None
+    url, token = ep
+    data = json.dumps(payload).encode('utf-8') if payload is not None else (b'' if method == 'POST' else None)
+    req = urllib.request.Request(url + path, data=data, method=method,
+                                 headers={TOKEN_HEADER: token, 'Content-Type': 'application/json'})
+    try:
+        with urllib.request.urlopen(req, timeout=timeout) as resp:
+            return json.loads(resp.read().decode('utf-8'))
+    except Exception:
+        return None
+
+
+def get_state(state=None):
+    return request('GET', '/state', state=state)
+
+
+def set_interval(interval: int, state=None):
+    return request('POST', '/interval', {'interval': int(interval)}, state=state)
+
+
+def enqueue(task, state=None, **fields):
+    payload = dict(fields, task=task) if isinstance(task, str) else dict(task)
+    return request('POST', '/tasks', payload, state=state)
+
+
+def trigger(state=None):
+    return request('POST', '/trigger', state=state)
+
+
+def events(state=None, timeout: Optional[float] = None) -> Iterator[Dict[str, Any]]:
+    """Yield daemon events as they arrive (blocking). Stops when the connection closes."""
+    ep = _endpoint(state)
+    if ep is None:
+        return
+    url, token = ep
+    req = urllib.request.Request(url + '/events', headers={TOKEN_HEADER: token})
+    with urllib.request.urlopen(req, timeout=timeout) as resp:
+        for raw in resp:
+            line = raw.decode('utf-8').strip()
+            if line.startswith('data: '):
+                try:
+                    yield json.loads(line[6:])
+                except Exception:
+                    continue
@@ -12,6 +12,7 @@ import json
 import time
 import subprocess
 import sys
+import threading
 
 try:
     import tkinter as tk
@@ -19,31 +20,36 @@ try:
 except Exception:
     tk = None
 
+try:
+    from samus_manus_mvp.state_store import get_store
+except Exception:
+    from state_store import get_store
+
 BASE = Path(__file__).parent
 STATE_PATH = BASE / 'heartbeat_state.json'
 HEARTBEAT_UI = BASE / 'heartbeat_ui.py'
 DEFAULT_INTERVAL = 1800
 
 
-# Write interval immediately to state (used by live knob updates)
-def write_interval_state(interval: int) -> bool:
+# Write interval to state (used by live knob updates); `debounce` coalesces rapid slider ticks
+def write_interval_state(interval: int, debounce: float = 0) -> bool:
     try:
         st = load_state()
         st['interval'] = int(interval)
         st['last_heartbeat'] = time.time()
-        STATE_PATH.write_text(json.dumps(st, indent=2))
+        store = get_store(STATE_PATH)
+        if debounce:
+            store.update({'interval': st['interval'], 'last_heartbeat': st['last_heartbeat']}, debounce=debounce)
+        else:
+            store.write(st)
         return True
     except Exception:
         return False
 
 
 def load_state():
-    if not STATE_PATH.exists():
-        return {}
-    try:
-        return json.loads(STATE_PATH.read_text(encoding='utf-8'))
-    except Exception:
-        return {}
+    """Current state; the file is only re-parsed when it changed (see state_store.py)."""
+    return get_store(STATE_PATH).read()
 
 
 def format_seconds(s: int | None) -> str:
@@ -224,15 +230,8 @@ def build_overlay():
             return bool(hb_set_interval(int(interval), restart=restart))
         except Exception:
             # best-effort: write state file so seconds_until_next reflects new interval
-            try:
-                st = load_state()
-                st['interval'] = int(interval)
-                # also bump last_heartbeat so the new countdown is applied immediately
-                st['last_heartbeat'] = time.time()
-                STATE_PATH.write_text(json.dumps(st, indent=2))
-                return True
-            except Exception:
-                return False
+            # (also bumps last_heartbeat so the new countdown is applied immediately)
+            return write_interval_state(int(interval))
 
     def show_knob_popup(event=None):
         # if popup already open, bring to front
@@ -262,7 +261,7 @@ def build_overlay():
             v_int = int(scale.get())
             val_lbl.config(text=f"{v_int}s")
             try:
-                write_interval_state(v_int)
+                write_interval_state(v_int, debounce=0.25)
             except Exception:
                 pass
 
@@ -296,8 +295,31 @@ def build_overlay():
     center_lbl.bind('<Button-3>', show_knob_popup)
     center_sub.bind('<Button-3>', show_knob_popup)
 
+    # live updates pushed by a running heartbeat (heartbeat_ipc.py); files are the fallback
+    live = {'connected': False, 'state': {}, 'pending': None}
+
+    def listen_events():
+        try:
+            from samus_manus_mvp import heartbeat_ipc
+        except Exception:
+            import heartbeat_ipc
+        while True:
+            try:
+                for ev in heartbeat_ipc.events():
+                    live['connected'] = True
+                    if ev.get('event') == 'state':
+                        live['state'] = {'interval': ev.get('interval'), 'last_heartbeat': ev.get('last_heartbeat')}
+                    elif ev.get('event') == 'heartbeat':
+                        live['pending'] = ev.get('pending')
+            except Exception:
+                pass
+            live['connected'] = False
+            time.sleep(5)  # daemon not running (or restarted): retry
+
+    threading.Thread(target=listen_events, daemon=True).start()
+
     def refresh_loop():
-        st = load_state()
+        st = dict(live['state']) if live['connected'] and live['state'] else load_state()
         secs = seconds_until_next(st)
         countdown_text = format_seconds(secs)
 
@@ -312,7 +334,7 @@ def build_overlay():
         # update metrics
         try:
             auto_count = count_auto_approvals()
-            pending_count = count_pending_tasks()
+            pending_count = live['pending'] if live['connected'] and live['pending'] is not None else count_pending_tasks()
         except Exception:
             auto_count = 0
             pending_count = 0
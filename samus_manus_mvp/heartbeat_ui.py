@@ -4,7 +4,9 @@
 Features:
 - Slider/dial to set heartbeat interval (seconds)
 - Start / Stop heartbeat
-- Apply new interval (updates `heartbeat_state.json` and restarts background heartbeat)
+- Apply new interval (live via the heartbeat's control API; otherwise updates
+  `heartbeat_state.json` and restarts the background heartbeat)
+- "Last output" shows the full output of the latest finished task (from the blob store)
 
 Usage: python samus_manus_mvp/heartbeat_ui.py
 """
@@ -21,22 +23,28 @@ try:
 except Exception:
     tk = None
 
+try:
+    from samus_manus_mvp.state_store import get_store
+    from samus_manus_mvp.blob_store import BlobStore, BLOB_DIR, task_output
+    from samus_manus_mvp.task_queue import TaskQueue
+except Exception:
+    from state_store import get_store
+    from blob_store import BlobStore, BLOB_DIR, task_output
+    from task_queue import TaskQueue
+
 BASE = Path(__file__).parent
 STATE_PATH = BASE / 'heartbeat_state.json'
 HEARTBEAT_PY = BASE / 'heartbeat.py'
+TASKS_DB = BASE / 'tasks.db'
 
 
 def load_state():
-    if not STATE_PATH.exists():
-        return {}
-    try:
-        return json.loads(STATE_PATH.read_text(encoding='utf-8'))
-    except Exception:
-        return {}
+    """Current state; the file is only re-parsed when it changed (see state_store.py)."""
+    return get_store(STATE_PATH).read()
 
 
 def save_state(state: dict):
-    STATE_PATH.write_text(json.dumps(state, indent=2), encoding='utf-8')
+    get_store(STATE_PATH).write(state)
 
 
 def stop_heartbeat():
@@ -73,8 +81,18 @@ def start_heartbeat(interval: int, announce: bool = True):
 def set_interval(interval: int, restart: bool = True):
     """Set the heartbeat interval in `heartbeat_state.json` and optionally restart background heartbeat.
 
+    A running heartbeat is told over its control API (heartbeat_ipc.py) and picks the new
+    interval up live; the stop/start restart is only the fallback when it isn't reachable.
     This is testable (doesn't require GUI)."""
     state = load_state()
+    if restart and state.get('ipc_port'):
+        try:
+            from samus_manus_mvp import heartbeat_ipc
+        except Exception:
+            import heartbeat_ipc
+        reply = heartbeat_ipc.set_interval(int(interval), state=state)
+        if reply and reply.get('ok'):
+            return True
     state['interval'] = int(interval)
     save_state(state)
     if restart:
@@ -86,6 +104,24 @@ def set_interval(interval: int, restart: bool = True):
 
 # ---- GUI ----
 
+def fetch_output(task_id: str | None = None):
+    """`(task, full_output)` for `task_id`, or for the most recently finished task; None if none."""
+    if not TASKS_DB.exists():
+        return None
+    q = TaskQueue(TASKS_DB)
+    try:
+        if task_id:
+            task = q.get(task_id, archived=True)
+        else:
+            finished = [t for t in q.list() if t.get('completed_at') or t.get('last_run_at')]
+            task = max(finished, key=lambda t: t.get('last_run_at') or t.get('completed_at') or 0, default=None)
+    finally:
+        q.close()
+    if task is None:
+        return None
+    return task, task_output(task, BlobStore(BASE / BLOB_DIR))
+
+
 def _human_readable(sec: int) -> str:
     if sec < 60:
         return f"{sec}s"
@@ -178,6 +214,22 @@ def build_ui():
     stop_btn = ttk.Button(btn_frame, text='Stop', command=stop_click)
     stop_btn.pack(side='left', padx=6)
 
+    def output_click():
+        found = fetch_output()
+        if found is None:
+            status_var.set('No finished tasks yet')
+            return
+        task, text = found
+        win = tk.Toplevel(root)
+        win.title(f"{task.get('id')}: {task.get('task')}")
+        box = tk.Text(win, wrap='word', width=100, height=30)
+        box.insert('1.0', text)
+        box.config(state='disabled')
+        box.pack(fill=tk.BOTH, expand=True)
+
+    out_btn = ttk.Button(btn_frame, text='Last output', command=output_click)
+    out_btn.pack(side='left', padx=6)
+
     # auto-apply checkbox (persist preference)
     auto_var = tk.BooleanVar(value=bool(state.get('auto_apply')))
 
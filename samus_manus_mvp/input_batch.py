@@ -0,0 +1,155 @@
+"""Batched keyboard input for the executor (runs of `type` / `press` / `hotkey` steps).
+
+- Adjacent keyboard steps run as one burst: inside it pyautogui's per-call `PAUSE` (0.1 s in
+  hands.py) is replaced by `INPUT_PAUSE` (default 0), and the app gets a single `SETTLE_PAUSE`
+  when the burst ends — right before the next click / screenshot / web step, or at the end.
+- Adaptive typing: text up to `SHORT_TEXT` characters keeps `TYPE_INTERVAL` per character (some
+  dialogs drop keys typed faster); longer text speeds up, down to `MIN_TYPE_INTERVAL`.
+- Text of `PASTE_MIN_CHARS` or more, or text pyautogui can't type (non-ASCII), is pasted through
+  the clipboard when pyperclip is installed; the previous clipboard content is put back after
+  `CLIPBOARD_DELAY` (slow or remote apps read the clipboard late and would paste the old one).
+- All pauses are configurable (`SAMUS_INPUT_PAUSE`, `SAMUS_INPUT_SETTLE`, `SAMUS_TYPE_INTERVAL`,
+  `SAMUS_MIN_TYPE_INTERVAL`, `SAMUS_PASTE_MIN_CHARS`, `SAMUS_CLIPBOARD_DELAY`); `estimate_seconds`
+  models input time.
+
+Usage:
+  burst = KeyBurst(pyautogui)
+  burst.begin(); type_text(pyautogui, 'hello'); pyautogui.press('tab'); burst.end()
+  python samus_manus_mvp/input_batch.py estimate --fields 10 --chars 30
+"""
+import os
+import sys
+import time
+from typing import Any, Dict, Iterable
+
+try:
+    import pyperclip
+except Exception:
+    pyperclip = None
+
+KEYBOARD_ACTIONS = frozenset({'type', 'press', 'hotkey'})
+INPUT_PAUSE = float(os.getenv('SAMUS_INPUT_PAUSE', '0'))
+SETTLE_PAUSE = float(os.getenv('SAMUS_INPUT_SETTLE', '0.1'))
+TYPE_INTERVAL = float(os.getenv('SAMUS_TYPE_INTERVAL', '0.02'))
+MIN_TYPE_INTERVAL = float(os.getenv('SAMUS_MIN_TYPE_INTERVAL', '0.004'))
+PASTE_MIN_CHARS = int(os.getenv('SAMUS_PASTE_MIN_CHARS', '200'))
+SHORT_TEXT = 12
+CLIPBOARD_DELAY = float(os.getenv('SAMUS_CLIPBOARD_DELAY', '0.25'))
+PASTE_KEYS = ('command', 'v') if sys.platform == 'darwin' else ('ctrl', 'v')
+
+
+def type_interval(text: str) -> float:
+    """Per-character delay: full TYPE_INTERVAL for short text, shrinking with length."""
+    if len(text) <= SHORT_TEXT:
+        return TYPE_INTERVAL
+    return max(MIN_TYPE_INTERVAL, TYPE_INTERVAL * SHORT_TEXT / len(text))
+
+
+def should_paste(text: str) -> bool:
+    return pyperclip is not None and (len(text) >= PASTE_MIN_CHARS or not text.isascii())
+
+
+def type_text(pg, text: str) -> str:
+    """Type or paste `text`; returns 'typed' or 'pasted'."""
+    if should_paste(text):
+        try:
+            previous = pyperclip.paste()
+        except Exception:
+            previous = None
+        pyperclip.copy(text)
+        time.sleep(CLIPBOARD_DELAY)
+        pg.hotkey(*PASTE_KEYS)
+        if previous is not None:
+            time.sleep(CLIPBOARD_DELAY)  # let the app read the clipboard before it is restored
+            try:
+                pyperclip.copy(previous)
+            except Exception:
+                pass
+        return 'pasted'
+    pg.write(text, interval=type_interval(text))
+    return 'typed'
+
+
+class KeyBurst:
+    """Lowers pyautogui.PAUSE while consecutive keyboard steps run; one settle pause at the end."""
+
+    def __init__(self, pg, pause: float = None, settle: float = None):
+        self.pg = pg
+        self.pause = INPUT_PAUSE if pause is None else pause
+        self.settle = SETTLE_PAUSE if settle is None else settle
+        self.active = False
+        self.bursts = 0
+        self._saved = None
+
+    def begin(self):
+        if self.active:
+            return
+        self._saved = getattr(self.pg, 'PAUSE', None)
+        self.pg.PAUSE = self.pause
+        self.active = True
+        self.bursts += 1
+
+    def end(self):
+        if not self.active:
+            return
+        self.active = False
+        if self._saved is not None:
+            self.pg.PAUSE = self._saved
+        if self.settle > 0:
+            time.sleep(self.settle)
+
+    def step(self, action_type: str):
+        """Call before each step: keyboard steps join the burst, anything else ends it."""
+        if action_type in KEYBOARD_ACTIONS:
+            self.begin()
+        else:
+            self.end()
+
+
+def estimate_seconds(actions: Iterable[Dict[str, Any]], batched: bool = True, pause: float = 0.1) -> float:
+    """Modelled keyboard/mouse time of a plan with pyautogui `PAUSE` = `pause` between calls."""
+    total, in_burst = 0.0, False
+    for a in actions:
+        t = a.get('type')
+        keyboard = t in KEYBOARD_ACTIONS
+        if batched and in_burst and not keyboard:
+            total += SETTLE_PAUSE
+        in_burst = batched and keyboard
+        step_pause = INPUT_PAUSE if in_burst else pause
+        if t == 'type':
+            text = str(a.get('text', ''))
+            if not batched:
+                total += len(text) * 0.02 + pause
+            elif should_paste(text):
+                total += 2 * CLIPBOARD_DELAY + step_pause
+            else:
+                total += len(text) * type_interval(text) + step_pause
+        else:
+            total += step_pause
+    if in_burst:
+        total += SETTLE_PAUSE
+    return total
+
+
+def form_fill(fields: int, chars: int) -> list:
+    plan = [{'type': 'click', 'x': 100, 'y': 100}]
+    for n in range(fields):
+        plan.append({'type': 'type', 'text': ('field %d ' % n + 'x' * chars)[:chars]})
+        plan.append({'type': 'press', 'key': 'tab'})
+    plan.append({'type': 'press', 'key': 'enter'})
+    return plan
+
+
+if __name__ == '__main__':
+    import argparse
+
+    ap = argparse.ArgumentParser(prog='input_batch', description='Keyboard input batching')
+    sub = ap.add_subparsers(dest='cmd', required=True)
+    ep = sub.add_parser('estimate', help='Modelled time of a form fill, one step at a time vs. batched')
+    ep.add_argument('--fields', type=int, default=10)
+    ep.add_argument('--chars', type=int, default=30)
+    args = ap.parse_args()
+    plan = form_fill(args.fields, args.chars)
+    before, after = estimate_seconds(plan, batched=False), estimate_seconds(plan, batched=True)
+    print(f"{len(plan)} steps: {before:.2f}s one at a time, {after:.2f}s batched ({before / after:.1f}x)"
+          + ('' if pyperclip else '  [pyperclip not installed: long text is typed]'))
@@ -1,15 +1,15 @@
 """Memory Intelligence / Knowledge helpers
 
 Provides simple retrieval over persistent `Memory` plus the approval audit log.
-- retrieve(query): returns persona, similar memory records, and matching approvals.
+- retrieve(query): returns persona, similar memory records, and matching approvals
+  (approvals come from the inverted index in `audit_index`), queried in parallel through
+  `retrieval.RetrievalEngine` and fused into one ranked `fused` list.
 - Lightweight and local-first: uses embeddings when available via `Memory.query_similar`.
 
 This is intentionally small and testable; later we can add a proper vector index or RAG server.
 """
 from pathlib import Path
-import json
-import time
-from typing import List, Dict, Any
+from typing import Dict, Any
 
 try:
     from samus_manus_mvp.memory import get_memory
@@ -19,77 +19,74 @@ except Exception:
     except Exception:
         get_memory = None
 
+try:
+    from samus_manus_mvp import audit_index
+    from samus_manus_mvp.retrieval import DEFAULT_BUDGET, RetrievalEngine, Source
+except Exception:
+    import audit_index
+    from retrieval import DEFAULT_BUDGET, RetrievalEngine, Source
+
 BASE = Path(__file__).parent
 AUDIT_PATH = BASE / 'approval_audit.log'
 
 
-def _load_approvals() -> List[Dict[str, Any]]:
-    if not AUDIT_PATH.exists():
+def _persona_source(query: str, top_k: int):
+    if get_memory is None:
         return []
-    out = []
-    try:
-        with open(AUDIT_PATH, 'r', encoding='utf-8') as f:
-            for line in f:
-                line = line.strip()
-                if not line:
-                    continue
-                try:
-                    out.append(json.loads(line))
-                except Exception:
-                    continue
-    except Exception:
+    m = get_memory()
+    by_type = getattr(m, 'by_type', None)
+    rows = by_type('persona', 1) if by_type is not None else [r for r in m.all(50) if r.get('type') == 'persona'][:1]
+    return [(1.0, rows[0])] if rows else []
+
+
+def _memory_source(query: str, top_k: int):
+    if get_memory is None:
         return []
-    return out
+    return [(float(r.get('score') or 0.0), r) for r in get_memory().query_similar(query, top_k=top_k)]
 
 
-def retrieve(query: str, top_k: int = 5, include_approvals: bool = True) -> Dict[str, Any]:
-    """Return a dictionary with `persona`, `memory` (similar), and `approvals` (matching).
+def _approval_source(query: str, top_k: int):
+    # a task sentence rarely has every word in one entry: rank by the words it shares instead
+    return audit_index.search(query, AUDIT_PATH, limit=top_k, match='any')
 
-    - `memory` uses Memory.query_similar when available (falls back to substring matches).
-    - `approvals` searches `approval_audit.log` for the query in `question`/`task`/`action`.
-    """
-    res: Dict[str, Any] = {'persona': None, 'memory': [], 'approvals': []}
 
-    # persona: most recent persona in memory (best-effort)
-    try:
-        if get_memory is not None:
-            m = get_memory()
-            for r in m.all(50):
-                if r.get('type') == 'persona':
-                    res['persona'] = r.get('text')
-                    break
-    except Exception:
-        res['persona'] = None
+def _approval_text(a: Dict[str, Any]) -> str:
+    return str(a.get('question') or a.get('task') or '')
 
-    # memory: use semantic query when possible
-    try:
-        if get_memory is not None:
-            res['memory'] = get_memory().query_similar(query, top_k=top_k)
-        else:
-            res['memory'] = []
-    except Exception:
-        res['memory'] = []
 
-    # approvals: simple substring match against question/task/action
+def build_engine(include_approvals: bool = True, budget: float = DEFAULT_BUDGET, fusion: str = 'rrf') -> RetrievalEngine:
+    """Persona (fetched, not ranked), memory similarity and the audit index as parallel sources."""
+    sources = [
+        Source('persona', _persona_source, weight=0.0),
+        Source('memory', _memory_source, weight=1.0),
+    ]
     if include_approvals:
-        try:
-            arows = _load_approvals()
-            qlow = (query or '').lower()
-            matched = []
-            for a in reversed(arows):
-                # consider question, task, and serialized action
-                question = str(a.get('question') or '').lower()
-                task = str(a.get('task') or '').lower()
-                action = json.dumps(a.get('action') or {}) if a.get('action') else ''
-                if qlow in question or qlow in task or qlow in action.lower():
-                    matched.append(a)
-                if len(matched) >= top_k:
-                    break
-            res['approvals'] = matched
-        except Exception:
-            res['approvals'] = []
-
-    return res
+        sources.append(Source('approvals', _approval_source, weight=0.7, text=_approval_text))
+    return RetrievalEngine(sources, budget=budget, fusion=fusion)
+
+
+def retrieve(query: str, top_k: int = 5, include_approvals: bool = True,
+             budget: float = DEFAULT_BUDGET, fusion: str = 'rrf') -> Dict[str, Any]:
+    """Return a dictionary with `persona`, `memory` (similar), `approvals` (matching) and `fused`.
+
+    - Sources are queried concurrently; any source slower than `budget` seconds is skipped.
+    - `memory` uses Memory.query_similar when available (falls back to substring matches).
+    - `approvals` searches `approval_audit.log` via `audit_index` (entries sharing any
+      question/task/action word, BM25-ranked; fielded terms such as `type:click since:1d` still
+      all apply).
+    - `fused` is one ranked list over memory + approvals with per-hit provenance
+      (see `retrieval.fuse`); `stats` has per-source timing / errors.
+    """
+    out = build_engine(include_approvals, budget=budget, fusion=fusion).search(query, top_k=top_k)
+    ranked = out['ranked']
+    persona = ranked.get('persona') or []
+    return {
+        'persona': persona[0][1].get('text') if persona else None,
+        'memory': [r for _, r in ranked.get('memory', [])],
+        'approvals': [a for _, a in ranked.get('approvals', [])],
+        'fused': out['results'],
+        'stats': out['stats'],
+    }
 
 
 def summarize_results(r: Dict[str, Any]) -> str:
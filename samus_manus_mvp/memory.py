@@ -13,6 +13,7 @@ Usage:
 import os
 import json
 import sqlite3
+import threading
 import time
 from typing import Optional, List, Dict
 
@@ -26,18 +27,35 @@ try:
 except Exception:
     np = None
 
-DB_PATH = os.path.join(os.path.dirname(__file__), 'memory.db')
+DB_PATH = os.getenv('SAMUS_MEMORY_DB') or os.path.join(os.path.dirname(__file__), 'memory.db')
 EMBED_MODEL = os.getenv('OPENAI_EMBEDDING_MODEL', 'text-embedding-3-small')
 
 
+def activity_source(kind: str, metadata: Optional[Dict] = None) -> str:
+    """Activity key for a record: its type, prefixed by `metadata['source']` when one is given
+    (so e.g. heartbeat bookkeeping, `heartbeat:task`, doesn't look like user activity)."""
+    src = (metadata or {}).get('source') if isinstance(metadata, dict) else None
+    return f'{src}:{kind}' if src else kind
+
+
 class Memory:
     def __init__(self, path: str = DB_PATH):
         self.path = path
         self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        # one connection shared by the agent, the heartbeat and scheduler threads: serialize its use
+        self._lock = threading.Lock()
         self._conn.execute(
             'CREATE TABLE IF NOT EXISTS memories (id INTEGER PRIMARY KEY, type TEXT, text TEXT, metadata TEXT, embedding TEXT, created_at REAL)'
         )
+        self._conn.execute('CREATE INDEX IF NOT EXISTS idx_memories_type_created ON memories (type, created_at)')
+        # last write per activity source (see `activity_source`), kept current by `add`
+        has_activity = self._conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'activity'").fetchone()
+        self._conn.execute('CREATE TABLE IF NOT EXISTS activity (source TEXT PRIMARY KEY, last_at REAL)')
+        if not has_activity:
+            self._backfill_activity()
         self._conn.commit()
+        # callbacks invoked as cb(record) after each add (e.g. approval policy updates)
+        self._listeners = []
 
     def _get_embedding(self, text: str) -> Optional[List[float]]:
         api_key = os.getenv('OPENAI_API_KEY')
@@ -57,18 +75,89 @@ class Memory:
         emb = self._get_embedding(text)
         emb_json = json.dumps(emb) if emb else None
         ts = time.time()
-        cur = self._conn.cursor()
-        cur.execute(
-            'INSERT INTO memories (type, text, metadata, embedding, created_at) VALUES (?, ?, ?, ?, ?)',
-            (kind, text, meta, emb_json, ts),
-        )
-        self._conn.commit()
-        return cur.lastrowid
+        with self._lock:
+            cur = self._conn.cursor()
+            cur.execute(
+                'INSERT INTO memories (type, text, metadata, embedding, created_at) VALUES (?, ?, ?, ?, ?)',
+                (kind, text, meta, emb_json, ts),
+            )
+            rid = cur.lastrowid  # before the activity upsert, which moves lastrowid
+            cur.execute(
+                'INSERT INTO activity (source, last_at) VALUES (?, ?) ON CONFLICT(source) DO UPDATE SET last_at = MAX(last_at, excluded.last_at)',
+                (activity_source(kind, metadata), ts),
+            )
+            self._conn.commit()
+        if self._listeners:
+            record = {'id': rid, 'type': kind, 'text': text, 'metadata': metadata or {}, 'created_at': ts}
+            for cb in list(self._listeners):
+                try:
+                    cb(record)
+                except Exception:
+                    pass
+        return rid
+
+    def _backfill_activity(self):
+        # one pass over existing rows (older databases); newer rows are tracked by `add`
+        latest = {}
+        for kind, meta, ts in self._conn.execute('SELECT type, metadata, created_at FROM memories'):
+            try:
+                md = json.loads(meta or '{}')
+            except Exception:
+                md = {}
+            src = activity_source(kind, md)
+            latest[src] = max(latest.get(src, 0.0), ts or 0.0)
+        self._conn.executemany('INSERT OR REPLACE INTO activity (source, last_at) VALUES (?, ?)', latest.items())
+
+    def touch(self, source: str, ts: Optional[float] = None):
+        """Record activity for `source` without storing a memory (e.g. a UI interaction)."""
+        with self._lock:
+            self._conn.execute(
+                'INSERT INTO activity (source, last_at) VALUES (?, ?) ON CONFLICT(source) DO UPDATE SET last_at = MAX(last_at, excluded.last_at)',
+                (source, time.time() if ts is None else ts),
+            )
+            self._conn.commit()
+
+    def last_activity(self, sources=None) -> Optional[float]:
+        """Latest activity timestamp over `sources` (all sources when None); None if never seen."""
+        if sources is None:
+            with self._lock:
+                row = self._conn.execute('SELECT MAX(last_at) FROM activity').fetchone()
+        else:
+            sources = list(sources)
+            if not sources:
+                return None
+            with self._lock:
+                row = self._conn.execute(
+                    'SELECT MAX(last_at) FROM activity WHERE source IN (%s)' % ','.join('?' * len(sources)), sources
+                ).fetchone()
+        return row[0] if row else None
+
+    def subscribe(self, callback):
+        """Register `callback(record)` to be called after every `add`."""
+        self._listeners.append(callback)
+
+    def unsubscribe(self, callback):
+        try:
+            self._listeners.remove(callback)
+        except ValueError:
+            pass
+
+    def by_type(self, kind: str, limit: int = 100):
+        """Most recent records of one type (newest first), without decoding embeddings."""
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT id, type, text, metadata, created_at FROM memories WHERE type = ? ORDER BY created_at DESC LIMIT ?', (kind, limit)
+            ).fetchall()
+        return [
+            {'id': r[0], 'type': r[1], 'text': r[2], 'metadata': json.loads(r[3] or '{}'), 'created_at': r[4]}
+            for r in rows
+        ]
 
     def all(self, limit: int = 100):
-        cur = self._conn.cursor()
-        cur.execute('SELECT id, type, text, metadata, embedding, created_at FROM memories ORDER BY created_at DESC LIMIT ?', (limit,))
-        rows = cur.fetchall()
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT id, type, text, metadata, embedding, created_at FROM memories ORDER BY created_at DESC LIMIT ?', (limit,)
+            ).fetchall()
         out = []
         for r in rows:
             out.append({
@@ -104,12 +193,13 @@ class Memory:
         comparison or a simple substring match when embeddings are unavailable.
         """
         emb = self._get_embedding(text)
-        cur = self._conn.cursor()
 
         # If we got a query embedding, prefer semantic (embedding) search
         if emb:
-            cur.execute('SELECT id, type, text, metadata, embedding, created_at FROM memories WHERE embedding IS NOT NULL')
-            rows = cur.fetchall()
+            with self._lock:
+                rows = self._conn.execute(
+                    'SELECT id, type, text, metadata, embedding, created_at FROM memories WHERE embedding IS NOT NULL'
+                ).fetchall()
             if rows:
                 try:
                     if np is not None:
@@ -160,8 +250,8 @@ class Memory:
                     pass
 
         # Fallback: simple substring match when embeddings are not available
-        cur.execute('SELECT id, type, text, metadata, created_at FROM memories')
-        rows = cur.fetchall()
+        with self._lock:
+            rows = self._conn.execute('SELECT id, type, text, metadata, created_at FROM memories').fetchall()
         matches = []
         q = text.lower()
         for r in rows:
@@ -181,25 +271,27 @@ class Memory:
         Returns the number of records updated. Useful when an API key is added
         after data was created.
         """
-        cur = self._conn.cursor()
-        cur.execute('SELECT id, text FROM memories WHERE embedding IS NULL LIMIT ?', (limit,))
-        rows = cur.fetchall()
-        updated = 0
-        for r in rows:
-            rid, txt = r
+        with self._lock:
+            rows = self._conn.execute('SELECT id, text FROM memories WHERE embedding IS NULL LIMIT ?', (limit,)).fetchall()
+        updated = []
+        for rid, txt in rows:
             emb = self._get_embedding(txt)
             if emb:
-                cur.execute('UPDATE memories SET embedding = ? WHERE id = ?', (json.dumps(emb), rid))
-                updated += 1
-        self._conn.commit()
-        return updated
+                updated.append((json.dumps(emb), rid))
+        with self._lock:
+            self._conn.executemany('UPDATE memories SET embedding = ? WHERE id = ?', updated)
+            self._conn.commit()
+        return len(updated)
 
 
 # convenience singleton
 _global_memory = None
+_GLOBAL_LOCK = threading.Lock()
 
 def get_memory() -> Memory:
     global _global_memory
     if _global_memory is None:
-        _global_memory = Memory()
+        with _GLOBAL_LOCK:
+            if _global_memory is None:
+                _global_memory = Memory()
     return _global_memory
@@ -0,0 +1,244 @@
+"""In-process metrics for the heartbeat (counters, gauges, histograms) + a local run log.
+
+- `REGISTRY.counter(name, help)`, `.gauge(...)`, `.histogram(..., buckets)` return metric
+  objects; label values are passed as keyword arguments: `TASKS.inc(status='done')`.
+- `render_prometheus()` renders the Prometheus text exposition format (served by the heartbeat
+  control API at `GET /metrics`).
+- `append_run(path, record)` appends one compact JSON line per heartbeat run to a local
+  metrics file (rotated at `MAX_LOG_BYTES`), so latency can be compared over weeks;
+  `summarize(path, days)` reports percentiles per day from it.
+
+Usage:
+  python samus_manus_mvp/metrics.py summary --days 14
+"""
+from collections import defaultdict
+from contextlib import contextmanager
+from pathlib import Path
+import bisect
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+BASE = Path(__file__).parent
+METRICS_FILE = 'heartbeat_metrics.jsonl'
+MAX_LOG_BYTES = 5 * 1024 * 1024
+# seconds; covers TTS / memory writes (ms) up to long GUI tasks (minutes)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+
+def _key(labels: Dict[str, Any]) -> Tuple[Tuple[str, str], ...]:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _fmt_labels(key, extra: Optional[Tuple[str, str]] = None) -> str:
+    items = list(key) + ([extra] if extra else [])
+    if not items:
+        return ''
+    esc = lambda v: v.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+    return '{' + ','.join(f'{k}="{esc(v)}"' for k, v in items) + '}'
+
+
+def _fmt_value(v: float) -> str:
+    if v == float('inf'):
+        return '+Inf'
+    return repr(float(v)) if not float(v).is_integer() else str(int(v))
+
+
+class _Metric:
+    kind = ''
+
+    def __init__(self, name: str, help: str = ''):
+        self.name = name
+        self.help = help
+        self._lock = threading.Lock()
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def __init__(self, name, help=''):
+        super().__init__(name, help)
+        self.values: Dict[tuple, float] = defaultdict(float)
+
+    def inc(self, n: float = 1, **labels):
+        with self._lock:
+            self.values[_key(labels)] += n
+
+    def get(self, **labels) -> float:
+        return self.values.get(_key(labels), 0.0)
+
+    def samples(self):
+        for key, v in sorted(self.values.items()):
+            yield self.name, key, None, v
+
+
+class Gauge(Counter):
+    kind = 'gauge'
+
+    def set(self, v: float, **labels):
+        with self._lock:
+            self.values[_key(labels)] = v
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, help='', buckets: Iterable[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help)
+        self.buckets = tuple(sorted(buckets))
+        # per label set: [bucket counts..., +Inf count], sum
+        self.series: Dict[tuple, list] = {}
+
+    def observe(self, v: float, **labels):
+        key = _key(labels)
+        with self._lock:
+            s = self.series.get(key)
+            if s is None:
+                s = self.series[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            s[0][bisect.bisect_left(self.buckets, v)] += 1
+            s[1] += v
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def count(self, **labels) -> int:
+        s = self.series.get(_key(labels))
+        return sum(s[0]) if s else 0
+
+    def sum(self, **labels) -> float:
+        """Sum of observations; with no labels, across all label sets."""
+        if labels:
+            s = self.series.get(_key(labels))
+            return s[1] if s else 0.0
+        return sum(s[1] for s in list(self.series.values()))
+
+    def samples(self):
+        for key, (counts, total) in sorted(self.series.items()):
+            cum = 0
+            for bound, c in zip(self.buckets + (float('inf'),), counts):
+                cum += c
+                yield self.name + '_bucket', key, ('le', _fmt_value(bound)), cum
+            yield self.name + '_sum', key, None, total
+            yield self.name + '_count', key, None, cum
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _get(self, cls, name, help, **kw):
+        with self._lock:
+            m = self._metrics.get(name)
+            if m is None:
+                m = self._metrics[name] = cls(name, help, **kw)
+            return m
+
+    def counter(self, name: str, help: str = '') -> Counter:
+        return self._get(Counter, name, help)
+
+    def gauge(self, name: str, help: str = '') -> Gauge:
+        return self._get(Gauge, name, help)
+
+    def histogram(self, name: str, help: str = '', buckets: Iterable[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._get(Histogram, name, help, buckets=buckets)
+
+    def render(self) -> str:
+        lines = []
+        for m in list(self._metrics.values()):
+            if m.help:
+                lines.append(f'# HELP {m.name} {m.help}')
+            lines.append(f'# TYPE {m.name} {m.kind}')
+            for name, key, extra, v in m.samples():
+                lines.append(f'{name}{_fmt_labels(key, extra)} {_fmt_value(v)}')
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+
+def render_prometheus() -> str:
+    return REGISTRY.render()
+
+
+# ---- run log ----
+
+def append_run(path: Path, record: Dict[str, Any]):
+    """Append one run record (compact JSON line); rotates the file to `<name>.1` past MAX_LOG_BYTES."""
+    path = Path(path)
+    try:
+        if path.exists() and path.stat().st_size > MAX_LOG_BYTES:
+            os.replace(path, path.with_name(path.name + '.1'))
+    except Exception:
+        pass
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(record, separators=(',', ':'), default=str) + '\n')
+
+
+def load_runs(path: Path, since: float = 0.0) -> List[Dict[str, Any]]:
+    path = Path(path)
+    runs = []
+    for p in (path.with_name(path.name + '.1'), path):
+        if not p.exists():
+            continue
+        with open(p, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    r = json.loads(line)
+                except Exception:
+                    continue
+                if isinstance(r, dict) and float(r.get('ts', 0)) >= since:
+                    runs.append(r)
+    return runs
+
+
+def _pct(values: List[float], q: float) -> Optional[float]:
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(q * (len(values) - 1))))]
+
+
+def summarize(path: Path, days: int = 7) -> List[Dict[str, Any]]:
+    """Per-day run count and p50 / p95 of run duration and per-task latency."""
+    by_day: Dict[str, Dict[str, list]] = defaultdict(lambda: {'dur': [], 'task': [], 'tasks': []})
+    for r in load_runs(path, since=time.time() - days * 86400):
+        d = by_day[time.strftime('%Y-%m-%d', time.localtime(r['ts']))]
+        d['dur'].append(float(r.get('dur', 0)))
+        d['task'].extend(float(x) for x in r.get('task_s', []))
+        d['tasks'].append(int(r.get('tasks', 0)))
+    out = []
+    for day in sorted(by_day):
+        d = by_day[day]
+        out.append({
+            'day': day, 'runs': len(d['dur']), 'tasks': sum(d['tasks']),
+            'run_p50': _pct(d['dur'], 0.5), 'run_p95': _pct(d['dur'], 0.95),
+            'task_p50': _pct(d['task'], 0.5), 'task_p95': _pct(d['task'], 0.95),
+        })
+    return out
+
+
+if __name__ == '__main__':
+    import argparse
+
+    ap = argparse.ArgumentParser(prog='metrics', description='Heartbeat run metrics')
+    sub = ap.add_subparsers(dest='cmd')
+    sp = sub.add_parser('summary', help='Per-day latency percentiles from the metrics file')
+    sp.add_argument('--days', type=int, default=7)
+    sp.add_argument('--file', default=str(BASE / METRICS_FILE))
+    args = ap.parse_args()
+    if args.cmd == 'summary':
+        fmt = lambda v: '-' if v is None else f'{v:.3f}s'
+        print(f"{'day':<12}{'runs':>6}{'tasks':>7}{'run p50':>10}{'run p95':>10}{'task p50':>10}{'task p95':>10}")
+        for row in summarize(Path(args.file), args.days):
+            print(f"{row['day']:<12}{row['runs']:>6}{row['tasks']:>7}{fmt(row['run_p50']):>10}{fmt(row['run_p95']):>10}"
+                  f"{fmt(row['task_p50']):>10}{fmt(row['task_p95']):>10}")
+    else:
+        ap.print_help()
@@ -0,0 +1,184 @@
+"""Persistent cache of planner output (SQLite, stored next to `memory.db`).
+
+- Plans are keyed by the normalized task text, a hash of the persona, the planner model and
+  the allowed-action schema version, so a changed persona, model or action set never
+  reuses an old plan. Normalization collapses whitespace and case outside quotes
+  (`click 'More info'` keeps its quoted text exactly).
+- Entries expire after `ttl` seconds (default 7 days, `SAMUS_PLAN_CACHE_TTL`); retrieved
+  memory context is not part of the key, so the TTL bounds how stale a plan can get.
+- `invalidate(task)` drops the plans for one task (any persona / model), `clear()` all of them.
+- Hits, misses and stores are counted persistently; `stats()` reports the hit rate.
+
+Usage:
+  cache = get_plan_cache()
+  plan = cache.get(task, persona=persona_text, model='gpt-4o-mini', schema=SCHEMA_VERSION)
+  python samus_manus_mvp/plan_cache.py stats | invalidate "Take a screenshot" | prune | clear
+"""
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+try:
+    from samus_manus_mvp.memory import DB_PATH as MEMORY_DB_PATH
+except Exception:
+    from memory import DB_PATH as MEMORY_DB_PATH
+
+PLAN_CACHE_PATH = os.getenv('SAMUS_PLAN_CACHE_DB') or os.path.join(os.path.dirname(MEMORY_DB_PATH), 'plan_cache.db')
+DEFAULT_TTL = float(os.getenv('SAMUS_PLAN_CACHE_TTL', str(7 * 24 * 3600)))
+
+_QUOTED = re.compile(r'("[^"]*"|\'[^\']*\')')
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS plans (
+    key TEXT PRIMARY KEY, norm TEXT NOT NULL, task TEXT, persona TEXT, model TEXT, schema TEXT,
+    plan TEXT NOT NULL, created_at REAL, expires_at REAL, hits INTEGER DEFAULT 0, last_hit_at REAL
+);
+CREATE INDEX IF NOT EXISTS idx_plans_norm ON plans (norm);
+CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER NOT NULL);
+'''
+
+
+def normalize_task(task: str) -> str:
+    """Whitespace / case-insensitive form of a task; quoted text is kept as written."""
+    parts = _QUOTED.split(task.strip())
+    out = []
+    for i, part in enumerate(parts):
+        out.append(part if i % 2 else re.sub(r'\s+', ' ', part.lower()))
+    return ''.join(out).strip().rstrip(' .!')
+
+
+def persona_hash(persona: Optional[str]) -> str:
+    return hashlib.sha256((persona or '').encode('utf-8')).hexdigest()[:16]
+
+
+class PlanCache:
+    def __init__(self, path: str = PLAN_CACHE_PATH, ttl: float = DEFAULT_TTL):
+        self.path = path
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.executescript(_SCHEMA)
+        self._conn.commit()
+
+    @staticmethod
+    def key(task: str, persona: Optional[str], model: str, schema: str) -> str:
+        raw = '\x1f'.join((normalize_task(task), persona_hash(persona), model or '', schema or ''))
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    def _count(self, name: str, n: int = 1):
+        self._conn.execute(
+            'INSERT INTO counters (name, value) VALUES (?, ?) ON CONFLICT(name) DO UPDATE SET value = value + excluded.value',
+            (name, n),
+        )
+
+    def get(self, task: str, persona: Optional[str] = None, model: str = '', schema: str = '') -> Optional[List[Dict[str, Any]]]:
+        """Cached plan (a fresh copy) or None; expired entries are removed and count as misses."""
+        k = self.key(task, persona, model, schema)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute('SELECT plan, expires_at FROM plans WHERE key = ?', (k,)).fetchone()
+            if row is not None and row[1] is not None and row[1] <= now:
+                self._conn.execute('DELETE FROM plans WHERE key = ?', (k,))
+                self._count('expired')
+                row = None
+            if row is None:
+                self._count('misses')
+                self._conn.commit()
+                return None
+            self._conn.execute('UPDATE plans SET hits = hits + 1, last_hit_at = ? WHERE key = ?', (now, k))
+            self._count('hits')
+            self._conn.commit()
+        return json.loads(row[0])
+
+    def put(self, task: str, plan: List[Dict[str, Any]], persona: Optional[str] = None, model: str = '',
+            schema: str = '', ttl: Optional[float] = None):
+        ttl = self.ttl if ttl is None else ttl
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO plans (key, norm, task, persona, model, schema, plan, created_at, expires_at, hits) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, 0)',
+                (self.key(task, persona, model, schema), normalize_task(task), task, persona_hash(persona), model,
+                 schema, json.dumps(plan), now, now + ttl if ttl and ttl > 0 else None),
+            )
+            self._count('stores')
+            self._conn.commit()
+
+    def invalidate(self, task: str) -> int:
+        """Drop every cached plan for `task` (all personas, models and schema versions)."""
+        with self._lock:
+            n = self._conn.execute('DELETE FROM plans WHERE norm = ?', (normalize_task(task),)).rowcount
+            self._count('invalidated', n)
+            self._conn.commit()
+        return n
+
+    def prune(self) -> int:
+        with self._lock:
+            n = self._conn.execute('DELETE FROM plans WHERE expires_at IS NOT NULL AND expires_at <= ?', (time.time(),)).rowcount
+            self._count('expired', n)
+            self._conn.commit()
+        return n
+
+    def clear(self) -> int:
+        with self._lock:
+            n = self._conn.execute('DELETE FROM plans').rowcount
+            self._count('invalidated', n)
+            self._conn.commit()
+        return n
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            counts = dict(self._conn.execute('SELECT name, value FROM counters').fetchall())
+            entries = self._conn.execute('SELECT COUNT(*) FROM plans').fetchone()[0]
+        out = {k: int(counts.get(k, 0)) for k in ('hits', 'misses', 'stores', 'expired', 'invalidated')}
+        lookups = out['hits'] + out['misses']
+        out['entries'] = entries
+        out['hit_rate'] = out['hits'] / lookups if lookups else 0.0
+        return out
+
+    def close(self):
+        try:
+            self._conn.close()
+        except Exception:
+            pass
+
+
+_CACHES: Dict[str, PlanCache] = {}
+_CACHES_LOCK = threading.Lock()
+
+
+def get_plan_cache(path: Optional[str] = None) -> PlanCache:
+    """One cache per database file per process (default `PLAN_CACHE_PATH`, read at call time)."""
+    path = os.path.abspath(path or PLAN_CACHE_PATH)
+    with _CACHES_LOCK:
+        cache = _CACHES.get(path)
+        if cache is None:
+            cache = _CACHES[path] = PlanCache(path)
+    return cache
+
+
+if __name__ == '__main__':
+    import argparse
+
+    ap = argparse.ArgumentParser(prog='plan_cache', description='Planner cache maintenance')
+    sub = ap.add_subparsers(dest='cmd', required=True)
+    sub.add_parser('stats', help='Hit rate and entry count')
+    pi = sub.add_parser('invalidate', help='Drop cached plans for a task')
+    pi.add_argument('task', nargs='+')
+    sub.add_parser('prune', help='Remove expired plans')
+    sub.add_parser('clear', help='Remove all cached plans')
+    args = ap.parse_args()
+    cache = get_plan_cache()
+    if args.cmd == 'stats':
+        print(json.dumps(cache.stats(), indent=2))
+    elif args.cmd == 'invalidate':
+        print(f"invalidated {cache.invalidate(' '.join(args.task))} plan(s)")
+    elif args.cmd == 'prune':
+        print(f'pruned {cache.prune()} expired plan(s)')
+    else:
+        print(f'cleared {cache.clear()} plan(s)')
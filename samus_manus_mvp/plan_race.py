@@ -0,0 +1,137 @@
+"""Racing planner — the deterministic plan is ready at once, the LLM gets a deadline.
+
+- `race(llm, fallback, deadline, preempt_after)` starts the LLM request in a worker thread,
+  builds the fallback plan right away and takes the best plan available when time is up:
+  the LLM plan if it has arrived (and validated), otherwise the fallback plan.
+- The fallback may pre-empt the LLM before the deadline, after `preempt_after` seconds.
+  `RacePolicy` decides when: rules from `plan_race.json` match the task text with exact values,
+  globs (`Take a *`) or regexes (`re:^open `), first hit wins. Without a matching rule a
+  specific fallback plan (a heuristic matched) pre-empts after `GRACE` seconds, while the
+  catch-all `type <task>` plan never does (it only wins at the deadline).
+- An LLM plan that arrives after the race is over goes to `on_late` (the agent caches it, so
+  the next run of the same task gets it at once).
+- Every race returns its timings: `fallback_s`, `llm_s` (None while unfinished), `waited_s`,
+  `winner` ('llm' / 'fallback') and `reason` ('llm' / 'preempted' / 'deadline' / 'llm_failed').
+  Cache and similar-plan hits never reach the race (see `samus_agent._planner_setup`).
+
+`plan_race.json` example:
+  {"rules": [
+    {"effect": "preempt", "task": "Take a *", "after": 0},
+    {"effect": "wait", "task": "re:(?i).* then "}
+  ]}
+
+Usage:
+  SAMUS_PLAN_RACE=1 SAMUS_PLAN_DEADLINE=6 python samus_manus_mvp/samus_agent.py run "Take a screenshot"
+"""
+from pathlib import Path
+import json
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+try:
+    from approval_policy import _compile
+except Exception:
+    from samus_manus_mvp.approval_policy import _compile
+
+BASE = Path(__file__).parent
+RACE_POLICY_PATH = BASE / 'plan_race.json'
+DEADLINE = float(os.getenv('SAMUS_PLAN_DEADLINE', '8'))
+GRACE = float(os.getenv('SAMUS_PLAN_GRACE', '1.5'))
+
+
+def is_generic(task: str, plan: List[Dict[str, Any]]) -> bool:
+    """True for the fallback planner's catch-all plan (`type <task>`, `done`)."""
+    return plan == [{'type': 'type', 'text': task}, {'type': 'done'}]
+
+
+class RacePolicy:
+    def __init__(self, rules: Optional[List[Dict[str, Any]]] = None, grace: float = None):
+        self.grace = GRACE if grace is None else grace
+        self._rules: List[Tuple[Tuple[str, Any], Optional[float]]] = []
+        for rule in rules or []:
+            self.add_rule(rule)
+
+    def add_rule(self, rule: Dict[str, Any]):
+        effect = str(rule.get('effect', 'preempt')).lower()
+        if effect not in ('preempt', 'wait'):
+            raise ValueError(f'unknown race effect: {effect}')
+        if rule.get('task') is None:
+            raise ValueError('race rule needs a `task`')
+        after = float(rule.get('after', self.grace)) if effect == 'preempt' else None
+        self._rules.append((_compile(str(rule['task'])), after))
+
+    def preempt_after(self, task: str, plan: List[Dict[str, Any]]) -> Optional[float]:
+        """Seconds after which `plan` (the fallback) may pre-empt the LLM; None to wait for the deadline."""
+        for (kind, value), after in self._rules:
+            if (task == value) if kind == 'exact' else value.match(task):
+                return after
+        return None if is_generic(task, plan) else self.grace
+
+
+def load_race_policy(path: Path = None, grace: float = None) -> RacePolicy:
+    path = Path(path) if path else RACE_POLICY_PATH
+    rules = []
+    if path.exists():
+        try:
+            data = json.loads(path.read_text(encoding='utf-8'))
+            rules = data.get('rules', []) if isinstance(data, dict) else []
+        except Exception:
+            rules = []
+    policy = RacePolicy(grace=grace)
+    for rule in rules:
+        try:
+            policy.add_rule(rule)
+        except Exception:
+            continue
+    return policy
+
+
+def race(llm: Callable[[], Optional[List[Dict[str, Any]]]], fallback: Callable[[], List[Dict[str, Any]]],
+         deadline: float = None, preempt_after: Callable[[List[Dict[str, Any]]], Optional[float]] = None,
+         on_late: Callable[[List[Dict[str, Any]]], None] = None) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    """`(plan, timings)`. `llm()` returns a valid plan or None; `preempt_after(fallback plan)` as in RacePolicy."""
+    deadline = DEADLINE if deadline is None else deadline
+    start = time.perf_counter()
+    done = threading.Event()
+    lock = threading.Lock()
+    box: Dict[str, Any] = {'plan': None, 'llm_s': None, 'finished': False, 'late': False}
+
+    def run_llm():
+        t0 = time.perf_counter()
+        try:
+            plan = llm()
+        except Exception:
+            plan = None
+        with lock:
+            box['plan'], box['llm_s'], box['finished'] = plan, time.perf_counter() - t0, True
+            late = box['late']
+        done.set()
+        if late and plan and on_late is not None:
+            try:
+                on_late(plan)
+            except Exception:
+                pass
+
+    threading.Thread(target=run_llm, name='plan-race', daemon=True).start()
+    t0 = time.perf_counter()
+    plan = fallback()
+    fallback_s = time.perf_counter() - t0
+
+    after = preempt_after(plan) if preempt_after is not None else None
+    limit = deadline if after is None else min(deadline, after)
+    done.wait(max(0.0, limit - (time.perf_counter() - start)))
+    with lock:
+        finished = box['finished']
+        if not finished:
+            box['late'] = True
+        llm_plan, llm_s = box['plan'], box['llm_s']
+    if finished and llm_plan:
+        winner, reason, plan = 'llm', 'llm', llm_plan
+    elif finished:
+        winner, reason = 'fallback', 'llm_failed'
+    else:
+        winner, reason = 'fallback', 'preempted' if after is not None and after < deadline else 'deadline'
+    return plan, {'winner': winner, 'reason': reason, 'fallback_s': fallback_s, 'llm_s': llm_s,
+                  'waited_s': time.perf_counter() - start, 'deadline': deadline, 'preempt_after': after}
@@ -0,0 +1,291 @@
+"""Reuse previously successful plans for similar tasks (before asking the LLM planner).
+
+- A task is split into a template and its parameters: URLs / domains, quoted text
+  (`click 'More information...'`) and typed text (`type hello in Notepad`).
+  `Open example.com and click 'Sign in'` -> `open <url> and click <quoted>`.
+- The library holds (task, plan) pairs from memory: `plan` records whose task later
+  reached `task_result: done` (agent runs; heartbeat bookkeeping rows don't count).
+- A new task reuses the plan of the newest past task with the same template: the same words
+  outside the parameters and the same parameter kinds. A task that differs in any other word
+  ("delete every column" vs "delete every row") never reuses a plan. The old plan is adapted
+  by substituting the old parameter values with the new ones in its parameter fields
+  (`PARAM_FIELDS`; never `type` or `session`); a plan that mentions an old parameter in a
+  way that can't be substituted is not reused.
+- `savings_report(history)` replays a task history in order with the plans that were actually
+  run and counts how many planner calls exact caching and similar-plan reuse would have saved
+  (a run whose plan wasn't recorded can't be reused).
+
+Usage:
+  hit = find_reusable('Open example.org and click "Docs"', library_from_memory(get_memory()))
+  python samus_manus_mvp/plan_reuse.py report             # from memory (plans + results)
+  python samus_manus_mvp/plan_reuse.py report --files     # from tasks.json + approval_audit.log
+"""
+from pathlib import Path
+import json
+import re
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+try:
+    from samus_manus_mvp.plan_cache import normalize_task
+except Exception:
+    from plan_cache import normalize_task
+
+BASE = Path(__file__).parent
+LIBRARY_LIMIT = 500
+# action fields that carry task parameters; everything else (type, session, ...) is kept as is
+PARAM_FIELDS = frozenset({'url', 'text', 'value', 'selector', 'out'})
+
+_URL = re.compile(r'https?://\S+|\b(?:[\w-]+\.)+(?:com|org|net|io|dev|app|edu|gov|no|uk|de)\b(?:/\S*)?', re.IGNORECASE)
+_QUOTED = re.compile(r'"([^"]+)"|\'([^\']+)\'')
+_TYPED = re.compile(r'\btype\s+(.+?)(?:\s+(?:in|into)\s+[\w. -]+)?$', re.IGNORECASE)
+_WORD = re.compile(r'<\w+>|[a-z0-9]+')
+
+
+def extract(task: str) -> Tuple[str, List[Tuple[str, str]]]:
+    """`(template, [(kind, value), ...])` with parameters in order of appearance."""
+    spans = []
+    for m in _QUOTED.finditer(task):
+        spans.append((m.start(), m.end(), 'quoted', m.group(1) or m.group(2)))
+    for m in _URL.finditer(task):
+        if not any(s <= m.start() < e for s, e, _, _ in spans):
+            spans.append((m.start(), m.end(), 'url', m.group(0).rstrip('.,)')))
+    m = _TYPED.search(task)
+    if m and not any(s < m.end(1) and m.start(1) < e for s, e, _, _ in spans):
+        spans.append((m.start(1), m.end(1), 'typed', m.group(1)))
+    spans.sort()
+    template, last, params = [], 0, []
+    for s, e, kind, value in spans:
+        template.append(task[last:s])
+        template.append(f' <{kind}> ')
+        params.append((kind, value))
+        last = e
+    template.append(task[last:])
+    return normalize_task(''.join(template)), params
+
+
+def template_key(template: str) -> Tuple[str, ...]:
+    """The template's words and parameter slots, in order (punctuation and spacing ignored)."""
+    return tuple(_WORD.findall(template))
+
+
+def adapt(plan: List[Dict[str, Any]], old_task: str, old_params, new_task: str, new_params) -> Optional[List[Dict[str, Any]]]:
+    """Old plan with old parameter values replaced by the new ones; None if it can't be done safely."""
+    params = [(o, n) for (_, o), (_, n) in zip(old_params, new_params) if o != n]
+    swaps = params + ([(old_task, new_task)] if old_task != new_task else [])
+    swaps.sort(key=lambda p: -len(p[0]))  # longest first, so a task text wins over a part of it
+    used = set()
+    out = []
+    for action in plan:
+        new_action = {}
+        for key, value in action.items():
+            if key in PARAM_FIELDS and isinstance(value, str):
+                for old, new in swaps:
+                    if old not in value:
+                        continue
+                    value = new if value == old else value.replace(old, new)
+                    used.add(old)
+                    if old == old_task:
+                        # parameters inside a verbatim copy of the task were swapped with it
+                        used.update(o for o, _ in params if o in old_task)
+                    if value == new:
+                        break
+            new_action[key] = value
+        out.append(new_action)
+    # a changed parameter the plan never mentions literally (e.g. it used a rewritten form)
+    # can't be substituted, so the old plan would still do the old thing
+    if any(old not in used for old, _ in params):
+        return None
+    return out
+
+
+class PlanLibrary:
+    """Successful (task, plan) pairs, newest first, one per normalized task."""
+
+    def __init__(self, entries: Iterable[Tuple[str, List[Dict[str, Any]]]] = ()):
+        self.entries: List[Dict[str, Any]] = []
+        self._seen = set()
+        for task, plan in entries:
+            self.add(task, plan)
+
+    def add(self, task: str, plan: List[Dict[str, Any]], front: bool = False):
+        norm = normalize_task(task)
+        if norm in self._seen or not plan:
+            return
+        self._seen.add(norm)
+        template, params = extract(task)
+        entry = {'task': task, 'norm': norm, 'plan': plan, 'template': template, 'key': template_key(template),
+                 'params': params}
+        if front:
+            self.entries.insert(0, entry)
+        else:
+            self.entries.append(entry)
+
+    def __contains__(self, task: str) -> bool:
+        return normalize_task(task) in self._seen
+
+    def __len__(self):
+        return len(self.entries)
+
+
+def find_reusable(task: str, library: PlanLibrary) -> Optional[Dict[str, Any]]:
+    """`{'plan', 'source'}` for the newest past plan with the same template, or None."""
+    template, params = extract(task)
+    key = template_key(template)
+    kinds = [k for k, _ in params]
+    e = next((e for e in library.entries if e['key'] == key and [k for k, _ in e['params']] == kinds), None)
+    if e is None:
+        return None
+    plan = adapt(e['plan'], e['task'], e['params'], task, params)
+    if plan is None:
+        return None
+    return {'plan': plan, 'source': e['task']}
+
+
+# ---- library from memory (rebuilt only after new plans / results are stored) ----
+
+_LIBRARIES: Dict[int, Dict[str, Any]] = {}
+_LIB_LOCK = threading.Lock()
+
+
+def _successful_plans(mem, limit: int = LIBRARY_LIMIT):
+    done_at: Dict[str, float] = {}
+    for r in mem.by_type('task_result', limit * 2):
+        md = r.get('metadata') or {}
+        if r.get('text') == 'done' and md.get('task') and md.get('source') != 'heartbeat':
+            done_at[md['task']] = max(done_at.get(md['task'], 0.0), r.get('created_at') or 0.0)
+    for r in mem.by_type('plan', limit):  # newest first
+        task = (r.get('metadata') or {}).get('task')
+        if not task or done_at.get(task, -1.0) < (r.get('created_at') or 0.0):
+            continue
+        try:
+            plan = json.loads(r.get('text') or '[]')
+        except Exception:
+            continue
+        if isinstance(plan, list) and plan:
+            yield task, plan
+
+
+def library_from_memory(mem, limit: int = LIBRARY_LIMIT) -> PlanLibrary:
+    with _LIB_LOCK:
+        slot = _LIBRARIES.get(id(mem))
+        if slot is None or slot['mem'] is not mem:
+            slot = _LIBRARIES[id(mem)] = {'mem': mem, 'lib': None}
+
+            def on_add(record, slot=slot):
+                if record.get('type') in ('plan', 'task_result'):
+                    slot['lib'] = None
+
+            try:
+                mem.subscribe(on_add)
+            except Exception:
+                pass
+        if slot['lib'] is None:
+            slot['lib'] = PlanLibrary(_successful_plans(mem, limit))
+        return slot['lib']
+
+
+# ---- savings report ----
+
+def history_from_memory(mem, limit: int = 5000) -> List[Tuple[str, bool, Optional[List[Dict[str, Any]]]]]:
+    """`(task, succeeded, plan)` per planned run, oldest first."""
+    done = {}
+    for r in mem.by_type('task_result', limit):
+        md = r.get('metadata') or {}
+        if r.get('text') == 'done' and md.get('source') != 'heartbeat':
+            done.setdefault(md.get('task'), []).append(r.get('created_at') or 0.0)
+    runs = []
+    plans = sorted(mem.by_type('plan', limit), key=lambda r: r.get('created_at') or 0.0)
+    for i, r in enumerate(plans):
+        task = (r.get('metadata') or {}).get('task')
+        if not task:
+            continue
+        start = r.get('created_at') or 0.0
+        end = next((p.get('created_at') for p in plans[i + 1:] if (p.get('metadata') or {}).get('task') == task), float('inf'))
+        try:
+            plan = json.loads(r.get('text') or '[]')
+        except Exception:
+            plan = None
+        runs.append((task, any(start <= ts < end for ts in done.get(task, [])), plan if isinstance(plan, list) else None))
+    return runs
+
+
+def history_from_files(tasks_path: Path, audit_path: Path) -> List[Tuple[str, bool, Optional[List[Dict[str, Any]]]]]:
+    """Runs recorded in tasks.json (finished tasks, with their `actions` if any) and the approval
+    audit log (one run per step sequence, its plan rebuilt from the approved actions)."""
+    events = []
+    try:
+        data = json.loads(Path(tasks_path).read_text(encoding='utf-8'))
+        for t in data.get('tasks', []) if isinstance(data, dict) else data:
+            if t.get('task') and t.get('completed_at'):
+                plan = t.get('actions') if isinstance(t.get('actions'), list) else None
+                events.append((float(t['completed_at']), t['task'], t.get('status') == 'done', plan))
+    except Exception:
+        pass
+    try:
+        prev = None
+        with open(audit_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    a = json.loads(line)
+                except Exception:
+                    continue
+                step = int(a.get('step') or 0)
+                if prev is None or a.get('task') != prev[0] or step <= prev[1]:
+                    events.append((float(a.get('ts') or 0), a.get('task') or '', True, []))
+                if isinstance(a.get('action'), dict) and str(a.get('answer') or '').lower() in ('y', 'yes'):
+                    events[-1][3].append(a['action'])
+                prev = (a.get('task'), step)
+    except Exception:
+        pass
+    return [(task, ok, plan or None) for _, task, ok, plan in sorted(events, key=lambda e: e[0]) if task]
+
+
+def savings_report(history: Iterable[Tuple[str, bool, Optional[List[Dict[str, Any]]]]]) -> Dict[str, Any]:
+    """Replay `(task, succeeded, plan)` runs in order; each run reuses only plans that succeeded before it.
+
+    Counts `exact` (plan cache would hit), `adapted` (the stored plan adapts to the task) and `llm`
+    (planner needed). Runs that failed, or whose plan wasn't recorded, aren't added to the library.
+    """
+    lib = PlanLibrary()
+    out = {'runs': 0, 'exact': 0, 'adapted': 0, 'llm': 0, 'examples': []}
+    for task, ok, plan in history:
+        out['runs'] += 1
+        if task in lib:
+            out['exact'] += 1
+        else:
+            hit = find_reusable(task, lib)
+            if hit is not None:
+                out['adapted'] += 1
+                if len(out['examples']) < 5:
+                    out['examples'].append((task, hit['source']))
+            else:
+                out['llm'] += 1
+        if ok and plan:
+            lib.add(task, plan, front=True)
+    out['saved'] = out['exact'] + out['adapted']
+    out['saved_pct'] = 100.0 * out['saved'] / out['runs'] if out['runs'] else 0.0
+    return out
+
+
+if __name__ == '__main__':
+    import argparse
+
+    ap = argparse.ArgumentParser(prog='plan_reuse', description='Similar-plan reuse')
+    sub = ap.add_subparsers(dest='cmd', required=True)
+    rp = sub.add_parser('report', help='Planner calls saved on the recorded task history')
+    rp.add_argument('--files', action='store_true', help='Use tasks.json + approval_audit.log instead of memory')
+    args = ap.parse_args()
+    if args.files:
+        history = history_from_files(BASE / 'tasks.json', BASE / 'approval_audit.log')
+    else:
+        try:
+            from samus_manus_mvp.memory import get_memory
+        except Exception:
+            from memory import get_memory
+        history = history_from_memory(get_memory())
+    r = savings_report(history)
+    print(f"runs: {r['runs']}  exact-cache: {r['exact']}  adapted: {r['adapted']}  planner calls: {r['llm']}  "
+          f"saved: {r['saved']} ({r['saved_pct']:.0f}%)")
+    for task, source in r['examples']:
+        print(f'  {task!r} <- {source!r}')
@@ -0,0 +1,129 @@
+"""Retrieval engine — query knowledge sources in parallel and fuse their rankings.
+
+- Each `Source` is a callable `fn(query, top_k) -> [(score, item), ...]` with a weight and
+  its own timeout. Sources run concurrently on a shared thread pool; a source that misses
+  its timeout (or the engine-wide latency budget) is dropped from this query's results.
+- Scores from different sources aren't comparable (cosine vs BM25 vs constants), so fusion
+  is rank-based by default (Reciprocal Rank Fusion); `fusion='weighted'` min-max normalizes
+  each source's scores to [0, 1] and sums `weight * score` instead.
+- Every fused hit keeps provenance: which sources returned it and at what rank.
+  Sources with weight 0 are fetched (and timed) but left out of the fused list.
+
+Example:
+  engine = RetrievalEngine([Source('memory', mem_fn), Source('approvals', audit_fn, weight=0.5)])
+  out = engine.search('screenshot', top_k=5)
+  out['results'][0] -> {'score', 'text', 'item', 'sources': {'memory': 1}}
+  out['stats']['approvals'] -> {'ok': True, 'elapsed': 0.004, 'count': 3}
+"""
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+RRF_K = 60
+DEFAULT_BUDGET = 1.0
+
+_POOL = None
+_POOL_LOCK = threading.Lock()
+
+
+def _pool() -> ThreadPoolExecutor:
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is None:
+            _POOL = ThreadPoolExecutor(max_workers=8, thread_name_prefix='retrieval')
+    return _POOL
+
+
+class Source:
+    def __init__(self, name: str, fn: Callable[[str, int], List[Tuple[float, Any]]],
+                 weight: float = 1.0, timeout: Optional[float] = None,
+                 key: Optional[Callable[[Any], Any]] = None, text: Optional[Callable[[Any], str]] = None):
+        self.name = name
+        self.fn = fn
+        self.weight = weight
+        self.timeout = timeout
+        self.text = text or (lambda item: str(item.get('text') or '') if isinstance(item, dict) else str(item))
+        # identity used to merge the same item returned by several sources (default: its text)
+        self.key = key or (lambda item: self.text(item).strip().lower())
+
+
+def _normalize(scored: List[Tuple[float, Any]]) -> List[float]:
+    if not scored:
+        return []
+    vals = [float(s) for s, _ in scored]
+    lo, hi = min(vals), max(vals)
+    if hi - lo < 1e-12:
+        return [1.0] * len(vals)
+    return [(v - lo) / (hi - lo) for v in vals]
+
+
+def fuse(ranked: Dict[str, List[Tuple[float, Any]]], sources: Dict[str, Source],
+         fusion: str = 'rrf', top_k: int = 10) -> List[Dict[str, Any]]:
+    """Fuse per-source rankings (each best-first) into one list with provenance."""
+    merged: Dict[Any, Dict[str, Any]] = {}
+    for name, scored in ranked.items():
+        src = sources[name]
+        if src.weight <= 0:
+            continue
+        norm = _normalize(scored) if fusion == 'weighted' else None
+        for rank, (score, item) in enumerate(scored, start=1):
+            try:
+                key = src.key(item)
+            except Exception:
+                key = None
+            if not key:
+                key = (name, rank)
+            if fusion == 'weighted':
+                contrib = src.weight * norm[rank - 1]
+            else:
+                contrib = src.weight / (RRF_K + rank)
+            hit = merged.get(key)
+            if hit is None:
+                hit = merged[key] = {'score': 0.0, 'text': src.text(item), 'item': item, 'sources': {}}
+            hit['score'] += contrib
+            hit['sources'][name] = rank
+    out = sorted(merged.values(), key=lambda h: h['score'], reverse=True)
+    return out[:top_k]
+
+
+class RetrievalEngine:
+    def __init__(self, sources: List[Source], budget: float = DEFAULT_BUDGET, fusion: str = 'rrf'):
+        if fusion not in ('rrf', 'weighted'):
+            raise ValueError(f'unknown fusion method: {fusion}')
+        self.sources = {s.name: s for s in sources}
+        self.budget = budget
+        self.fusion = fusion
+
+    def search(self, query: str, top_k: int = 5, budget: Optional[float] = None) -> Dict[str, Any]:
+        """Run all sources concurrently; return `{'results', 'ranked', 'stats'}`.
+
+        `ranked` holds each source's own (score, item) list, `results` the fused list.
+        """
+        budget = self.budget if budget is None else budget
+        start = time.monotonic()
+        pool = _pool()
+
+        def timed(src: Source):
+            t0 = time.monotonic()
+            res = src.fn(query, top_k)
+            return list(res or []), time.monotonic() - t0
+
+        futures = {name: pool.submit(timed, src) for name, src in self.sources.items()}
+        ranked: Dict[str, List[Tuple[float, Any]]] = {}
+        stats: Dict[str, Dict[str, Any]] = {}
+        for name, fut in futures.items():
+            src = self.sources[name]
+            limit = budget if src.timeout is None else min(budget, src.timeout)
+            remaining = max(0.0, limit - (time.monotonic() - start))
+            try:
+                res, elapsed = fut.result(timeout=remaining)
+                ranked[name] = res
+                stats[name] = {'ok': True, 'elapsed': elapsed, 'count': len(res)}
+            except FutureTimeout:
+                fut.cancel()
+                stats[name] = {'ok': False, 'elapsed': time.monotonic() - start, 'error': 'timeout'}
+            except Exception as e:
+                stats[name] = {'ok': False, 'elapsed': time.monotonic() - start, 'error': str(e)}
+        results = fuse(ranked, self.sources, fusion=self.fusion, top_k=top_k)
+        return {'results': results, 'ranked': ranked, 'stats': stats, 'elapsed': time.monotonic() - start}
@@ -8,13 +8,18 @@ Samus‑Manus — minimal local agent MVP (safe defaults).
 Usage:
   python samus_agent.py run "Install dependencies and take a screenshot"
   python samus_agent.py run "Open Notepad and type hello" --apply
+  python samus_agent.py run "Open example.com and take a screenshot" --stream
+  python samus_agent.py run "Take a screenshot" --race
 """
 import os
 import re
 import json
 import time
+import hashlib
 import argparse
 import logging
+import queue
+import threading
 
 try:
     import openai
@@ -41,46 +46,109 @@ except Exception:
     except Exception:
         WebHands = None
 
+AUDIT_PATH = os.path.join(os.path.dirname(__file__), 'approval_audit.log')
+
 # simple global sessions for WebHands instances (keyed by session name)
 WEB_HANDS_SESSIONS = {}
+# pre-launched headless browsers (filled by warm workers, see agent_pool.py)
+WEB_HANDS_WARM = []
+# sessions a caller keeps open across tasks (heartbeat task graphs); `done` leaves them alone
+WEB_HANDS_KEEP = set()
 
-# optional persistent memory (if present)
+# optional persistent memory (if present); the package module first — a bare `memory` may be
+# the legacy repo-root module, which ignores SAMUS_MEMORY_DB
 try:
-    from memory import get_memory
+    from samus_manus_mvp.memory import get_memory
 except Exception:
     try:
-        from samus_manus_mvp.memory import get_memory
+        from memory import get_memory
     except Exception:
         get_memory = None
 
+try:
+    from approval_policy import load_policy
+except Exception:
+    from samus_manus_mvp.approval_policy import load_policy
+
+try:
+    from context_pack import planner_context
+except Exception:
+    from samus_manus_mvp.context_pack import planner_context
+
+try:
+    from action_parser import ACTION_SCHEMA, ActionStreamParser, errors_only, parse_plan, scan_actions, validate_actions
+except Exception:
+    from samus_manus_mvp.action_parser import (ACTION_SCHEMA, ActionStreamParser, errors_only, parse_plan,
+                                               scan_actions, validate_actions)
+
+try:
+    from action_registry import (Click, Done, DoubleClick, FindClick, Hotkey, PLUGIN_DOCS, Press, Screenshot, Type, Wait,
+                                 WaitChange, WaitImage, WaitSettle, WebClick, WebClickText, WebClose, WebFill, WebOpen,
+                                 WebScreenshot, WebWait, compile_plan, dispatch, load_plugins, register_action)
+except Exception:
+    from samus_manus_mvp.action_registry import (Click, Done, DoubleClick, FindClick, Hotkey, PLUGIN_DOCS, Press,
+                                                 Screenshot, Type, Wait, WaitChange, WaitImage, WaitSettle, WebClick,
+                                                 WebClickText, WebClose, WebFill, WebOpen, WebScreenshot, WebWait,
+                                                 compile_plan, dispatch, load_plugins, register_action)
+
+try:
+    import smart_wait
+except Exception:
+    from samus_manus_mvp import smart_wait
+
+try:
+    from input_batch import KeyBurst, type_text
+except Exception:
+    from samus_manus_mvp.input_batch import KeyBurst, type_text
+
+try:
+    from plan_race import DEADLINE as PLAN_DEADLINE, load_race_policy, race as race_plans
+except Exception:
+    from samus_manus_mvp.plan_race import DEADLINE as PLAN_DEADLINE, load_race_policy, race as race_plans
+
+try:
+    from plan_cache import get_plan_cache
+    from plan_reuse import find_reusable, library_from_memory
+except Exception:
+    try:
+        from samus_manus_mvp.plan_cache import get_plan_cache
+        from samus_manus_mvp.plan_reuse import find_reusable, library_from_memory
+    except Exception:
+        get_plan_cache = find_reusable = library_from_memory = None
+
+# token budget for retrieved context injected into the planner prompt
+CONTEXT_TOKENS = int(os.getenv('SAMUS_CONTEXT_TOKENS', '400'))
+PLANNER_MODEL = os.getenv('SAMUS_PLANNER_MODEL', 'gpt-4o-mini')
+# set SAMUS_PLAN_CACHE=0 to always ask the planner; SAMUS_PLAN_REUSE=0 to skip similar-plan reuse
+PLAN_CACHE_ENABLED = os.getenv('SAMUS_PLAN_CACHE', '1') != '0'
+PLAN_REUSE_ENABLED = os.getenv('SAMUS_PLAN_REUSE', '1') != '0'
+# SAMUS_PLAN_RACE=1: the fallback plan races the LLM, which gets SAMUS_PLAN_DEADLINE seconds
+PLAN_RACE_ENABLED = os.getenv('SAMUS_PLAN_RACE', '0') == '1'
+ALLOWED_ACTIONS = (
+    "click, double_click, find_click, type, press, hotkey, "
+    "screenshot (out), wait (seconds), web_open (url, session), web_click_text (text, session), "
+    "web_click (selector, session), web_fill (selector, value, session), web_screenshot (out, session), web_close (session), "
+    "wait_settle (region, timeout), wait_change (region, timeout), wait_image (img, timeout), "
+    "web_wait (selector or network idle, timeout ms, session), done. "
+    "Prefer the condition waits over fixed wait seconds"
+)
+
+
+def _schema_version() -> str:
+    return hashlib.sha256((ALLOWED_ACTIONS + json.dumps(ACTION_SCHEMA, sort_keys=True)).encode('utf-8')).hexdigest()[:12]
+
+
+# cached plans are only reused for the action set (and validation schema) they were planned against
+ACTION_SCHEMA_VERSION = _schema_version()
+# actions a streamed plan may run before the rest of it has arrived (cheap to undo, see _run_streamed)
+PIPELINE_SAFE = {'wait', 'wait_settle', 'wait_change', 'wait_image', 'web_wait', 'web_open', 'screenshot', 'web_screenshot'}
+
 logging.basicConfig(level=logging.INFO, format="%(message)s")
 
 
 def parse_actions(text: str) -> list[dict]:
-    """Extract a JSON array of action objects from model output (best‑effort)."""
-    # try to find JSON array in code block or raw
-    m = re.search(r'```(?:json)?\s*(\[[\s\S]*?\])\s*```', text)
-    if m:
-        try:
-            return json.loads(m.group(1))
-        except Exception:
-            pass
-    m = re.search(r'(\[[\s\S]*?\])', text)
-    if m:
-        try:
-            return json.loads(m.group(1))
-        except Exception:
-            pass
-    # fallback: find individual objects
-    actions = []
-    for match in re.finditer(r'\{[^{}]+\}', text):
-        try:
-            obj = json.loads(match.group())
-            if "type" in obj:
-                actions.append(obj)
-        except Exception:
-            continue
-    return actions
+    """Extract the action objects from model output (single pass, see action_parser.py)."""
+    return scan_actions(text)[0]
 
 
 def fallback_plan(task: str) -> list[dict]:
@@ -89,7 +157,7 @@ def fallback_plan(task: str) -> list[dict]:
     # simple heuristics
     ltask = task.lower()
     if "screenshot" in ltask:
-        actions.append({"type": "wait", "seconds": 0.5})
+        actions.append({"type": "wait_settle", "timeout": 2.0})
         actions.append({"type": "screenshot", "out": "samus_screenshot.png"})
     if "open" in ltask and "notepad" in ltask:
         actions.append({"type": "press", "key": "win"})
@@ -102,12 +170,12 @@ def fallback_plan(task: str) -> list[dict]:
         url = m.group(1) if m else task
         if not url.startswith('http'):
             url = 'https://' + url
+        # web_open already waits for network idle; a click may start a navigation, so wait for it
         actions.append({"type": "web_open", "url": url, "session": "demo"})
-        actions.append({"type": "wait", "seconds": 0.5})
         mclick = re.search(r'click\s+[\'\"]([^\'\"]+)[\'\"]', task, re.IGNORECASE)
         if mclick:
             actions.append({"type": "web_click_text", "text": mclick.group(1), "session": "demo"})
-            actions.append({"type": "wait", "seconds": 0.3})
+            actions.append({"type": "web_wait", "session": "demo", "timeout": 5000})
         actions.append({"type": "web_screenshot", "out": "webhands.png", "session": "demo"})
 
     if not actions:
@@ -116,12 +184,8 @@ def fallback_plan(task: str) -> list[dict]:
     return actions
 
 
-def plan_with_openai(task: str) -> list[dict]:
-    api_key = os.getenv("OPENAI_API_KEY")
-    if not openai or not api_key:
-        return fallback_plan(task)
-
-    openai.api_key = api_key
+def _planner_setup(task: str, use_cache: bool = True):
+    """`(persona, cache, plan)` for a planner call; `plan` is a cached or adapted plan, else None."""
     # try to include a persistent persona from memory (if available)
     persona_text = None
     try:
@@ -133,33 +197,187 @@ def plan_with_openai(task: str) -> list[dict]:
     except Exception:
         persona_text = None
 
+    cache = None
+    if use_cache and PLAN_CACHE_ENABLED and get_plan_cache is not None:
+        try:
+            cache = get_plan_cache()
+            cached = cache.get(task, persona=persona_text, model=PLANNER_MODEL, schema=ACTION_SCHEMA_VERSION)
+            if cached:
+                return persona_text, cache, cached
+        except Exception as e:
+            logging.info("Plan cache unavailable: %s", e)
+            cache = None
+
+    # a similar past task that succeeded: adapt its plan (new URL / quoted / typed text) instead
+    if use_cache and PLAN_REUSE_ENABLED and find_reusable is not None and get_memory is not None:
+        try:
+            hit = find_reusable(task, library_from_memory(get_memory()))
+            errors = errors_only(validate_actions(hit['plan'])) if hit else []
+            if errors:
+                logging.info("Adapted plan of %r rejected: %s", hit['source'], '; '.join(p['message'] for p in errors))
+            elif hit:
+                logging.info("Reusing plan of %r", hit['source'])
+                if cache is not None:
+                    cache.put(task, hit['plan'], persona=persona_text, model=PLANNER_MODEL, schema=ACTION_SCHEMA_VERSION)
+                return persona_text, cache, hit['plan']
+        except Exception as e:
+            logging.info("Plan reuse skipped: %s", e)
+    return persona_text, cache, None
+
+
+def _planner_prompt(task: str, persona_text: str | None) -> str:
+    # bounded retrieval context (fused memory + approvals, packed into a token budget)
+    context_text = ''
+    try:
+        context_text = planner_context(task, budget=CONTEXT_TOKENS, persona=persona_text).get('text') or ''
+    except Exception as e:
+        logging.info("Context packing skipped: %s", e)
+
     prompt = ""
     if persona_text:
         prompt += f"Persona: {persona_text}\n\n"
+    if context_text:
+        prompt += f"Relevant context (from memory and past approvals):\n{context_text}\n\n"
     prompt += (
         "You are a safe local agent planner. Break the user's task into a short JSON array "
-        "of low‑level actions. Allowed actions: click, double_click, find_click, type, press, hotkey, "
-        "screenshot (out), wait (seconds), web_open (url, session), web_click_text (text, session), "
-        "web_click (selector, session), web_fill (selector, value, session), web_screenshot (out, session), web_close (session), done. "
+        f"of low‑level actions. Allowed actions: {ALLOWED_ACTIONS}. "
         "Return ONLY a JSON array.\nTask: "
         + task
     )
+    return prompt
+
+
+def _cache_plan(cache, task: str, actions: list[dict], persona_text: str | None):
+    if cache is not None:
+        try:
+            cache.put(task, actions, persona=persona_text, model=PLANNER_MODEL, schema=ACTION_SCHEMA_VERSION)
+        except Exception:
+            pass
+
+
+def _llm_plan(task: str, persona_text: str | None) -> list[dict] | None:
+    """One planner request; None when it fails or the plan doesn't validate."""
+    prompt = _planner_prompt(task, persona_text)
     try:
         resp = openai.ChatCompletion.create(
-            model="gpt-4o-mini",
+            model=PLANNER_MODEL,
             messages=[{"role": "user", "content": prompt}],
             max_tokens=400,
             temperature=0.0,
         )
         text = resp.choices[0].message.content
-        actions = parse_actions(text)
-        if actions:
+        actions, problems = parse_plan(text)
+        errors = errors_only(problems)
+        if not errors:
             return actions
+        # a plan that doesn't validate is neither run nor cached
+        logging.info("Planner output rejected: %s", '; '.join(p['message'] for p in errors))
     except Exception as e:
         logging.info("OpenAI plan failed — falling back: %s", e)
+    return None
+
+
+def plan_with_openai(task: str, use_cache: bool = True, race: bool | None = None) -> list[dict]:
+    """LLM plan for `task` (cached, see plan_cache.py); the fallback planner without an API key.
+
+    With `race` (default: the SAMUS_PLAN_RACE setting, off unless set to 1) the fallback plan races
+    the LLM, see plan_race.py.
+    """
+    api_key = os.getenv("OPENAI_API_KEY")
+    if not openai or not api_key:
+        return fallback_plan(task)
+
+    openai.api_key = api_key
+    persona_text, cache, ready = _planner_setup(task, use_cache)
+    if ready:
+        return ready
+    if PLAN_RACE_ENABLED if race is None else race:
+        return _raced_plan(task, persona_text, cache)
+    actions = _llm_plan(task, persona_text)
+    if actions:
+        _cache_plan(cache, task, actions, persona_text)
+        return actions
     return fallback_plan(task)
 
 
+def _raced_plan(task: str, persona_text: str | None, cache) -> list[dict]:
+    policy = load_race_policy()
+    actions, timing = race_plans(
+        lambda: _llm_plan(task, persona_text),
+        lambda: fallback_plan(task),
+        deadline=PLAN_DEADLINE,
+        preempt_after=lambda plan: policy.preempt_after(task, plan),
+        # an LLM plan that loses the race still serves the next run of the task
+        on_late=lambda plan: _cache_plan(cache, task, plan, persona_text),
+    )
+    if timing['winner'] == 'llm':
+        _cache_plan(cache, task, actions, persona_text)
+    logging.info("Plan race: %s (%s) after %.2fs", timing['winner'], timing['reason'], timing['waited_s'])
+    try:
+        if get_memory is not None:
+            get_memory().add('plan_race', timing['winner'], metadata=dict(timing, task=task))
+    except Exception:
+        pass
+    return actions
+
+
+def _delta_text(chunk) -> str:
+    """Text of one streamed ChatCompletion chunk (dict-style or attribute-style deltas)."""
+    try:
+        delta = chunk.choices[0].delta
+    except Exception:
+        return ''
+    text = delta.get('content') if isinstance(delta, dict) else getattr(delta, 'content', None)
+    return text or ''
+
+
+def plan_stream(task: str, use_cache: bool = True):
+    """Yield the plan's actions as each one is complete in the streamed model reply.
+
+    Cached / reused / fallback plans are yielded at once. If the stream breaks or the finished
+    plan fails validation after actions were yielded, raises ValueError — the caller undoes
+    what it already ran (see `_run_streamed`); before the first action it falls back quietly.
+    """
+    api_key = os.getenv("OPENAI_API_KEY")
+    if not openai or not api_key:
+        yield from fallback_plan(task)
+        return
+
+    openai.api_key = api_key
+    persona_text, cache, ready = _planner_setup(task, use_cache)
+    if ready:
+        yield from ready
+        return
+    parser = ActionStreamParser()
+    try:
+        chunks = openai.ChatCompletion.create(
+            model=PLANNER_MODEL,
+            messages=[{"role": "user", "content": _planner_prompt(task, persona_text)}],
+            max_tokens=400,
+            temperature=0.0,
+            stream=True,
+        )
+        for chunk in chunks:
+            yield from parser.feed(_delta_text(chunk))
+            if parser.closed:
+                break
+        yield from parser.finish()  # loose action objects (no array) arrive only at the end
+    except Exception as e:
+        if parser.plan:
+            raise ValueError(f"plan stream failed: {e}")
+        logging.info("OpenAI plan stream failed — falling back: %s", e)
+        yield from fallback_plan(task)
+        return
+    problems = [p['message'] for p in errors_only(parser.errors + validate_actions(parser.plan))]
+    if problems:
+        if parser.plan:
+            raise ValueError('invalid plan: ' + '; '.join(problems))
+        logging.info("Streamed plan unusable — falling back: %s", '; '.join(problems))
+        yield from fallback_plan(task)
+        return
+    _cache_plan(cache, task, parser.plan, persona_text)
+
+
 # optional eyes helpers (capture/find). Provide safe fallbacks if unavailable
 try:
     # prefer local module import
@@ -173,228 +391,438 @@ except Exception:
         def find_on_screen(img, confidence=0.8, timeout=3.0):
             return None
 
-def execute_action(action: dict, apply: bool) -> str:
-    t = action.get("type")
-    if t == "wait":
-        s = float(action.get("seconds", 1))
-        time.sleep(s)
-        return f"waited {s}s"
+def execute_action(action, apply: bool) -> str:
+    """Run one action (a plan dict or a compiled typed action, see action_registry.py)."""
+    return dispatch(action, apply)
 
-    if t == "screenshot":
-        out = action.get("out", "screen.png")
-        # prefer eyes.capture_screenshot when available
-        try:
-            path = capture_screenshot(out)
-            return f"screenshot saved {path}"
-        except Exception:
-            if apply and pyautogui:
-                pyautogui.screenshot(out)
-                return f"screenshot saved {out}"
-            return f"(sim) screenshot -> {out}"
-
-    if t == "click":
-        x = action.get("x")
-        y = action.get("y")
-        button = action.get("button", "left")
-        if x is None or y is None:
-            return "click: missing coordinates"
-        if apply and pyautogui:
-            pyautogui.click(int(x), int(y), button=button)
-            return f"clicked at ({x},{y})"
-        return f"(sim) click at ({x},{y})"
-
-    if t == "double_click":
-        x = action.get("x")
-        y = action.get("y")
-        if x is None or y is None:
-            return "double_click: missing coordinates"
-        if apply and pyautogui:
-            pyautogui.doubleClick(int(x), int(y))
-            return f"double-clicked at ({x},{y})"
-        return f"(sim) double-click at ({x},{y})"
-
-    if t == "find_click" or t == "find-click":
-        img = action.get("img")
-        confidence = action.get("confidence", 0.8)
-        timeout = action.get("timeout", 3.0)
-        button = action.get("button", "left")
-        if not img:
-            return "find_click: missing img path"
-        pos = find_on_screen(img, confidence=confidence, timeout=timeout)
-        if not pos:
-            return f"image not found: {img}"
-        x, y = pos
+
+def _wait(a: Wait, apply: bool) -> str:
+    time.sleep(a.seconds)
+    return f"waited {a.seconds}s"
+
+
+def _wait_settle(a: WaitSettle, apply: bool) -> str:
+    # screen waits only matter when the plan drives the real UI
+    if not (apply and pyautogui):
+        return f"(sim) wait_settle {a.region or 'screen'}"
+    ok, elapsed, polls = smart_wait.wait_settle(a.region, timeout=a.timeout, stable=a.stable)
+    return f"settled after {elapsed:.2f}s ({polls} polls)" if ok else f"wait_settle: still changing after {elapsed:.2f}s"
+
+
+def _wait_change(a: WaitChange, apply: bool) -> str:
+    if not (apply and pyautogui):
+        return f"(sim) wait_change {a.region or 'screen'}"
+    ok, elapsed, polls = smart_wait.wait_change(a.region, timeout=a.timeout, threshold=a.threshold)
+    return f"changed after {elapsed:.2f}s ({polls} polls)" if ok else f"wait_change: no change after {elapsed:.2f}s"
+
+
+def _wait_image(a: WaitImage, apply: bool) -> str:
+    if not a.img:
+        return "wait_image: missing img path"
+    if not (apply and pyautogui):
+        return f"(sim) wait_image {a.img}"
+    pos, elapsed, polls = smart_wait.wait_image(a.img, timeout=a.timeout, confidence=a.confidence)
+    return f"{a.img} at {pos} after {elapsed:.2f}s ({polls} polls)" if pos else f"image not found: {a.img}"
+
+
+def _screenshot(a: Screenshot, apply: bool) -> str:
+    # prefer eyes.capture_screenshot when available
+    try:
+        path = capture_screenshot(a.out)
+        return f"screenshot saved {path}"
+    except Exception:
         if apply and pyautogui:
-            pyautogui.click(x, y, button=button)
-            return f"found and clicked {img} at ({x},{y})"
-        return f"(sim) found {img} at ({x},{y})"
+            pyautogui.screenshot(a.out)
+            return f"screenshot saved {a.out}"
+        return f"(sim) screenshot -> {a.out}"
+
+
+def _click(a: Click, apply: bool) -> str:
+    if a.x is None or a.y is None:
+        return "click: missing coordinates"
+    if apply and pyautogui:
+        pyautogui.click(a.x, a.y, button=a.button)
+        return f"clicked at ({a.x},{a.y})"
+    return f"(sim) click at ({a.x},{a.y})"
+
+
+def _double_click(a: DoubleClick, apply: bool) -> str:
+    if a.x is None or a.y is None:
+        return "double_click: missing coordinates"
+    if apply and pyautogui:
+        pyautogui.doubleClick(a.x, a.y)
+        return f"double-clicked at ({a.x},{a.y})"
+    return f"(sim) double-click at ({a.x},{a.y})"
+
+
+def _find_click(a: FindClick, apply: bool) -> str:
+    if not a.img:
+        return "find_click: missing img path"
+    pos = find_on_screen(a.img, confidence=a.confidence, timeout=a.timeout)
+    if not pos:
+        return f"image not found: {a.img}"
+    x, y = pos
+    if apply and pyautogui:
+        pyautogui.click(x, y, button=a.button)
+        return f"found and clicked {a.img} at ({x},{y})"
+    return f"(sim) found {a.img} at ({x},{y})"
+
+
+# --- Playwright / web_hands integration ---
+def _web_open(a: WebOpen, apply: bool) -> str:
+    if WebHands is None:
+        return "web_hands not available"
+    try:
+        # an open session is reused (navigate only) instead of launching another browser
+        wh = WEB_HANDS_SESSIONS.get(a.session)
+        if wh is None:
+            wh = WEB_HANDS_WARM.pop() if (WEB_HANDS_WARM and not a.headful) else WebHands(headful=a.headful)
+            WEB_HANDS_SESSIONS[a.session] = wh
+        wh.goto(a.url)
+        return f"web_open -> {a.url}"
+    except Exception as e:
+        return f"web_open failed: {e}"
 
-    # --- Playwright / web_hands integration ---
-    if t == "web_open":
-        if WebHands is None:
-            return "web_hands not available"
-        session = action.get("session", "default")
-        headful = bool(action.get("headful", False))
-        try:
-            wh = WebHands(headful=headful)
-            WEB_HANDS_SESSIONS[session] = wh
-            wh.goto(action.get("url", "about:blank"))
-            return f"web_open -> {action.get('url')}"
-        except Exception as e:
-            return f"web_open failed: {e}"
 
-    if t == "web_click_text":
+def _in_session(handler):
+    """Web handler that needs an open session: shared availability check and session lookup."""
+    def run(a, apply: bool) -> str:
         if WebHands is None:
             return "web_hands not available"
-        session = action.get("session", "default")
-        wh = WEB_HANDS_SESSIONS.get(session)
+        wh = WEB_HANDS_SESSIONS.get(a.session)
         if not wh:
-            return "web_click_text: no active web session"
-        text = action.get("text", "")
-        success = wh.click_text(text, timeout=action.get("timeout", 5000))
-        return f"(web) clicked? {success}"
+            return f"{a.type}: no active web session"
+        return handler(a, wh)
+    return run
 
-    if t == "web_click":
-        if WebHands is None:
-            return "web_hands not available"
-        session = action.get("session", "default")
-        wh = WEB_HANDS_SESSIONS.get(session)
-        if not wh:
-            return "web_click: no active web session"
-        selector = action.get("selector", "")
-        try:
-            wh.click(selector, timeout=action.get("timeout", 5000))
-            return f"(web) clicked selector {selector}"
-        except Exception as e:
-            return f"(web) click failed: {e}"
 
-    if t == "web_fill":
-        if WebHands is None:
-            return "web_hands not available"
-        session = action.get("session", "default")
-        wh = WEB_HANDS_SESSIONS.get(session)
-        if not wh:
-            return "web_fill: no active web session"
-        selector = action.get("selector", "")
-        value = action.get("value", "")
-        try:
-            wh.fill(selector, value)
-            return f"(web) filled {selector}"
-        except Exception as e:
-            return f"(web) fill failed: {e}"
+@_in_session
+def _web_click_text(a: WebClickText, wh) -> str:
+    success = wh.click_text(a.text, timeout=a.timeout)
+    return f"(web) clicked? {success}"
 
-    if t == "web_screenshot":
-        if WebHands is None:
-            return "web_hands not available"
-        session = action.get("session", "default")
-        wh = WEB_HANDS_SESSIONS.get(session)
-        if not wh:
-            return "web_screenshot: no active web session"
-        out = action.get("out", "webhands.png")
-        try:
-            wh.screenshot(path=out)
-            return f"web screenshot saved {out}"
-        except Exception as e:
-            return f"(web) screenshot failed: {e}"
 
-    if t == "web_close":
-        if WebHands is None:
-            return "web_hands not available"
-        session = action.get("session", "default")
-        wh = WEB_HANDS_SESSIONS.pop(session, None)
-        if not wh:
-            return "web_close: no active web session"
-        try:
-            wh.close()
-            return f"web session {session} closed"
-        except Exception as e:
-            return f"(web) close failed: {e}"
+@_in_session
+def _web_click(a: WebClick, wh) -> str:
+    try:
+        wh.click(a.selector, timeout=a.timeout)
+        return f"(web) clicked selector {a.selector}"
+    except Exception as e:
+        return f"(web) click failed: {e}"
 
-    if t == "type":
-        txt = action.get("text", "")
-        if apply and pyautogui:
-            pyautogui.write(txt, interval=0.02)
-            return f"typed: {txt!r}"
-        return f"(sim) type: {txt!r}"
 
-    if t == "press":
-        key = action.get("key", "enter")
-        if apply and pyautogui:
-            pyautogui.press(key)
-            return f"pressed: {key}"
-        return f"(sim) press: {key}"
-
-    if t == "hotkey":
-        keys = action.get("keys", [])
-        if apply and pyautogui and isinstance(keys, list):
-            pyautogui.hotkey(*keys)
-            return f"hotkey: {'+'.join(keys)}"
-        return f"(sim) hotkey: {keys}"
-
-    if t == "done":
-        # close any active WebHands sessions
-        try:
-            for s, wh in list(WEB_HANDS_SESSIONS.items()):
-                try:
-                    wh.close()
-                except Exception:
-                    pass
-                WEB_HANDS_SESSIONS.pop(s, None)
-        except Exception:
-            pass
-        return "DONE"
+@_in_session
+def _web_fill(a: WebFill, wh) -> str:
+    try:
+        wh.fill(a.selector, a.value)
+        return f"(web) filled {a.selector}"
+    except Exception as e:
+        return f"(web) fill failed: {e}"
 
-    return f"Unknown action type: {t}"
+
+@_in_session
+def _web_wait(a: WebWait, wh) -> str:
+    t0 = time.perf_counter()
+    try:
+        if a.selector:
+            ok = wh.wait_for_selector(a.selector, timeout=a.timeout, state=a.state)
+        else:
+            ok = wh.wait_for_idle(timeout=a.timeout)
+    except Exception as e:
+        return f"(web) wait failed: {e}"
+    what = a.selector or 'network idle'
+    return f"(web) {what} after {time.perf_counter() - t0:.2f}s" if ok else f"(web) timed out waiting for {what}"
+
+
+@_in_session
+def _web_screenshot(a: WebScreenshot, wh) -> str:
+    try:
+        wh.screenshot(path=a.out)
+        return f"web screenshot saved {a.out}"
+    except Exception as e:
+        return f"(web) screenshot failed: {e}"
+
+
+def _web_close(a: WebClose, apply: bool) -> str:
+    if WebHands is None:
+        return "web_hands not available"
+    wh = WEB_HANDS_SESSIONS.pop(a.session, None)
+    if not wh:
+        return "web_close: no active web session"
+    try:
+        wh.close()
+        return f"web session {a.session} closed"
+    except Exception as e:
+        return f"(web) close failed: {e}"
+
+
+def _type(a: Type, apply: bool) -> str:
+    if apply and pyautogui:
+        # adaptive per-character interval; long / non-ASCII text goes through the clipboard
+        how = type_text(pyautogui, a.text)
+        return f"{how}: {a.text!r}"
+    return f"(sim) type: {a.text!r}"
 
 
-def run_task(task: str, apply: bool, approve_each: bool, max_steps: int = 20):
-    print(f"Task: {task}\n")
+def _press(a: Press, apply: bool) -> str:
+    if apply and pyautogui:
+        pyautogui.press(a.key)
+        return f"pressed: {a.key}"
+    return f"(sim) press: {a.key}"
+
+
+def _hotkey(a: Hotkey, apply: bool) -> str:
+    if apply and pyautogui and isinstance(a.keys, list):
+        pyautogui.hotkey(*a.keys)
+        return f"hotkey: {'+'.join(a.keys)}"
+    return f"(sim) hotkey: {a.keys}"
+
+
+def _done(a: Done, apply: bool) -> str:
+    # close active WebHands sessions (except ones kept open for following tasks)
+    try:
+        for s in list(WEB_HANDS_SESSIONS):
+            if s not in WEB_HANDS_KEEP:
+                close_web_session(s)
+    except Exception:
+        pass
+    return "DONE"
+
+
+for _cls, _handler, _aliases in (
+    (Wait, _wait, ()), (WaitSettle, _wait_settle, ()), (WaitChange, _wait_change, ()), (WaitImage, _wait_image, ()),
+    (Screenshot, _screenshot, ()), (Click, _click, ()), (DoubleClick, _double_click, ()),
+    (FindClick, _find_click, ('find-click',)), (WebOpen, _web_open, ()), (WebClickText, _web_click_text, ()),
+    (WebClick, _web_click, ()), (WebFill, _web_fill, ()), (WebWait, _web_wait, ()), (WebScreenshot, _web_screenshot, ()),
+    (WebClose, _web_close, ()), (Type, _type, ()), (Press, _press, ()), (Hotkey, _hotkey, ()), (Done, _done, ()),
+):
+    register_action(_cls.type, _cls, _handler, _aliases)
+
+# action plugins (SAMUS_ACTION_PLUGINS) register after the built-ins and extend the planner prompt
+if load_plugins():
+    ALLOWED_ACTIONS = ', '.join([ALLOWED_ACTIONS] + PLUGIN_DOCS)
+    ACTION_SCHEMA_VERSION = _schema_version()
+
+
+def close_web_session(session: str) -> bool:
+    """Close and forget a WebHands session; returns False if it wasn't open."""
+    WEB_HANDS_KEEP.discard(session)
+    wh = WEB_HANDS_SESSIONS.pop(session, None)
+    if wh is None:
+        return False
+    try:
+        wh.close()
+    except Exception:
+        pass
+    return True
+
+
+def bind_session(actions: list[dict], session: str) -> list[dict]:
+    """Copy of `actions` with every web action pointed at `session`."""
+    return [dict(a, session=session) if str(a.get("type", "")).startswith("web_") else a for a in actions]
+
+
+def run_task(task: str, apply: bool, approve_each: bool, max_steps: int = 20, out=None,
+             plan: list[dict] | None = None, session: str | None = None, stream: bool = False,
+             race: bool | None = None, source: str | None = None) -> dict:
+    """Plan and run `task`; returns a structured result (also printed step by step to `out`).
+
+    Result: `{'task', 'status', 'plan', 'steps'}` where `status` is `done` (planner's `done`
+    reached), `incomplete` (steps ran out / max_steps) or `no_actions`, and each step is
+    `{'step', 'action', 'approved', 'auto', 'result', 'elapsed'}`. `out` is any writable text
+    stream (default stdout) so in-process callers such as the heartbeat can capture output.
+    A precomputed `plan` skips the planner; `session` runs all web actions in that WebHands
+    session (so related tasks share one browser). `stream` starts early steps while the
+    planner is still generating (see `_run_streamed`); `race` races the fallback planner
+    against the LLM (see `plan_with_openai`). `source` tags the run's memory records
+    (`heartbeat_run`, `worker`) so unattended runs don't count as user activity (activity.py).
+    """
+    print(f"Task: {task}\n", file=out)
     # persist incoming task to memory (best-effort)
     try:
         if get_memory is not None:
-            get_memory().add('task', task, metadata={'source': 'samus_agent'})
+            get_memory().add('task', task, metadata=_tagged({}, source))
     except Exception:
         pass
 
-    actions = plan_with_openai(task)
+    if plan is None and stream:
+        policy = _compile_policy(approve_each)
+        try:
+            return _run_streamed(task, apply, approve_each, max_steps, policy, out, session, source)
+        finally:
+            if policy is not None:
+                policy.close()
+
+    if plan is None:
+        actions = plan_with_openai(task, race=race)
+        _remember_plan(task, actions, source)
+    else:
+        actions = [dict(a) for a in plan]
+    if session:
+        actions = bind_session(actions, session)
+
+    outcome = {'task': task, 'status': 'no_actions', 'plan': actions or [], 'steps': []}
+    if not actions:
+        print("No actions produced by planner.", file=out)
+        return outcome
+
+    policy = _compile_policy(approve_each)
+    try:
+        outcome['steps'], done = _run_steps(task, actions, apply, approve_each, max_steps, policy, out,
+                                            source=source)
+    finally:
+        if policy is not None:
+            policy.close()
+    outcome['status'] = 'done' if done else 'incomplete'
+    return outcome
+
+
+def _compile_policy(approve_each: bool):
+    # compile approval policy once per run (kept current through memory write hooks)
+    if not approve_each:
+        return None
+    try:
+        return load_policy(get_memory() if get_memory is not None else None)
+    except Exception:
+        return None
+
+
+def _tagged(metadata: dict, source: str | None) -> dict:
+    return dict(metadata, source=source) if source else metadata
+
+
+def _remember_plan(task: str, actions: list[dict], source: str | None = None):
     # persist produced plan
     try:
         if get_memory is not None:
-            get_memory().add('plan', json.dumps(actions), metadata={'task': task})
+            get_memory().add('plan', json.dumps(actions), metadata=_tagged({'task': task}, source))
     except Exception:
         pass
 
-    if not actions:
-        print("No actions produced by planner.")
-        return
 
-    step = 0
-    for action in actions:
+def _pipeline_safe(task: str, action: dict, approve_each: bool, policy) -> bool:
+    """May `action` run before the rest of the plan has arrived? (safe type, no approval prompt)"""
+    if not isinstance(action, dict) or action.get('type') not in PIPELINE_SAFE:
+        return False
+    if not approve_each:
+        return True
+    try:
+        return policy is not None and policy.decide(task, action) in ('y', 'yes')
+    except Exception:
+        return False
+
+
+def _undo_for(action: dict):
+    """Callable that reverts the visible effect of an early step (see `_run_streamed`)."""
+    t = action.get('type')
+    if t == 'web_open':
+        session = action.get('session', 'default')
+        if session not in WEB_HANDS_SESSIONS:
+            return lambda: close_web_session(session)
+    elif t in ('screenshot', 'web_screenshot'):
+        path = action.get('out') or ('screen.png' if t == 'screenshot' else 'webhands.png')
+        if not os.path.exists(path):
+            def remove():
+                if os.path.exists(path):
+                    os.remove(path)
+            return remove
+    return lambda: None
+
+
+def _run_streamed(task: str, apply: bool, approve_each: bool, max_steps: int, policy, out=None,
+                  session: str | None = None, source: str | None = None) -> dict:
+    """Run the plan from `plan_stream` while it is being generated.
+
+    Until the plan is complete only PIPELINE_SAFE actions that need no approval prompt run, in
+    order; the first other action holds back everything after it. If the stream fails or the
+    finished plan doesn't validate, the early steps are undone (browser sessions they opened are
+    closed, screenshots they wrote removed) and the task runs the fallback plan instead.
+    """
+    q = queue.Queue()
+
+    def produce():
+        try:
+            for action in plan_stream(task):
+                q.put(('action', action))
+            q.put(('end', None))
+        except Exception as e:
+            q.put(('error', e))
+
+    threading.Thread(target=produce, name='plan-stream', daemon=True).start()
+    actions, steps, undo, held = [], [], [], False
+    while True:
+        kind, item = q.get()
+        if kind != 'action':
+            break
+        action = bind_session([item], session)[0] if session else item
+        actions.append(action)
+        held = held or len(steps) >= max_steps or not _pipeline_safe(task, action, approve_each, policy)
+        if held:
+            continue
+        undo.append(_undo_for(action))
+        ran, _ = _run_steps(task, [action], apply, approve_each, max_steps, policy, out, first_step=len(steps) + 1,
+                            source=source)
+        steps += ran
+
+    outcome = {'task': task, 'status': 'no_actions', 'plan': actions, 'steps': steps}
+    if kind == 'error':
+        print(f"Plan aborted: {item}", file=out)
+        for fn in reversed(undo):
+            try:
+                fn()
+            except Exception:
+                pass
+        if steps:
+            print(f"Rolled back {len(steps)} early step(s)", file=out)
+        outcome['rolled_back'] = [s['step'] for s in steps]
+        actions = fallback_plan(task)
+        if session:
+            actions = bind_session(actions, session)
+        outcome['plan'], steps = actions, []
+    _remember_plan(task, actions, source)
+    if not actions:
+        print("No actions produced by planner.", file=out)
+        return outcome
+    rest, done = _run_steps(task, actions[len(steps):], apply, approve_each, max_steps, policy, out,
+                            first_step=len(steps) + 1, source=source)
+    outcome['steps'] = steps + rest
+    outcome['status'] = 'done' if done else 'incomplete'
+    return outcome
+
+
+def _run_steps(task: str, actions: list[dict], apply: bool, approve_each: bool, max_steps: int, policy, out=None,
+               first_step: int = 1, source: str | None = None):
+    # adjacent type / press / hotkey steps run as one input burst (see input_batch.py)
+    burst = KeyBurst(pyautogui) if apply and pyautogui else None
+    try:
+        return _step_loop(task, actions, apply, approve_each, max_steps, policy, out, first_step, burst, source)
+    finally:
+        if burst is not None:
+            burst.end()
+
+
+def _step_loop(task: str, actions: list[dict], apply: bool, approve_each: bool, max_steps: int, policy, out,
+               first_step: int, burst, source: str | None = None):
+    steps = []
+    step = first_step - 1
+    # fields are checked and coerced once per plan, not on every step
+    for action, typed in zip(actions, compile_plan(actions)):
         step += 1
         if step > max_steps:
-            print("Max steps reached")
+            print("Max steps reached", file=out)
             break
-        print(f"> action {step}: {json.dumps(action)}")
+        print(f"> action {step}: {json.dumps(action)}", file=out)
+        auto_ans = None
         if approve_each:
-            # Check memory for a recent matching approval (auto-approve behavior)
-            auto_ans = None
+            # O(1) auto-approval decision from the precompiled policy (rules + remembered approvals)
             try:
-                if get_memory is not None:
-                    mem = get_memory()
-                    for r in mem.all(limit=200):
-                        if r.get('type') != 'approval':
-                            continue
-                        md = r.get('metadata') or {}
-                        # match by identical task or by action type
-                        if md.get('task') == task or (isinstance(md.get('action'), dict) and md.get('action', {}).get('type') == action.get('type')):
-                            auto_ans = str(r.get('text') or '').strip().lower()
-                            break
+                auto_ans = policy.decide(task, action) if policy is not None else None
             except Exception:
                 auto_ans = None
 
             if auto_ans:
                 ans = auto_ans
-                print(f"(auto) approval from memory: {ans}")
+                print(f"(auto) approval from memory: {ans}", file=out)
                 # audit log the auto-approval (JSON lines); do NOT persist approval into memory (audit-only)
                 try:
                     action_for_audit = dict(action) if isinstance(action, dict) else action
@@ -427,8 +855,7 @@ def run_task(task: str, apply: bool, approve_each: bool, max_steps: int = 20):
                         'action': action_for_audit,
                         'step': step,
                     }
-                    audit_path = os.path.join(os.path.dirname(__file__), 'approval_audit.log')
-                    with open(audit_path, 'a', encoding='utf-8') as af:
+                    with open(AUDIT_PATH, 'a', encoding='utf-8') as af:
                         af.write(json.dumps(audit_entry, default=str) + '\n')
                 except Exception:
                     pass
@@ -464,31 +891,38 @@ def run_task(task: str, apply: bool, approve_each: bool, max_steps: int = 20):
                         'action': action_for_audit,
                         'step': step,
                     }
-                    audit_path = os.path.join(os.path.dirname(__file__), 'approval_audit.log')
-                    with open(audit_path, 'a', encoding='utf-8') as af:
+                    with open(AUDIT_PATH, 'a', encoding='utf-8') as af:
                         af.write(json.dumps(audit_entry, default=str) + '\n')
                 except Exception:
                     pass
 
             if ans not in ("y", "yes"):
-                print("Skipped")
+                print("Skipped", file=out)
+                steps.append({'step': step, 'action': action, 'approved': False, 'auto': bool(auto_ans), 'result': None, 'elapsed': 0.0})
                 continue
-        result = execute_action(action, apply=apply)
-        print("  →", result)
+        if burst is not None:
+            burst.step(typed.type)
+        t0 = time.perf_counter()
+        result = execute_action(typed, apply=apply)
+        steps.append({'step': step, 'action': action, 'approved': True, 'auto': bool(auto_ans) or not approve_each,
+                      'result': result, 'elapsed': time.perf_counter() - t0})
+        print("  →", result, file=out)
         # record action result to memory (best-effort)
         try:
             if get_memory is not None:
-                get_memory().add('action', result, metadata={'task': task, 'action': action, 'step': step, 'applied': apply})
+                get_memory().add('action', result, metadata=_tagged(
+                    {'task': task, 'action': action, 'step': step, 'applied': apply}, source))
         except Exception:
             pass
         if result == "DONE":
             try:
                 if get_memory is not None:
-                    get_memory().add('task_result', 'done', metadata={'task': task})
+                    get_memory().add('task_result', 'done', metadata=_tagged({'task': task}, source))
             except Exception:
                 pass
-            print("Task complete")
-            break
+            print("Task complete", file=out)
+            return steps, True
+    return steps, False
 
 
 def main():
@@ -505,7 +939,11 @@ def main():
     runp.add_argument("--apply", action="store_true", help="Execute real actions (requires pyautogui)")
     runp.add_argument("--no-approve", dest="approve", action="store_false", help="Don't ask before each action")
     runp.add_argument("--max-steps", type=int, default=20)
-    runp.set_defaults(func=lambda args: run_task(" ".join(args.task), args.apply, args.approve, args.max_steps))
+    runp.add_argument("--stream", action="store_true", help="Start early safe steps while the plan is streamed")
+    runp.add_argument("--race", action="store_true", default=None,
+                      help="Race the fallback planner against the LLM (deadline SAMUS_PLAN_DEADLINE)")
+    runp.set_defaults(func=lambda args: run_task(" ".join(args.task), args.apply, args.approve, args.max_steps,
+                                                 stream=args.stream, race=args.race))
 
     args = ap.parse_args()
 
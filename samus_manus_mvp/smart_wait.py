@@ -0,0 +1,102 @@
+"""Condition waits for the executor: proceed as soon as the UI is ready, not after a fixed sleep.
+
+- `poll(check, timeout)` calls `check()` with exponentially growing gaps (50 ms x1.5, capped at
+  `MAX_INTERVAL`) until it returns something truthy or `timeout` seconds pass.
+- Screen conditions compare small grayscale thumbnails of the screen (or a region
+  `[x, y, w, h]`): `wait_change` returns once the picture differs from when the wait started,
+  `wait_settle` once it has stayed the same for `stable` seconds (animations / redraws done).
+- `wait_image` polls `eyes.find_on_screen` (one attempt per poll) until the template appears.
+- Web waits (selector / network idle) use Playwright's own waiting, see `WebHands.wait_for_*`.
+
+Usage:
+  ok, elapsed, polls = wait_settle(region=[0, 0, 800, 600], timeout=3.0)
+  pos, elapsed, polls = wait_image('button.png', timeout=5.0)
+"""
+import os
+import time
+from typing import Any, Callable, Optional, Sequence, Tuple
+
+try:
+    import pyautogui
+except Exception:
+    pyautogui = None
+
+try:
+    from eyes import find_on_screen
+except Exception:
+    try:
+        from samus_manus_mvp.eyes import find_on_screen
+    except Exception:
+        def find_on_screen(img, confidence=0.8, timeout=3.0):
+            return None
+
+DEFAULT_TIMEOUT = float(os.getenv('SAMUS_WAIT_TIMEOUT', '10'))
+FIRST_INTERVAL = 0.05
+BACKOFF = 1.5
+MAX_INTERVAL = 0.5
+THUMB_SIZE = (64, 36)
+CHANGE_THRESHOLD = 2.0   # mean absolute thumbnail difference (0-255) that counts as a change
+
+
+def poll(check: Callable[[], Any], timeout: float = DEFAULT_TIMEOUT, first: float = FIRST_INTERVAL,
+         backoff: float = BACKOFF, max_interval: float = MAX_INTERVAL) -> Tuple[Any, float, int]:
+    """`(result, elapsed, polls)`; `result` is the first truthy `check()` value, or None on timeout."""
+    start = time.monotonic()
+    deadline = start + max(0.0, float(timeout))
+    interval, polls = first, 0
+    while True:
+        polls += 1
+        result = check()
+        now = time.monotonic()
+        if result:
+            return result, now - start, polls
+        if now >= deadline:
+            return None, now - start, polls
+        time.sleep(min(interval, deadline - now))
+        interval = min(interval * backoff, max_interval)
+
+
+def thumbnail(region: Optional[Sequence[int]] = None) -> Optional[bytes]:
+    """Grayscale THUMB_SIZE bytes of the screen / region; None without a screenshot backend."""
+    if pyautogui is None:
+        return None
+    img = pyautogui.screenshot(region=tuple(int(v) for v in region)) if region else pyautogui.screenshot()
+    return img.convert('L').resize(THUMB_SIZE).tobytes()
+
+
+def difference(a: bytes, b: bytes) -> float:
+    if len(a) != len(b) or not a:
+        return 255.0
+    return sum(abs(x - y) for x, y in zip(a, b)) / len(a)
+
+
+def wait_change(region: Optional[Sequence[int]] = None, timeout: float = DEFAULT_TIMEOUT,
+                threshold: float = CHANGE_THRESHOLD) -> Tuple[bool, float, int]:
+    base = thumbnail(region)
+    if base is None:
+        return False, 0.0, 0
+    changed, elapsed, polls = poll(lambda: difference(base, thumbnail(region)) > threshold, timeout)
+    return bool(changed), elapsed, polls
+
+
+def wait_settle(region: Optional[Sequence[int]] = None, timeout: float = DEFAULT_TIMEOUT, stable: float = 0.3,
+                threshold: float = CHANGE_THRESHOLD) -> Tuple[bool, float, int]:
+    last = {'thumb': thumbnail(region), 'since': time.monotonic()}
+    if last['thumb'] is None:
+        return False, 0.0, 0
+
+    def settled():
+        thumb = thumbnail(region)
+        now = time.monotonic()
+        if difference(last['thumb'], thumb) > threshold:
+            last['thumb'], last['since'] = thumb, now
+            return False
+        return now - last['since'] >= stable
+
+    ok, elapsed, polls = poll(settled, timeout)
+    return bool(ok), elapsed, polls
+
+
+def wait_image(img: str, timeout: float = DEFAULT_TIMEOUT, confidence: float = 0.8):
+    """`(position or None, elapsed, polls)`."""
+    return poll(lambda: find_on_screen(img, confidence=confidence, timeout=0), timeout)
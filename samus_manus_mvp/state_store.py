@@ -0,0 +1,179 @@
+"""Small JSON state store for `heartbeat_state.json` (shared by heartbeat, UI and overlay).
+
+- Writes are atomic: the new state goes to a temp file in the same directory and is
+  swapped in with `os.replace`, so readers never see a half-written file.
+- `update(changes, debounce=True)` coalesces rapid changes (e.g. slider ticks) into one write
+  after `debounce` seconds; the write re-reads the file first, so keys changed meanwhile by
+  another process are kept. `flush()` forces pending changes out (also run at exit).
+- Every write bumps a `_version` counter stored in the file.
+- `read()` stats the file and only re-parses it when mtime / size / inode changed.
+- `subscribe(cb)` registers `cb(state)`; it is called after this process writes, and when
+  `poll()` notices a change made by another process.
+
+Usage:
+  store = get_store(STATE_PATH)
+  st = store.read()
+  store.update({'interval': 60}, debounce=0.25)
+"""
+from pathlib import Path
+import atexit
+import json
+import os
+import threading
+from typing import Any, Callable, Dict, Optional
+
+DEFAULT_DEBOUNCE = 0.25
+VERSION_KEY = '_version'
+
+
+class StateStore:
+    def __init__(self, path, debounce: float = DEFAULT_DEBOUNCE):
+        self.path = Path(path)
+        self.debounce = debounce
+        self._lock = threading.RLock()
+        self._sig = None
+        self._cache: Dict[str, Any] = {}
+        self._pending: Dict[str, Any] = {}
+        self._timer: Optional[threading.Timer] = None
+        self._listeners = []
+        self.reads = 0  # actual parses (not cache hits)
+
+    def _signature(self):
+        try:
+            st = self.path.stat()
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+    # --- reading ---
+    def read(self) -> Dict[str, Any]:
+        """Current state (a copy); re-parses the file only if it changed on disk."""
+        with self._lock:
+            sig = self._signature()
+            if sig is None:
+                self._sig, self._cache = None, {}
+            elif sig != self._sig:
+                try:
+                    data = json.loads(self.path.read_text(encoding='utf-8'))
+                    self._cache = data if isinstance(data, dict) else {}
+                    self._sig = sig
+                    self.reads += 1
+                except Exception:
+                    pass  # keep the last good copy
+            state = dict(self._cache)
+            state.update(self._pending)
+            return state
+
+    @property
+    def version(self) -> int:
+        return int(self.read().get(VERSION_KEY, 0) or 0)
+
+    def poll(self) -> bool:
+        """Check for changes made by other processes; notifies subscribers. Returns True if changed."""
+        with self._lock:
+            if self._signature() == self._sig:
+                return False
+            state = self.read()
+        self._notify(state)
+        return True
+
+    # --- writing ---
+    def _write_locked(self, state: Dict[str, Any]) -> Dict[str, Any]:
+        state = dict(state)
+        state[VERSION_KEY] = int(self._cache.get(VERSION_KEY, 0) or 0) + 1
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(f'.{self.path.name}.{os.getpid()}.{threading.get_ident()}.tmp')
+        tmp.write_text(json.dumps(state, indent=2), encoding='utf-8')
+        os.replace(tmp, self.path)
+        self._cache = state
+        self._sig = self._signature()
+        return state
+
+    def write(self, state: Dict[str, Any]):
+        """Replace the whole state now (pending debounced changes are applied on top)."""
+        with self._lock:
+            self.read()  # current version counter
+            merged = dict(state)
+            merged.update(self._pending)
+            self._pending.clear()
+            self._cancel_timer()
+            written = self._write_locked(merged)
+        self._notify(written)
+
+    def update(self, changes: Dict[str, Any], debounce: Optional[float] = None):
+        """Merge `changes` into the state; with `debounce` > 0 the write is coalesced."""
+        debounce = self.debounce if debounce is True else (debounce or 0)
+        with self._lock:
+            self._pending.update(changes)
+            if debounce <= 0:
+                self._flush_locked()
+                written = self._cache
+            else:
+                self._cancel_timer()
+                self._timer = threading.Timer(debounce, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+                return
+        self._notify(written)
+
+    def flush(self):
+        with self._lock:
+            if not self._pending:
+                return
+            self._cancel_timer()
+            self._flush_locked()
+            written = self._cache
+        self._notify(written)
+
+    def _flush_locked(self):
+        self._pending, pending = {}, self._pending
+        state = self.read()  # re-read: keep keys other writers changed meanwhile
+        state.update(pending)
+        self._write_locked(state)
+
+    def _cancel_timer(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+    # --- notifications ---
+    def subscribe(self, cb: Callable[[Dict[str, Any]], None]):
+        self._listeners.append(cb)
+
+    def unsubscribe(self, cb):
+        try:
+            self._listeners.remove(cb)
+        except ValueError:
+            pass
+
+    def _notify(self, state):
+        for cb in list(self._listeners):
+            try:
+                cb(dict(state))
+            except Exception:
+                pass
+
+
+_STORES: Dict[Path, StateStore] = {}
+_STORES_LOCK = threading.Lock()
+
+
+def get_store(path) -> StateStore:
+    """One store per state file per process (so debounced writes and caches are shared)."""
+    key = Path(path).resolve()
+    with _STORES_LOCK:
+        store = _STORES.get(key)
+        if store is None:
+            store = _STORES[key] = StateStore(key)
+    return store
+
+
+def flush_all():
+    for store in list(_STORES.values()):
+        try:
+            store.flush()
+        except Exception:
+            pass
+
+
+atexit.register(flush_all)
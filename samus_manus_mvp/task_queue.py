@@ -0,0 +1,324 @@
+"""Transactional task queue for the heartbeat (SQLite, WAL mode).
+
+- Tasks live in `tasks.db` next to `tasks.json`; status lookups use an index on
+  `(status, seq)` instead of scanning a JSON file.
+- `claim(owner, lease)` atomically moves pending tasks to `running` under a lease, so two
+  heartbeats (or a heartbeat and the UI) never run the same task. A crashed runner's tasks
+  become claimable again once their lease expires.
+- `complete(id, owner, status, result)` finishes a task (only the lease owner can); finished
+  tasks older than `archive_after` move to `tasks_archive`, out of the hot table and the JSON view.
+- JSON shim: `sync_json(path)` imports `tasks.json` when it was edited by hand (detected by
+  mtime + size) and `export_json(path)` rewrites it atomically, so the file keeps working
+  as a human-editable view of the queue.
+
+Usage:
+  q = TaskQueue(BASE / 'tasks.db')
+  q.sync_json(BASE / 'tasks.json')
+  for t in q.claim('heartbeat-1234', lease=600):
+      q.complete(t['id'], 'heartbeat-1234', 'done', result='...')
+  q.export_json(BASE / 'tasks.json')
+"""
+from pathlib import Path
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+DEFAULT_LEASE = 600.0
+DEFAULT_ARCHIVE_AFTER = 7 * 24 * 3600.0
+FINISHED = ('done', 'failed', 'blocked')
+# columns stored natively; any other task field round-trips through the `data` JSON column
+_CORE = ('id', 'task', 'status', 'created_at', 'completed_at', 'result')
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS tasks (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT, id TEXT UNIQUE NOT NULL, task TEXT, status TEXT NOT NULL,
+    created_at REAL, updated_at REAL, completed_at REAL, result TEXT,
+    lease_owner TEXT, lease_until REAL, data TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_tasks_status ON tasks (status, seq);
+CREATE TABLE IF NOT EXISTS tasks_archive (
+    seq INTEGER PRIMARY KEY, id TEXT, task TEXT, status TEXT, created_at REAL, updated_at REAL,
+    completed_at REAL, result TEXT, lease_owner TEXT, lease_until REAL, data TEXT, archived_at REAL
+);
+CREATE INDEX IF NOT EXISTS idx_tasks_archive_id ON tasks_archive (id);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+'''
+
+
+def _row_to_task(row: sqlite3.Row) -> Dict[str, Any]:
+    t: Dict[str, Any] = {}
+    try:
+        t.update(json.loads(row['data'] or '{}'))
+    except Exception:
+        pass
+    for k in _CORE:
+        if row[k] is not None:
+            t[k] = row[k]
+    return t
+
+
+def _split(task: Dict[str, Any]):
+    extra = {k: v for k, v in task.items() if k not in _CORE}
+    return json.dumps(extra, default=str) if extra else None
+
+
+class TaskQueue:
+    def __init__(self, path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None, timeout=10)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript(_SCHEMA)
+
+    # --- plumbing ---
+    def _tx(self):
+        """Serialize writers: BEGIN IMMEDIATE takes the write lock up front (no upgrade deadlocks)."""
+        queue = self
+
+        class _Tx:
+            def __enter__(self):
+                queue._lock.acquire()
+                try:
+                    queue._conn.execute('BEGIN IMMEDIATE')
+                except Exception:
+                    queue._lock.release()  # e.g. busy timeout: no transaction to end in __exit__
+                    raise
+                return queue._conn
+
+            def __exit__(self, exc_type, exc, tb):
+                try:
+                    queue._conn.execute('ROLLBACK' if exc_type else 'COMMIT')
+                finally:
+                    queue._lock.release()
+                return False
+
+        return _Tx()
+
+    def _read(self, sql: str, args=()) -> List[sqlite3.Row]:
+        # reads share the connection with writers on other threads, so they take the lock too
+        with self._lock:
+            return self._conn.execute(sql, args).fetchall()
+
+    def _meta(self, key: str) -> Optional[str]:
+        rows = self._read('SELECT value FROM meta WHERE key = ?', (key,))
+        row = rows[0] if rows else None
+        return row['value'] if row else None
+
+    def _set_meta(self, conn, key: str, value: str):
+        conn.execute('INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)', (key, value))
+
+    @staticmethod
+    def _next_id(conn) -> str:
+        # ids look like "task-N"; non-numeric suffixes are ignored
+        nums = [0]
+        for (tid,) in conn.execute("SELECT id FROM tasks WHERE id LIKE 'task-%' UNION SELECT id FROM tasks_archive WHERE id LIKE 'task-%'"):
+            suffix = tid.split('-', 1)[1]
+            if suffix.isdigit():
+                nums.append(int(suffix))
+        return f'task-{max(nums) + 1}'
+
+    def _insert(self, conn, task: Dict[str, Any]) -> Dict[str, Any]:
+        task = dict(task)
+        task.setdefault('id', self._next_id(conn))
+        task.setdefault('status', 'pending')
+        task.setdefault('created_at', int(time.time()))
+        conn.execute(
+            'INSERT INTO tasks (id, task, status, created_at, updated_at, completed_at, result, data) VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+            (str(task['id']), task.get('task'), task['status'], task['created_at'], time.time(),
+             task.get('completed_at'), task.get('result'), _split(task)),
+        )
+        return task
+
+    def _update(self, conn, task: Dict[str, Any]):
+        conn.execute(
+            'UPDATE tasks SET task = ?, status = ?, created_at = ?, completed_at = ?, result = ?, data = ?, updated_at = ? WHERE id = ?',
+            (task.get('task'), task.get('status', 'pending'), task.get('created_at'), task.get('completed_at'),
+             task.get('result'), _split(task), time.time(), str(task['id'])),
+        )
+
+    # --- reads ---
+    def get(self, task_id: str, archived: bool = False) -> Optional[Dict[str, Any]]:
+        """A task by id; with `archived=True` archived tasks are found too."""
+        rows = self._read('SELECT * FROM tasks WHERE id = ?', (task_id,))
+        if not rows and archived:
+            rows = self._read('SELECT * FROM tasks_archive WHERE id = ? ORDER BY seq DESC LIMIT 1', (task_id,))
+        return _row_to_task(rows[0]) if rows else None
+
+    def list(self, status: Optional[str] = None) -> List[Dict[str, Any]]:
+        if status is None:
+            rows = self._read('SELECT * FROM tasks ORDER BY seq')
+        else:
+            rows = self._read('SELECT * FROM tasks WHERE status = ? ORDER BY seq', (status,))
+        return [_row_to_task(r) for r in rows]
+
+    def count(self, status: str) -> int:
+        return self._read('SELECT COUNT(*) FROM tasks WHERE status = ?', (status,))[0][0]
+
+    def expired(self, now: Optional[float] = None) -> List[str]:
+        """Ids of running tasks whose lease ran out (their runner died); `claim` takes them again."""
+        now = time.time() if now is None else now
+        return [r['id'] for r in self._read("SELECT id FROM tasks WHERE status = 'running' AND lease_until < ? ORDER BY seq",
+                                            (now,))]
+
+    def archived(self, limit: int = 100) -> List[Dict[str, Any]]:
+        rows = self._read('SELECT * FROM tasks_archive ORDER BY archived_at DESC, seq DESC LIMIT ?', (limit,))
+        return [_row_to_task(r) for r in rows]
+
+    # --- writes ---
+    def add(self, task) -> Dict[str, Any]:
+        """Enqueue a task (a dict, or just the task text); returns it with its id filled in."""
+        if isinstance(task, str):
+            task = {'task': task}
+        with self._tx() as conn:
+            return self._insert(conn, task)
+
+    def upsert(self, task: Dict[str, Any]):
+        with self._tx() as conn:
+            if task.get('id') is not None and conn.execute('SELECT 1 FROM tasks WHERE id = ?', (str(task['id']),)).fetchone():
+                self._update(conn, task)
+            else:
+                self._insert(conn, task)
+
+    def claim(self, owner: str, limit: Optional[int] = None, lease: float = DEFAULT_LEASE,
+              ids: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """Atomically lease up to `limit` runnable tasks to `owner` (pending, or running with an expired lease)."""
+        now = time.time()
+        sql = "SELECT * FROM tasks WHERE (status = 'pending' OR (status = 'running' AND lease_until < ?))"
+        args: list = [now]
+        if ids is not None:
+            sql += ' AND id IN (%s)' % ','.join('?' * len(ids))
+            args += [str(i) for i in ids]
+        sql += ' ORDER BY seq'
+        if limit is not None:
+            sql += ' LIMIT ?'
+            args.append(int(limit))
+        with self._tx() as conn:
+            rows = conn.execute(sql, args).fetchall()
+            conn.executemany(
+                "UPDATE tasks SET status = 'running', lease_owner = ?, lease_until = ?, updated_at = ? WHERE seq = ?",
+                [(owner, now + lease, now, r['seq']) for r in rows],
+            )
+        claimed = []
+        for r in rows:
+            t = _row_to_task(r)
+            t['status'] = 'running'
+            claimed.append(t)
+        return claimed
+
+    def renew(self, task_id: str, owner: str, lease: float = DEFAULT_LEASE) -> bool:
+        with self._tx() as conn:
+            cur = conn.execute("UPDATE tasks SET lease_until = ? WHERE id = ? AND lease_owner = ? AND status = 'running'",
+                               (time.time() + lease, task_id, owner))
+            return cur.rowcount == 1
+
+    def release(self, task_id: str, owner: str) -> bool:
+        """Give a claimed task back (e.g. deferred): it becomes pending again."""
+        with self._tx() as conn:
+            cur = conn.execute("UPDATE tasks SET status = 'pending', lease_owner = NULL, lease_until = NULL, updated_at = ? "
+                               "WHERE id = ? AND lease_owner = ? AND status = 'running'", (time.time(), task_id, owner))
+            return cur.rowcount == 1
+
+    def complete(self, task_id: str, owner: str, status: str = 'done', result: Optional[str] = None,
+                 extra: Optional[Dict[str, Any]] = None) -> bool:
+        """Finish a claimed task; returns False if `owner` no longer holds its lease."""
+        now = time.time()
+        with self._tx() as conn:
+            row = conn.execute("SELECT * FROM tasks WHERE id = ? AND lease_owner = ? AND status = 'running'",
+                               (task_id, owner)).fetchone()
+            if row is None:
+                return False
+            t = _row_to_task(row)
+            t.update(extra or {})
+            t.update(status=status, result=result, completed_at=now)
+            self._update(conn, t)
+            conn.execute('UPDATE tasks SET lease_owner = NULL, lease_until = NULL WHERE id = ?', (task_id,))
+            return True
+
+    def archive(self, older_than: float = DEFAULT_ARCHIVE_AFTER) -> int:
+        """Move tasks finished more than `older_than` seconds ago into `tasks_archive`."""
+        now = time.time()
+        cutoff = now - older_than
+        marks = ','.join('?' * len(FINISHED))
+        with self._tx() as conn:
+            conn.execute(
+                f'INSERT INTO tasks_archive SELECT *, ? FROM tasks WHERE status IN ({marks}) AND completed_at < ?',
+                (now, *FINISHED, cutoff),
+            )
+            cur = conn.execute(f'DELETE FROM tasks WHERE status IN ({marks}) AND completed_at < ?', (*FINISHED, cutoff))
+            return cur.rowcount
+
+    # --- tasks.json shim ---
+    @staticmethod
+    def _signature(path: Path) -> Optional[str]:
+        try:
+            st = path.stat()
+        except FileNotFoundError:
+            return None
+        return f'{st.st_mtime_ns}:{st.st_size}'
+
+    def sync_json(self, path, force: bool = False) -> int:
+        """Import `tasks.json` if it changed since the last import/export; returns tasks touched.
+
+        The file is authoritative for tasks it lists (except ones currently running);
+        pending tasks removed from it are dropped, finished ones are archived. A repeated id
+        keeps its first entry; a file that can't be imported leaves the queue as it is.
+        """
+        path = Path(path)
+        sig = self._signature(path)
+        if sig is None or (not force and sig == self._meta('json_sig')):
+            return 0
+        try:
+            data = json.loads(path.read_text(encoding='utf-8'))
+            tasks = data.get('tasks', []) if isinstance(data, dict) else []
+        except Exception:
+            return 0  # half-written or invalid file: keep the queue as is
+        touched = 0
+        assigned = False
+        try:
+            with self._tx() as conn:
+                existing = {r['id']: r['status'] for r in conn.execute('SELECT id, status FROM tasks')}
+                seen = set()
+                for t in tasks:
+                    if not isinstance(t, dict) or (t.get('id') is not None and str(t['id']) in seen):
+                        continue  # not a task, or a hand-edited duplicate of an id listed above
+                    if t.get('id') is None:
+                        t = self._insert(conn, t)
+                        assigned = True
+                    elif str(t['id']) not in existing:
+                        self._insert(conn, t)
+                    elif existing[str(t['id'])] != 'running':
+                        self._update(conn, t)
+                    seen.add(str(t['id']))
+                    touched += 1
+                gone = [tid for tid, st in existing.items() if tid not in seen and st != 'running']
+                for tid in gone:
+                    if existing[tid] in FINISHED:
+                        conn.execute('INSERT INTO tasks_archive SELECT *, ? FROM tasks WHERE id = ?', (time.time(), tid))
+                    conn.execute('DELETE FROM tasks WHERE id = ?', (tid,))
+                touched += len(gone)
+                self._set_meta(conn, 'json_sig', sig)
+        except Exception:
+            return 0  # e.g. a task the schema rejects: rolled back, keep the queue as is
+        if assigned:
+            self.export_json(path)
+        return touched
+
+    def export_json(self, path):
+        """Rewrite `tasks.json` from the queue (atomic replace; archived tasks are left out)."""
+        path = Path(path)
+        tmp = path.with_name(path.name + '.tmp')
+        tmp.write_text(json.dumps({'tasks': self.list()}, indent=2), encoding='utf-8')
+        os.replace(tmp, path)
+        with self._tx() as conn:
+            self._set_meta(conn, 'json_sig', self._signature(path) or '')
+
+    def close(self):
+        try:
+            self._conn.close()
+        except Exception:
+            pass
@@ -0,0 +1,248 @@
+"""Resource-aware scheduler for heartbeat tasks.
+
+- Each task is classified by the resource it needs:
+    `gui`              real mouse / keyboard (`apply=True` desktop tasks) — exclusive
+    `browser:<name>`   a WebHands session — one task at a time per session
+    `compute`          simulated / planning-only work — runs in parallel
+  A task may name it explicitly with `"resource": "gui" | "browser" | "compute"` (and
+  `"session": "<name>"` for browser tasks); otherwise it is inferred from its plan (any
+  `web_*` action needs the browser lane, even in a desktop task) and its text.
+- Exclusive resources get their own single-thread lane, so tasks on the same resource run
+  in order on the same thread (Playwright's sync API is bound to the thread that opened the
+  browser). Compute tasks share a pool of `compute_limit` threads.
+- `max_concurrency` bounds how many tasks run at once across all lanes.
+- Each task has a deadline (`timeout` seconds from submission): a task that cannot start
+  before its deadline is reported as `deferred` and left for the next heartbeat; a task that
+  starts is run with the remaining time as its timeout. One still running at its deadline is
+  reported as `timeout` and no longer waited for (its thread can't be killed: it is left to
+  finish in the background, and its result is dropped), so a hung task can't stall the run.
+- Tasks form a DAG through `"depends_on": ["task-3", ...]`: a task is submitted once all of its
+  dependencies in the batch succeeded, so independent branches run in parallel and a chain
+  (open browser -> web steps) runs in order. If a dependency fails, its dependents are
+  reported as `blocked` (so are tasks on a dependency cycle) and never run; if it is
+  deferred, so are they.
+  `dependency_status` checks dependencies outside the batch (e.g. finished in an earlier run).
+
+Usage:
+  sched = TaskScheduler(max_concurrency=4)
+  for t, outcome in sched.run(tasks, run_fn, apply_for=lambda t: False):
+      ...   # outcome = {'status': 'ok'|'deferred'|'timeout'|'error'|'blocked', 'resource', 'value', 'elapsed'}
+"""
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+import re
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+DEFAULT_MAX_CONCURRENCY = 4
+DEFAULT_COMPUTE_LIMIT = 4
+DEFAULT_BROWSER_SESSION = 'default'
+
+_WEB_RE = re.compile(r'https?://|www\.|\b[\w-]+\.(com|org|net|io|dev|app|edu|gov)\b|\bbrowser\b|\bweb\b', re.IGNORECASE)
+
+
+def uses_web(plan: Optional[List[Dict[str, Any]]]) -> bool:
+    return any(isinstance(a, dict) and str(a.get('type') or '').startswith('web_') for a in plan or [])
+
+
+def classify(task: Dict[str, Any], apply: bool = False, plan: Optional[List[Dict[str, Any]]] = None) -> str:
+    """Return the resource key a task needs: 'gui', 'browser:<session>' or 'compute'.
+
+    `plan` is the plan the task will run (default: its explicit `actions`).
+    """
+    explicit = str(task.get('resource') or '').strip().lower()
+    session = str(task.get('session') or DEFAULT_BROWSER_SESSION)
+    if explicit.startswith('browser'):
+        return explicit if ':' in explicit else f'browser:{session}'
+    if explicit in ('gui', 'compute'):
+        return explicit
+    text = str(task.get('task') or '')
+    plan = task.get('actions') if plan is None else plan
+    # web actions run (headless) even in simulation, so they always need their session;
+    # Playwright objects are bound to the session's thread, so this wins over `gui`
+    if task.get('session') or _WEB_RE.search(text) or uses_web(plan):
+        return f'browser:{session}'
+    return 'gui' if apply else 'compute'
+
+
+def dependencies(task: Dict[str, Any]) -> List[str]:
+    """Ids a task depends on (`depends_on` may be a single id or a list)."""
+    deps = task.get('depends_on') or []
+    if isinstance(deps, (str, int)):
+        deps = [deps]
+    return [str(d) for d in deps]
+
+
+def dependency_status(task: Dict[str, Any], lookup: Callable[[str], Optional[Dict[str, Any]]],
+                      batch: Iterable[str] = ()) -> Tuple[str, Optional[str]]:
+    """`('ready', None)`, `('waiting', dep)` or `('blocked', dep)` for a task about to be scheduled.
+
+    Dependencies in `batch` are ordered by the scheduler itself; any other dependency is
+    looked up and must have finished `done` (a recurring task counts once its last run was).
+    Unknown ids block the task rather than waiting forever.
+    """
+    batch = set(batch)
+    for dep in dependencies(task):
+        if dep in batch:
+            continue
+        d = lookup(dep)
+        if d is None:
+            return 'blocked', dep
+        status = d.get('status')
+        if status == 'done' or d.get('last_status') == 'done':
+            continue
+        if status in ('failed', 'blocked'):
+            return 'blocked', dep
+        return 'waiting', dep
+    return 'ready', None
+
+
+class TaskScheduler:
+    def __init__(self, max_concurrency: int = DEFAULT_MAX_CONCURRENCY, compute_limit: int = DEFAULT_COMPUTE_LIMIT):
+        self.max_concurrency = max(1, int(max_concurrency))
+        self.compute_limit = max(1, int(compute_limit))
+
+    def run(self, tasks: Iterable[Dict[str, Any]], run_fn: Callable[[Dict[str, Any], bool, Optional[float]], Any],
+            apply_for: Callable[[Dict[str, Any]], bool] = lambda t: False,
+            timeout_for: Callable[[Dict[str, Any]], Optional[float]] = lambda t: None,
+            succeeded: Callable[[Dict[str, Any], Dict[str, Any]], bool] = lambda t, o: True,
+            plan_for: Callable[[Dict[str, Any]], Optional[List[Dict[str, Any]]]] = lambda t: None,
+            ) -> Iterator[Tuple[Dict[str, Any], Dict[str, Any]]]:
+        """Run `run_fn(task, apply, timeout)` for each task; yield `(task, outcome)` as tasks finish.
+
+        Outcomes are yielded on the calling thread, so callers can update shared state
+        (task lists, memory, audit log) without extra locking. `succeeded(task, outcome)`
+        decides whether an `ok` run satisfies its dependents (e.g. check the task's own status).
+        `plan_for(task)` is the plan the task will run, if known, for `classify`.
+        """
+        slots = threading.BoundedSemaphore(self.max_concurrency)
+        lanes: Dict[str, ThreadPoolExecutor] = {}
+        compute = ThreadPoolExecutor(max_workers=self.compute_limit, thread_name_prefix='task-compute')
+
+        gate = threading.Lock()  # a job starts and the wait loop reads `started` one at a time
+
+        def job(t, resource, apply, deadline, started):
+            deferred = {'status': 'deferred', 'resource': resource, 'value': None, 'elapsed': 0.0}
+            if deadline is None:
+                slots.acquire()
+            else:
+                wait = deadline - time.monotonic()
+                if wait <= 0 or not slots.acquire(timeout=wait):
+                    return deferred
+            start = time.monotonic()
+            try:
+                with gate:
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        return deferred
+                    started.set()
+                value = run_fn(t, apply, remaining)
+                return {'status': 'ok', 'resource': resource, 'value': value, 'elapsed': time.monotonic() - start}
+            except Exception as e:
+                return {'status': 'error', 'resource': resource, 'value': None, 'error': str(e),
+                        'elapsed': time.monotonic() - start}
+            finally:
+                slots.release()
+
+        def submit(t):
+            apply = bool(apply_for(t))
+            resource = classify(t, apply, plan_for(t))
+            timeout = timeout_for(t)
+            # dependents are submitted when released, so their deadline starts then
+            deadline = None if not timeout else time.monotonic() + float(timeout)
+            if resource == 'compute':
+                ex = compute
+            else:
+                ex = lanes.get(resource)
+                if ex is None:
+                    ex = lanes[resource] = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f'task-{resource}')
+            started = threading.Event()
+            fut = ex.submit(job, t, resource, apply, deadline, started)
+            futures[fut] = t
+            deadlines[fut] = (deadline, resource, time.monotonic(), started)
+
+        def blocked(t, dep, reason):
+            return {'status': 'blocked', 'resource': classify(t, bool(apply_for(t)), plan_for(t)), 'value': None,
+                    'blocked_by': dep, 'error': reason, 'elapsed': 0.0}
+
+        futures = {}
+        deadlines = {}  # future -> (deadline or None, resource, submitted at, started event)
+        abandoned = False
+        ok: Dict[str, bool] = {}  # finished task id -> satisfied its dependents
+        try:
+            tasks = list(tasks)
+            ids = {str(t.get('id')) for t in tasks if t.get('id') is not None}
+            waiting = []
+            for t in tasks:
+                if any(d in ids for d in dependencies(t)):
+                    waiting.append(t)
+                else:
+                    submit(t)
+            while futures or waiting:
+                if futures:
+                    now = time.monotonic()
+                    due = [deadlines[f][0] for f in futures if deadlines[f][0] is not None and deadlines[f][0] > now]
+                    timeout = min(due) - now if due else None
+                    done, _ = wait(list(futures), timeout=timeout, return_when=FIRST_COMPLETED)
+                    for fut in done:
+                        t = futures.pop(fut)
+                        outcome = fut.result()
+                        if outcome['status'] == 'deferred':
+                            ok[str(t.get('id'))] = 'deferred'
+                        else:
+                            ok[str(t.get('id'))] = outcome['status'] == 'ok' and bool(succeeded(t, outcome))
+                        yield t, outcome
+                    now = time.monotonic()
+                    for fut in [f for f in futures if deadlines[f][0] is not None and deadlines[f][0] <= now
+                                and not f.done()]:
+                        _, resource, submitted, started = deadlines[fut]
+                        with gate:
+                            running = started.is_set()
+                        if fut.cancel() or not running:
+                            # never started: same as missing the start deadline (a job still waiting
+                            # for a slot returns deferred by itself)
+                            if fut.cancelled():
+                                t = futures.pop(fut)
+                                ok[str(t.get('id'))] = 'deferred'
+                                yield t, {'status': 'deferred', 'resource': resource, 'value': None, 'elapsed': 0.0}
+                            continue
+                        t = futures.pop(fut)
+                        abandoned = True
+                        ok[str(t.get('id'))] = False
+                        yield t, {'status': 'timeout', 'resource': resource, 'value': None,
+                                  'error': 'timed out', 'elapsed': now - submitted}
+                # release dependents; a failure blocks the whole subtree below it
+                progress = True
+                while progress:
+                    progress, still = False, []
+                    for t in waiting:
+                        deps = [d for d in dependencies(t) if d in ids]
+                        failed = next((d for d in deps if ok.get(d) is False), None)
+                        later = next((d for d in deps if ok.get(d) == 'deferred'), None)
+                        if failed is not None:
+                            ok[str(t.get('id'))] = False
+                            progress = True
+                            yield t, blocked(t, failed, f'dependency {failed} did not succeed')
+                        elif later is not None:
+                            # a deferred dependency defers its dependents to the next run too
+                            ok[str(t.get('id'))] = 'deferred'
+                            progress = True
+                            yield t, {'status': 'deferred', 'resource': classify(t, bool(apply_for(t)), plan_for(t)),
+                                      'value': None, 'elapsed': 0.0}
+                        elif all(d in ok for d in deps):
+                            progress = True
+                            submit(t)
+                        else:
+                            still.append(t)
+                    waiting = still
+                if waiting and not futures:
+                    # nothing running and nothing can be released: a dependency cycle
+                    for t in waiting:
+                        dep = next(d for d in dependencies(t) if d in ids and d not in ok)
+                        yield t, blocked(t, dep, 'dependency cycle')
+                    waiting = []
+        finally:
+            # don't wait for overdue tasks; queued work behind them is cancelled
+            compute.shutdown(wait=not abandoned, cancel_futures=abandoned)
+            for ex in lanes.values():
+                ex.shutdown(wait=not abandoned, cancel_futures=abandoned)
@@ -0,0 +1,171 @@
+"""Event-driven wakeups for the heartbeat loop.
+
+- `Waker.wait(timeout)` sleeps until the timeout, an explicit `notify()` (e.g. from the
+  local control server) or a change to one of the watched files (task queue / tasks.json),
+  whichever comes first. Files are watched by polling `stat()` (mtime + size), which works
+  the same on Windows, macOS and Linux without extra dependencies.
+- Tasks can carry a cron-style `schedule` (`"*/15 * * * *"`, `"0 9 * * 1-5"`, `@daily`, or a
+  number of seconds). `next_run(schedule, after)` computes the exact next run time and
+  `next_wake(tasks, now, interval)` how long the heartbeat may sleep.
+
+Cron fields: minute hour day-of-month month day-of-week; `*`, lists (`1,15`), ranges (`1-5`)
+and steps (`*/10`, `8-18/2`); month / weekday names (`jan`, `mon`) are accepted. As in cron,
+when both day fields are restricted a day matches if either does. Times are local.
+"""
+from datetime import datetime, timedelta
+from pathlib import Path
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+POLL_INTERVAL = 0.5
+_ALIASES = {
+    '@yearly': '0 0 1 1 *', '@annually': '0 0 1 1 *', '@monthly': '0 0 1 * *',
+    '@weekly': '0 0 * * 0', '@daily': '0 0 * * *', '@midnight': '0 0 * * *', '@hourly': '0 * * * *',
+}
+_MONTHS = {m: i for i, m in enumerate(['jan', 'feb', 'mar', 'apr', 'may', 'jun', 'jul', 'aug', 'sep', 'oct', 'nov', 'dec'], 1)}
+_DAYS = {d: i for i, d in enumerate(['sun', 'mon', 'tue', 'wed', 'thu', 'fri', 'sat'])}
+# (low, high, names) per field
+_FIELDS = [(0, 59, {}), (0, 23, {}), (1, 31, {}), (1, 12, _MONTHS), (0, 7, _DAYS)]
+_MAX_YEARS = 5
+
+
+def _parse_field(spec: str, lo: int, hi: int, names: Dict[str, int]) -> List[int]:
+    values = set()
+    for part in spec.lower().split(','):
+        step = 1
+        if '/' in part:
+            part, step_s = part.split('/', 1)
+            step = int(step_s)
+            if step < 1:
+                raise ValueError(f'bad cron step: {step_s}')
+        if part == '*':
+            start, end = lo, hi
+        elif '-' in part:
+            a, b = part.split('-', 1)
+            start, end = int(names.get(a, a)), int(names.get(b, b))
+        else:
+            start = int(names.get(part, part))
+            end = hi if step > 1 else start
+        if start < lo or end > hi or start > end:
+            raise ValueError(f'cron value out of range: {part}')
+        values.update(range(start, end + 1, step))
+    return sorted(values)
+
+
+class CronSchedule:
+    def __init__(self, expr: str):
+        self.expr = expr
+        fields = _ALIASES.get(expr.strip().lower(), expr).split()
+        if len(fields) != 5:
+            raise ValueError(f'cron expression needs 5 fields: {expr!r}')
+        parsed = [_parse_field(f, lo, hi, names) for f, (lo, hi, names) in zip(fields, _FIELDS)]
+        self.minutes, self.hours, self.days, self.months = (set(p) for p in parsed[:4])
+        self.weekdays = {d % 7 for d in parsed[4]}  # 7 == Sunday
+        self.dom_any = fields[2] == '*'
+        self.dow_any = fields[4] == '*'
+
+    def _day_ok(self, dt: datetime) -> bool:
+        dom = dt.day in self.days
+        dow = (dt.weekday() + 1) % 7 in self.weekdays
+        if self.dom_any and self.dow_any:
+            return True
+        if self.dom_any:
+            return dow
+        if self.dow_any:
+            return dom
+        return dom or dow
+
+    def next_after(self, ts: float) -> float:
+        """Timestamp of the first matching minute strictly after `ts`."""
+        dt = datetime.fromtimestamp(ts).replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = dt + timedelta(days=366 * _MAX_YEARS)
+        # skip whole months / days / hours that can't match, so this is a handful of steps
+        while dt < limit:
+            if dt.month not in self.months:
+                dt = (dt.replace(day=1, hour=0, minute=0) + timedelta(days=32)).replace(day=1)
+                continue
+            if not self._day_ok(dt):
+                dt = dt.replace(hour=0, minute=0) + timedelta(days=1)
+                continue
+            if dt.hour not in self.hours:
+                dt = dt.replace(minute=0) + timedelta(hours=1)
+                continue
+            later = [m for m in sorted(self.minutes) if m >= dt.minute]
+            if not later:
+                dt = dt.replace(minute=0) + timedelta(hours=1)
+                continue
+            return dt.replace(minute=later[0]).timestamp()
+        raise ValueError(f'cron expression never matches: {self.expr!r}')
+
+
+_CRON_CACHE: Dict[str, CronSchedule] = {}
+
+
+def next_run(schedule: Any, after: Optional[float] = None) -> float:
+    """Next run time for a task schedule (cron string / alias, or an interval in seconds)."""
+    after = time.time() if after is None else after
+    if isinstance(schedule, (int, float)) or str(schedule).strip().isdigit():
+        return after + float(schedule)
+    cron = _CRON_CACHE.get(schedule)
+    if cron is None:
+        cron = _CRON_CACHE[schedule] = CronSchedule(schedule)
+    return cron.next_after(after)
+
+
+def next_wake(tasks: Iterable[Dict[str, Any]], now: float, interval: float) -> float:
+    """Seconds until the heartbeat should wake: the periodic tick or the earliest scheduled task.
+
+    Unscheduled pending tasks don't shorten the sleep: new ones wake the loop through the
+    file watcher / `notify`, and ones left over (e.g. deferred) wait for the next tick.
+    """
+    wake = now + interval
+    for t in tasks:
+        due = t.get('next_run_at')
+        if t.get('status') == 'pending' and due is not None:
+            wake = min(wake, float(due))
+    return max(0.0, wake - now)
+
+
+class Waker:
+    def __init__(self, paths: Iterable[Path] = (), poll: float = POLL_INTERVAL):
+        self.paths = [Path(p) for p in paths]
+        self.poll = poll
+        self._event = threading.Event()
+        self._reason = None
+        self._sigs = self._snapshot()
+
+    def _snapshot(self):
+        sigs = []
+        for p in self.paths:
+            try:
+                st = p.stat()
+                sigs.append((st.st_mtime_ns, st.st_size))
+            except OSError:
+                sigs.append(None)
+        return sigs
+
+    def rebaseline(self):
+        """Accept the current file state (call after the heartbeat's own writes)."""
+        self._sigs = self._snapshot()
+
+    def notify(self, reason: str = 'notify'):
+        self._reason = reason
+        self._event.set()
+
+    def wait(self, timeout: float) -> str:
+        """Block up to `timeout` seconds; returns 'timeout', 'changed:<file>' or the notify reason."""
+        deadline = time.monotonic() + max(0.0, timeout)
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return 'timeout'
+            if self._event.wait(min(self.poll, remaining)):
+                self._event.clear()
+                reason, self._reason = self._reason or 'notify', None
+                return reason
+            sigs = self._snapshot()
+            if sigs != self._sigs:
+                changed = next((p.name for p, a, b in zip(self.paths, sigs, self._sigs) if a != b), '?')
+                self._sigs = sigs
+                return f'changed:{changed}'
@@ -19,3 +19,23 @@ def inject_hardware_stubs(monkeypatch):
             sys.modules[name] = mod
     yield
     # cleanup not necessary; let pytest tear down interpreter state
+
+
+# Keep agent/heartbeat runs from writing the real memory.db (tasks now run in-process)
+@pytest.fixture(autouse=True)
+def isolate_memory(tmp_path, monkeypatch):
+    from samus_manus_mvp import memory as memory_mod
+    import samus_manus_mvp.samus_agent as agent
+
+    m = memory_mod.Memory(str(tmp_path / 'memory.db'))
+    monkeypatch.setattr(memory_mod, '_global_memory', m)
+    monkeypatch.setattr(agent, 'get_memory', lambda: m)
+    yield m
+
+
+# ...and the planner cache (a cached plan would skip the planner calls tests assert on)
+@pytest.fixture(autouse=True)
+def isolate_plan_cache(tmp_path, monkeypatch):
+    from samus_manus_mvp import plan_cache
+
+    monkeypatch.setattr(plan_cache, 'PLAN_CACHE_PATH', str(tmp_path / 'plan_cache.db'))
@@ -0,0 +1,88 @@
+import json
+import threading
+import types
+
+import samus_manus_mvp.samus_agent as agent
+from samus_manus_mvp.action_parser import ActionStreamParser, noisy_output, parse_plan, scan_actions
+
+
+def test_parser_emits_actions_as_they_complete():
+    text = ('Plan [below]:\n```json\n[{"type": "wait", "seconds": 0.5}, '
+            '{"type": "hotkey", "keys": ["ctrl", "]"]}, {"type": "type", "text": "a}\\"b"}, {"type": "done"}]\n```')
+    parser = ActionStreamParser()
+    seen = []
+    for i in range(0, len(text), 3):
+        seen.append(parser.feed(text[i:i + 3]))
+    assert [a for chunk in seen for a in chunk] == [
+        {'type': 'wait', 'seconds': 0.5}, {'type': 'hotkey', 'keys': ['ctrl', ']']},
+        {'type': 'type', 'text': 'a}"b'}, {'type': 'done'}]
+    assert parser.closed and not parser.errors
+    assert sum(1 for chunk in seen if chunk) == 4  # one at a time, not all at the end
+
+
+def test_scan_and_validate_noisy_output():
+    # nested `keys` arrays used to cut the old lazy `\[...\]` regex short
+    actions, problems = parse_plan(noisy_output(30))
+    assert len(actions) == 31 and actions[0] == {'type': 'hotkey', 'keys': ['ctrl', ']']} and problems == []
+    assert scan_actions('First {"type": "press", "key": "a"}, then {"type": "done"}.')[0] == [
+        {'type': 'press', 'key': 'a'}, {'type': 'done'}]
+
+    text = ('Try [{x}] first.\n```json\n[{"type": "click", "x": "10"}, {"type": "hotkey", "keys": ["a", 1]}, '
+            '{"type": "scroll"}, {bad}, {"type": "done", "why": "finished"}')
+    actions, problems = parse_plan(text)
+    assert len(actions) == 4
+    assert [(p['level'], p['code'], p['index'], p['field']) for p in problems] == [
+        ('error', 'invalid_json', 4, None), ('error', 'truncated', None, None),
+        ('error', 'missing_field', 1, 'y'), ('error', 'bad_type', 2, 'keys'),
+        ('error', 'unknown_type', 3, 'type'), ('warning', 'unknown_field', 4, 'why')]
+    assert text[problems[0]['offset']:].startswith('{bad}')
+
+
+def _fake_stream(monkeypatch, parts, gate=None):
+    def create(**kw):
+        assert kw.get('stream')
+        for n, part in enumerate(parts):
+            if n == 1 and gate is not None:
+                assert gate.wait(2)  # the rest of the plan only arrives after the first step ran
+            yield types.SimpleNamespace(choices=[types.SimpleNamespace(delta={'content': part})])
+
+    monkeypatch.setenv('OPENAI_API_KEY', 'test')
+    monkeypatch.setattr(agent, 'openai', types.SimpleNamespace(ChatCompletion=types.SimpleNamespace(create=create)))
+
+
+def test_plan_wrapped_in_an_object():
+    plan = [{'type': 'press', 'key': 'enter'}, {'type': 'done'}]
+    for key in ('actions', 'plan'):
+        text = 'Here you go: ' + json.dumps({'reasoning': 'short', key: plan})
+        assert parse_plan(text) == (plan, [])
+        assert agent.parse_actions('```json\n' + json.dumps({key: plan}) + '\n```') == plan
+    parser = ActionStreamParser()
+    emitted = [a for ch in json.dumps({'actions': plan}) for a in parser.feed(ch)]
+    assert emitted == plan and parser.finish() == [] and parser.errors == []
+
+
+def test_streamed_run_pipelines_safe_steps_and_rolls_back(tmp_path, monkeypatch):
+    ran = []
+    first_ran = threading.Event()
+
+    def execute(action, apply):  # receives compiled actions (action_registry.py)
+        ran.append(action.type)
+        if action.type == 'screenshot':
+            (tmp_path / 'early.png').write_bytes(b'png')
+        first_ran.set()
+        return 'DONE' if action.type == 'done' else 'ok'
+
+    monkeypatch.setattr(agent, 'execute_action', execute)
+    _fake_stream(monkeypatch, ['[{"type": "wait", "seconds": 0}, ', '{"type": "press", "key": "enter"}, {"type": "done"}]'],
+                 gate=first_ran)
+    res = agent.run_task('press enter', apply=False, approve_each=False, stream=True)
+    assert res['status'] == 'done' and ran == ['wait', 'press', 'done']
+    assert [s['step'] for s in res['steps']] == [1, 2, 3]
+
+    ran.clear()
+    out = str(tmp_path / 'early.png')
+    _fake_stream(monkeypatch, ['[{"type": "screenshot", "out": %s}, ' % json.dumps(out), '{"type": "format_disk"}]'])
+    res = agent.run_task('say hello streamed', apply=False, approve_each=False, stream=True)
+    assert ran[0] == 'screenshot' and res['rolled_back'] == [1]
+    assert not (tmp_path / 'early.png').exists()
+    assert res['plan'] == agent.fallback_plan('say hello streamed') and res['status'] == 'done'
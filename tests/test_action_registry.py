@@ -0,0 +1,43 @@
+import samus_manus_mvp.action_registry as registry
+import samus_manus_mvp.samus_agent as agent
+from samus_manus_mvp.action_parser import ACTION_SCHEMA, validate_actions
+from samus_manus_mvp.action_registry import Click, Invalid, Wait, compile_action, compile_plan
+
+
+def test_compile_coerces_once_and_dispatches_by_type():
+    typed = compile_plan([{'type': 'wait', 'seconds': '0'}, {'type': 'click', 'x': '10', 'y': 20.0},
+                          {'type': 'click'}, {'type': 'wait', 'seconds': 'soon'}, {'type': 'scroll'}])
+    assert typed[0] == Wait(seconds=0.0) and typed[1] == Click(x=10, y=20)
+    assert not hasattr(typed[1], '__dict__')  # slotted
+    assert [type(a) for a in typed[2:]] == [Click, Invalid, Invalid]
+    results = [agent.execute_action(a, apply=False) for a in typed]
+    assert results == ['waited 0.0s', '(sim) click at (10,20)', 'click: missing coordinates',
+                       "wait: invalid seconds 'soon'", 'Unknown action type: scroll']
+    # raw plan dicts still work and give the same results
+    assert agent.execute_action({'type': 'find-click'}, apply=False) == 'find_click: missing img path'
+    assert agent.execute_action({'type': 'hotkey', 'keys': ['ctrl', 's']}, apply=False) == "(sim) hotkey: ['ctrl', 's']"
+
+
+def test_plugin_registers_new_action_type(tmp_path, monkeypatch):
+    (tmp_path / 'scroll_plugin.py').write_text(
+        'from dataclasses import dataclass\n'
+        'from typing import ClassVar\n'
+        'from samus_manus_mvp.action_registry import Action\n\n'
+        '@dataclass(slots=True)\n'
+        'class Scroll(Action):\n'
+        "    type: ClassVar[str] = 'scroll'\n"
+        '    amount: int = 0\n\n'
+        'def register(register_action):\n'
+        "    register_action('scroll', Scroll, lambda a, apply: f'(sim) scroll {a.amount}', doc='scroll (amount)')\n")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    for name in ('REGISTRY', '_HANDLERS', '_FIELDS'):
+        monkeypatch.setattr(registry, name, dict(getattr(registry, name)))
+    monkeypatch.setattr(registry, 'PLUGIN_DOCS', [])
+    try:
+        assert registry.load_plugins('scroll_plugin, missing_plugin') == ['scroll_plugin']
+        assert registry.PLUGIN_DOCS == ['scroll (amount)']
+        assert agent.execute_action({'type': 'scroll', 'amount': '3'}, apply=False) == '(sim) scroll 3'
+        assert validate_actions([{'type': 'scroll', 'amount': 3}, {'type': 'done'}]) == []
+        assert type(compile_action({'type': 'scroll', 'amount': 'x'})) is Invalid
+    finally:
+        ACTION_SCHEMA.pop('scroll', None)
@@ -0,0 +1,90 @@
+import sqlite3
+import threading
+import time
+
+from samus_manus_mvp import activity, hardware_stubs
+from samus_manus_mvp.memory import Memory
+
+
+def test_last_activity_index_ignores_heartbeat_rows(tmp_path):
+    mem = Memory(str(tmp_path / 'memory.db'))
+    mem.add('approval', 'yes', {'task': 'x'})
+    user_ts = mem.last_activity(activity.ACTIVITY_SOURCES)
+    # lots of newer heartbeat / unrelated rows: the old 200-row scan would have missed the approval
+    for i in range(300):
+        mem.add('task', f'done {i}', {'source': 'heartbeat'})
+        mem.add('note', f'n {i}')
+    assert mem.last_activity(activity.ACTIVITY_SOURCES) == user_ts
+    assert mem.last_activity(['heartbeat:task']) > user_ts
+    mem.touch('action', ts=user_ts + 5)
+    assert mem.last_activity(activity.ACTIVITY_SOURCES) == user_ts + 5
+
+
+def test_add_returns_memory_id(tmp_path):
+    mem = Memory(str(tmp_path / 'memory.db'))
+    seen = []
+    mem.subscribe(seen.append)
+    ids = [mem.add(kind, 'x') for kind in ('note', 'note', 'task', 'approval', 'task')]
+    rows = mem._conn.execute('SELECT id, type FROM memories ORDER BY id').fetchall()
+    assert ids == [r[0] for r in rows] and [r['id'] for r in seen] == ids
+
+
+def test_concurrent_adds_from_scheduler_threads(tmp_path):
+    mem = Memory(str(tmp_path / 'memory.db'))
+    errors, ids = [], []
+
+    def worker(n):
+        try:
+            for i in range(50):
+                ids.append(mem.add('action', f'{n}-{i}', {'task': str(n)}))
+                mem.by_type('action', 5)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert errors == []
+    assert sorted(ids) == sorted(r['id'] for r in mem.all(1000)) and len(set(ids)) == 400
+
+
+def test_only_interactive_agent_runs_count_as_activity(monkeypatch, isolate_memory):
+    import samus_manus_mvp.samus_agent as agent
+
+    monkeypatch.setattr(agent, 'pyautogui', hardware_stubs.pyautogui)
+    plan = [{'type': 'press', 'key': 'a'}, {'type': 'done'}]
+    agent.run_task('unattended', apply=False, approve_each=False, plan=plan, source='heartbeat_run')
+    assert isolate_memory.last_activity(activity.ACTIVITY_SOURCES) is None
+    assert isolate_memory.last_activity(['heartbeat_run:task', 'heartbeat_run:action']) is not None
+    agent.run_task('by hand', apply=False, approve_each=False, plan=plan)
+    assert isolate_memory.last_activity(['task']) is not None
+    assert isolate_memory.last_activity(['action']) is not None
+
+
+def test_backfill_existing_db(tmp_path):
+    path = str(tmp_path / 'old_memory.db')
+    conn = sqlite3.connect(path)
+    conn.execute('CREATE TABLE memories (id INTEGER PRIMARY KEY, type TEXT, text TEXT, metadata TEXT, embedding TEXT, created_at REAL)')
+    conn.executemany('INSERT INTO memories (type, text, metadata, embedding, created_at) VALUES (?, ?, ?, NULL, ?)', [
+        ('action', 'click', '{}', 100.0), ('action', 'type', '{}', 150.0),
+        ('task', 'hb', '{"source": "heartbeat"}', 900.0),
+    ])
+    conn.commit()
+    conn.close()
+    mem = Memory(path)
+    assert mem.last_activity(activity.ACTIVITY_SOURCES) == 150.0
+    assert mem.last_activity() == 900.0
+
+
+def test_is_afk(tmp_path, monkeypatch):
+    mem = Memory(str(tmp_path / 'memory.db'))
+    monkeypatch.setattr(activity, 'os_idle_seconds', lambda: None)
+    assert not activity.is_afk(10, mem)  # no activity recorded yet
+    mem.touch('approval', ts=time.time() - 3600)
+    assert activity.is_afk(10, mem)
+    assert not activity.is_afk(0, mem)
+    # recent OS input wins over an old memory timestamp
+    monkeypatch.setattr(activity, 'os_idle_seconds', lambda: 5.0)
+    assert not activity.is_afk(10, mem)
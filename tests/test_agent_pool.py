@@ -0,0 +1,37 @@
+from samus_manus_mvp.agent_pool import AgentWorkerPool
+from samus_manus_mvp.memory import Memory
+
+
+def test_pool_runs_tasks_and_recycles_workers(tmp_path):
+    pool = AgentWorkerPool(size=1, max_tasks=1, env={'SAMUS_MEMORY_DB': str(tmp_path / 'memory.db')})
+    try:
+        output, res = pool.run('Take a screenshot', apply=False, timeout=60)
+        assert res['status'] == 'done'
+        assert 'Task complete' in output
+        pool.run('Take a screenshot', apply=False, timeout=60)
+        # max_tasks=1: every task gets a fresh worker
+        assert pool.stats['spawned'] == 2
+        assert pool.stats['recycled'] == 2
+        # workers use the package memory module, so SAMUS_MEMORY_DB is honoured
+        assert [r['text'] for r in Memory(str(tmp_path / 'memory.db')).by_type('task')] == ['Take a screenshot'] * 2
+    finally:
+        pool.close()
+
+
+def test_pool_timeout_kills_only_that_worker(tmp_path):
+    pool = AgentWorkerPool(size=1, env={'SAMUS_MEMORY_DB': str(tmp_path / 'memory.db')})
+    try:
+        pool.warm()
+        w = pool._idle.get()
+        pool._idle.put(w)
+        msg = w.request({'op': 'ping'}, timeout=10)
+        assert msg['ok']
+        # a hung worker is killed on timeout and replaced on the next run
+        _, res = pool.run('Take a screenshot', timeout=0.001)
+        assert res['status'] == 'timeout'
+        assert not w.alive()
+        _, res = pool.run('Take a screenshot', timeout=60)
+        assert res['status'] == 'done'
+        assert pool.stats['timeouts'] == 1
+    finally:
+        pool.close()
@@ -0,0 +1,51 @@
+import threading
+import time
+
+from samus_manus_mvp import heartbeat
+from samus_manus_mvp.announcer import ALERT, STATUS, TASK, Announcer
+
+
+def test_priorities_and_coalescing():
+    gate = threading.Event()
+    spoken = []
+
+    def slow_speak(text):
+        gate.wait(2)
+        spoken.append(text)
+
+    ann = Announcer(slow_speak, use_server=False).start()
+    ann.say('first')  # occupies the speaker until the gate opens
+    time.sleep(0.05)
+    ann.say('heartbeat 1', STATUS, key='heartbeat')
+    ann.say('Running task: a', TASK)
+    ann.say('heartbeat 2', STATUS, key='heartbeat')
+    ann.say('Auto-approved: a', ALERT)
+    assert ann.pending() == 3
+    gate.set()
+    assert ann.flush(2)
+    assert spoken == ['first', 'Auto-approved: a', 'Running task: a', 'heartbeat 2']
+    assert ann.stats['coalesced'] == 1
+    ann.close()
+
+
+def test_heartbeat_does_not_wait_for_speech(tmp_path, monkeypatch):
+    (tmp_path / 'tasks.json').write_text('{"tasks": [{"id": "task-1", "task": "Take a screenshot", "status": "pending"}]}')
+    monkeypatch.setattr(heartbeat, 'BASE', tmp_path)
+    monkeypatch.setattr(heartbeat, 'TASKS_PATH', tmp_path / 'tasks.json')
+    monkeypatch.setattr(heartbeat, 'STATE_PATH', tmp_path / 'heartbeat_state.json')
+    monkeypatch.setattr(heartbeat, 'run_task_inproc', lambda *a, **kw: ('Task complete', {'status': 'done'}))
+    spoken = []
+
+    def slow_speak(text):
+        time.sleep(0.3)
+        spoken.append(text)
+
+    monkeypatch.setattr(heartbeat, 'speak', slow_speak)
+    monkeypatch.setattr(heartbeat, 'ANNOUNCER', Announcer(lambda t: heartbeat.speak(t), use_server=False).start())
+    start = time.perf_counter()
+    heartbeat.check_once(announce=True)
+    assert time.perf_counter() - start < 0.3  # three announcements queued, none waited for
+    ann = heartbeat.ANNOUNCER
+    assert ann.flush(3)
+    ann.close()
+    assert any(s.startswith('Running task') for s in spoken)
@@ -0,0 +1,57 @@
+import json
+
+from samus_manus_mvp.approval_policy import ApprovalPolicy, load_policy
+from samus_manus_mvp.memory import Memory
+
+
+def test_policy_precedence_and_live_updates(tmp_path):
+    m = Memory(str(tmp_path / 'mem.db'))
+    m.add('approval', 'n', metadata={'action': {'type': 'click'}})
+    m.add('approval', 'y', metadata={'task': 'Take a screenshot'})
+    rules = tmp_path / 'approval_policy.json'
+    rules.write_text(json.dumps({'rules': [
+        {'effect': 'deny', 'type': 'hotkey'},
+        {'effect': 'allow', 'task': 'Open *'},
+        {'effect': 'allow', 'type': 're:^web_'},
+    ]}))
+
+    policy = load_policy(m, path=rules)
+    # deny rule beats remembered task approval
+    assert policy.decide('Take a screenshot', {'type': 'hotkey'}) == 'n'
+    # remembered exact task beats remembered action type
+    assert policy.decide('Take a screenshot', {'type': 'click'}) == 'y'
+    assert policy.decide('Something else', {'type': 'click'}) == 'n'
+    assert policy.decide('Open example.com', {'type': 'type'}) == 'y'
+    assert policy.decide('Anything', {'type': 'web_open'}) == 'y'
+    assert policy.decide('Anything', {'type': 'press'}) is None
+
+    # approvals written after loading are picked up through the memory hook
+    m.add('approval', 'y', metadata={'action': {'type': 'press'}})
+    assert policy.decide('Anything', {'type': 'press'}) == 'y'
+    policy.close()
+    m.add('approval', 'n', metadata={'action': {'type': 'press'}})
+    assert policy.decide('Anything', {'type': 'press'}) == 'y'
+
+
+def test_run_task_auto_approves_from_policy(tmp_path, monkeypatch, capsys):
+    import samus_manus_mvp.samus_agent as agent
+
+    m = Memory(str(tmp_path / 'mem.db'))
+    m.add('approval', 'y', metadata={'task': 'say hello policy'})
+    monkeypatch.setattr(agent, 'get_memory', lambda: m)
+    monkeypatch.setattr('builtins.input', lambda *a: (_ for _ in ()).throw(AssertionError('prompted')))
+    monkeypatch.setattr(agent, 'AUDIT_PATH', str(tmp_path / 'approval_audit.log'))
+
+    agent.run_task('say hello policy', apply=False, approve_each=True, max_steps=5)
+    out = capsys.readouterr().out
+    assert '(auto) approval from memory: y' in out
+    assert 'Task complete' in out
+    assert (tmp_path / 'approval_audit.log').read_text().count('"auto": true') == 2
+
+
+def test_policy_rejects_rule_without_fields():
+    try:
+        ApprovalPolicy([{'effect': 'allow'}])
+    except ValueError:
+        return
+    raise AssertionError('expected ValueError')
@@ -0,0 +1,50 @@
+import json
+
+import numpy as np
+
+from samus_manus_mvp import approval_cli
+from samus_manus_mvp.audit_columnar import export_columnar, load_columnar
+
+
+def _append(path, entries):
+    with open(path, 'a', encoding='utf-8') as f:
+        for e in entries:
+            f.write(json.dumps(e) + '\n')
+
+
+def test_columnar_export_is_incremental_and_vectorizable(tmp_path):
+    audit = tmp_path / 'approval_audit.log'
+    out = tmp_path / 'cols'
+    _append(audit, [
+        {'ts': 100.0, 'auto': True, 'approval': 'y', 'task': 'A', 'action': {'type': 'wait', 'seconds': 0.5}, 'step': 1},
+        {'ts': 200.0, 'auto': False, 'approval': 'n', 'task': 'B', 'action': {'type': 'type', 'text': 'hi'}, 'step': 1},
+    ])
+    assert export_columnar(audit, out) == {'rows': 2, 'added': 2}
+    assert export_columnar(audit, out)['added'] == 0
+
+    _append(audit, [{'ts': 300.0, 'auto': True, 'approval': 'y', 'task': 'A', 'action': {'type': 'hotkey', 'keys': ['ctrl', 's']}, 'step': 2}])
+    assert export_columnar(audit, out) == {'rows': 3, 'added': 1}
+
+    cols, dicts = load_columnar(out)
+    assert cols['ts'].dtype == np.float64
+    assert list(cols['ts']) == [100.0, 200.0, 300.0]
+    assert list(dicts['task'][cols['task']]) == ['A', 'B', 'A']
+    assert list(cols['auto']) == [1, 0, 1]
+    # flattened action fields, backfilled as missing for rows that predate them
+    assert np.isnan(cols['action.seconds'][1]) and cols['action.seconds'][0] == 0.5
+    assert list(cols['action.keys']) == [-1, -1, 0]
+    assert dicts['action.keys'][0] == 'ctrl+s'
+    # vectorized group-by on a time filter
+    recent = cols['ts'] >= 150
+    codes, counts = np.unique(cols['task'][recent], return_counts=True)
+    assert dict(zip(dicts['task'][codes], counts)) == {'A': 1, 'B': 1}
+
+
+def test_approval_cli_export(tmp_path, monkeypatch, capsys):
+    audit = tmp_path / 'approval_audit.log'
+    _append(audit, [{'ts': 1.0, 'auto': True, 'approval': 'y', 'task': 'T', 'action': {'type': 'done'}}])
+    monkeypatch.setattr(approval_cli, 'AUDIT_PATH', audit)
+
+    res = approval_cli.cmd_export('columnar', out=str(tmp_path / 'cols'))
+    assert res == {'rows': 1, 'added': 1}
+    assert 'exported 1 new rows' in capsys.readouterr().out
@@ -0,0 +1,95 @@
+import json
+import threading
+import time
+
+import pytest
+
+from samus_manus_mvp import audit_index, approval_cli
+
+
+def _write(path, entries, mode='w'):
+    with open(path, mode, encoding='utf-8') as f:
+        for e in entries:
+            f.write(json.dumps(e) + '\n')
+
+
+def test_fielded_query_filters_and_ranks(tmp_path):
+    audit = tmp_path / 'approval_audit.log'
+    now = time.time()
+    _write(audit, [
+        {'ts': now - 3 * 86400, 'auto': True, 'approval': 'y', 'task': 'Take a screenshot', 'action': {'type': 'click', 'x': 1, 'y': 2}},
+        {'ts': now - 60, 'auto': False, 'approval': 'n', 'task': 'Take a screenshot', 'action': {'type': 'click', 'x': 3, 'y': 4}},
+        {'ts': now - 30, 'auto': True, 'approval': 'y', 'task': 'Open notepad', 'action': {'type': 'click', 'x': 5, 'y': 6}},
+        {'ts': now - 10, 'auto': True, 'approval': 'y', 'task': 'Take a screenshot', 'action': {'type': 'screenshot', 'out': 's.png'}},
+    ])
+
+    hits = audit_index.search('type:click task:screenshot since:1d', audit)
+    assert len(hits) == 1
+    assert hits[0][1]['action'] == {'type': 'click', 'x': 3, 'y': 4}
+
+    hits = audit_index.search('screenshot auto:yes', audit)
+    assert [h[1]['action']['type'] for h in hits] == ['screenshot', 'click']
+
+    assert audit_index.search('notep*', audit)[0][1]['task'] == 'Open notepad'
+    with pytest.raises(ValueError):
+        audit_index.search('screenshot since:yesterday', audit)
+
+    # a task sentence: 'all' needs every word in one entry, 'any' ranks by the words shared
+    assert audit_index.search('Please take a screenshot of notepad', audit) == []
+    hits = audit_index.search('Please take a screenshot of notepad', audit, match='any')
+    assert len(hits) == 4 and hits[0][1]['task'] == 'Take a screenshot'
+    assert audit_index.search('notepad screenshot type:screenshot', audit, match='any')[0][1]['action']['out'] == 's.png'
+
+
+def test_index_picks_up_appended_lines(tmp_path):
+    audit = tmp_path / 'approval_audit.log'
+    _write(audit, [{'ts': 1.0, 'task': 'first', 'question': 'Type: hello'}])
+    idx = audit_index.AuditIndex(audit)
+    assert len(idx.search('hello')) == 1
+
+    _write(audit, [{'ts': 2.0, 'task': 'second', 'question': 'Type: hello again'}], mode='a')
+    hits = idx.search('hello')
+    assert len(hits) == 2
+    assert len(idx.entries) == 2
+
+
+def test_search_while_refreshing(tmp_path):
+    audit = tmp_path / 'approval_audit.log'
+    _write(audit, [{'ts': 1.0, 'task': 'seed', 'question': 'hello'}])
+    idx = audit_index.AuditIndex(audit)
+    errors, stop = [], threading.Event()
+
+    def writer():
+        for i in range(300):
+            _write(audit, [{'ts': float(i), 'task': f'task{i} hello', 'question': f'word{i} hello'}], mode='a')
+            idx.refresh()
+        stop.set()
+
+    def reader():
+        try:
+            while not stop.is_set():
+                idx.search('hel* word*')
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=writer)] + [threading.Thread(target=reader) for _ in range(3)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert errors == []
+    assert len(idx.search('hello', limit=1000)) == 301
+
+
+def test_approval_cli_search(tmp_path, monkeypatch, capsys):
+    audit = tmp_path / 'approval_audit.log'
+    _write(audit, [{'ts': time.time(), 'auto': True, 'approval': 'y', 'task': 'Take a screenshot',
+                    'action': {'type': 'screenshot', 'out': 'samus_screenshot.png'}}])
+    monkeypatch.setattr(approval_cli, 'AUDIT_PATH', audit)
+
+    approval_cli.cmd_search('type:screenshot', limit=5)
+    out = capsys.readouterr().out
+    assert 'Take a screenshot' in out
+    assert 'samus_screenshot.png' in out
+    approval_cli.cmd_search('since:soon', limit=5)
+    assert capsys.readouterr().out.startswith('Invalid query: invalid since:soon')
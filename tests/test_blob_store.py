@@ -0,0 +1,40 @@
+import json
+
+from samus_manus_mvp import approval_cli, heartbeat
+from samus_manus_mvp.blob_store import BlobStore, offload, task_output
+
+
+def test_put_dedupes_and_offload_keeps_tail(tmp_path):
+    store = BlobStore(tmp_path / 'blobs')
+    text = '\n'.join(f'> action {i}: {{"type": "wait"}}' for i in range(200)) + '\nTask complete'
+    a = store.put(text)
+    assert store.put(text) == a and len(list(store.digests())) == 1
+    assert store.get_text(a) == text
+    assert (tmp_path / 'blobs' / a[:2] / a[2:]).stat().st_size < len(text) / 4
+
+    summary, digest = offload(text, store)
+    assert digest == a and len(summary) < 300 and summary.endswith('Task complete')
+    assert offload('short', store) == ('short', None)
+    assert task_output({'result': summary, 'result_blob': digest}, store) == text
+    assert store.gc(keep=[]) == 1 and store.get(a) is None
+
+
+def test_heartbeat_offloads_output_and_cli_fetches_it(tmp_path, monkeypatch, capsys):
+    tasks_path = tmp_path / 'tasks.json'
+    tasks_path.write_text(json.dumps({'tasks': [{"id": "task-1", "task": "noisy", "status": "pending"}]}))
+    monkeypatch.setattr(heartbeat, 'BASE', tmp_path)
+    monkeypatch.setattr(heartbeat, 'TASKS_PATH', tasks_path)
+    monkeypatch.setattr(heartbeat, 'STATE_PATH', tmp_path / 'heartbeat_state.json')
+    output = 'x' * 5000 + '\nTask complete\n'
+    monkeypatch.setattr(heartbeat, 'run_task_inproc', lambda *a, **kw: (output, {'status': 'done'}))
+
+    heartbeat.check_once(announce=False)
+    task = json.loads(tasks_path.read_text())['tasks'][0]
+    assert task['result_blob'] and len(task['result']) < 300
+    assert 'Task complete' in task['result']
+
+    monkeypatch.setattr(approval_cli, 'BASE', tmp_path)
+    monkeypatch.setattr(approval_cli, 'TASKS_DB', tmp_path / 'tasks.db')
+    capsys.readouterr()
+    approval_cli.cmd_output('task-1')
+    assert capsys.readouterr().out == output + '\n'
@@ -0,0 +1,38 @@
+from samus_manus_mvp import context_pack
+from samus_manus_mvp.context_pack import estimate_tokens, pack, planner_context
+
+
+def test_estimate_tokens_is_roughly_word_based():
+    assert estimate_tokens('') == 0
+    assert estimate_tokens('take a screenshot') == 4
+    assert 8 <= estimate_tokens('Open https://example.com and click "More"') <= 16
+
+
+def test_pack_respects_budget_and_dedupes():
+    hits = [
+        {'score': 0.9, 'text': 'user prefers saving screenshots of the UI to disk', 'sources': {'memory': 1}},
+        {'score': 0.8, 'text': 'User prefers saving screenshots of the UI to disk.', 'sources': {'approvals': 1}},
+        {'score': 0.7, 'text': 'word ' * 500, 'sources': {'memory': 2}},
+        {'score': 0.1, 'text': 'notepad opened fine', 'sources': {'approvals': 2}},
+    ]
+    out = pack(hits, budget=60, max_snippet_tokens=200)
+    assert out['tokens'] <= 60
+    assert out['text'].count('screenshots') == 1  # near-duplicate dropped
+    assert 'notepad opened fine' in out['text']  # smaller, lower-ranked hit still fits
+    assert out['dropped'] == 2
+
+
+def test_planner_context_is_cached_per_task():
+    context_pack.clear_cache()
+    calls = []
+
+    def fake_retrieve(task, top_k=8, budget=0.5):
+        calls.append(task)
+        return {'fused': [{'score': 1.0, 'text': 'screenshots go to samus_screenshot.png', 'sources': {'memory': 1}}]}
+
+    a = planner_context('Take a screenshot', budget=50, retrieve=fake_retrieve)
+    b = planner_context('take a  SCREENSHOT', budget=50, retrieve=fake_retrieve)
+    assert a is b
+    assert calls == ['Take a screenshot']
+    assert 'samus_screenshot.png' in a['text']
+    context_pack.clear_cache()
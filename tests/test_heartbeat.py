@@ -40,4 +40,129 @@ def test_heartbeat_includes_approval_question(tmp_path, monkeypatch, capsys):
     # verify the task and the audit "question" (action summary) appear in the output
     assert 'Take a screenshot' in out
     assert 'audit' in out
-    assert 'screenshot' in out or 'samus_screenshot.png' in out
\ No newline at end of file
+    assert 'screenshot' in out or 'samus_screenshot.png' in out
+
+def test_heartbeat_runs_tasks_in_process(tmp_path, monkeypatch):
+    import subprocess
+
+    tasks_path = tmp_path / 'tasks.json'
+    tasks_path.write_text(json.dumps({'tasks': [
+        {"id": "task-1", "task": "say hi in process", "status": "pending", "created_at": int(time.time())}
+    ]}))
+    monkeypatch.setattr(heartbeat, 'BASE', tmp_path)
+    monkeypatch.setattr(heartbeat, 'TASKS_PATH', tasks_path)
+    monkeypatch.setattr(heartbeat, 'STATE_PATH', tmp_path / 'heartbeat_state.json')
+
+    def no_subprocess(*a, **k):
+        raise AssertionError('task should not spawn a subprocess')
+
+    monkeypatch.setattr(subprocess, 'run', no_subprocess)
+
+    heartbeat.check_once(announce=False)
+    task = json.loads(tasks_path.read_text())['tasks'][0]
+    assert task['status'] == 'done'
+    assert 'Task complete' in task['result']
+
+
+def test_heartbeat_reclaims_task_of_dead_runner(tmp_path, monkeypatch):
+    tasks_path = tmp_path / 'tasks.json'
+    tasks_path.write_text(json.dumps({'tasks': [
+        {"id": "task-1", "task": "say hi after a crash", "status": "pending", "created_at": int(time.time())}
+    ]}))
+    monkeypatch.setattr(heartbeat, 'BASE', tmp_path)
+    monkeypatch.setattr(heartbeat, 'TASKS_PATH', tasks_path)
+    monkeypatch.setattr(heartbeat, 'STATE_PATH', tmp_path / 'heartbeat_state.json')
+
+    queue = heartbeat.task_queue()
+    assert [t['id'] for t in queue.claim('crashed-runner', lease=-1)] == ['task-1']  # lease already over
+    assert queue.expired() == ['task-1']
+
+    heartbeat.check_once(announce=False)
+    task = queue.get('task-1')
+    assert task['status'] == 'done' and 'Task complete' in task['result']
+    assert queue.expired() == []
+
+
+def test_heartbeat_rearms_scheduled_tasks(tmp_path, monkeypatch):
+    tasks_path = tmp_path / 'tasks.json'
+    tasks_path.write_text(json.dumps({'tasks': [
+        {"id": "task-1", "task": "recurring", "status": "pending", "schedule": "*/5 * * * *", "next_run_at": time.time() - 1},
+        {"id": "task-2", "task": "later", "status": "pending", "schedule": "@daily"},
+    ]}))
+    monkeypatch.setattr(heartbeat, 'BASE', tmp_path)
+    monkeypatch.setattr(heartbeat, 'TASKS_PATH', tasks_path)
+    monkeypatch.setattr(heartbeat, 'STATE_PATH', tmp_path / 'heartbeat_state.json')
+
+    heartbeat.check_once(announce=False)
+    recurring, later = json.loads(tasks_path.read_text())['tasks']
+    assert recurring['status'] == 'pending' and recurring['last_status'] == 'done'
+    assert time.time() < recurring['next_run_at'] <= time.time() + 300
+    # not due yet: armed for its next slot, not run
+    assert later['status'] == 'pending' and 'result' not in later
+    assert later['next_run_at'] > time.time()
+
+
+def test_heartbeat_runs_task_graph_on_shared_session(tmp_path, monkeypatch):
+    tasks_path = tmp_path / 'tasks.json'
+    tasks_path.write_text(json.dumps({'tasks': [
+        {"id": "task-1", "task": "open browser", "status": "pending", "session": "s1"},
+        {"id": "task-2", "task": "step", "status": "pending", "session": "s1", "depends_on": ["task-1"]},
+        {"id": "task-3", "task": "step", "status": "pending", "session": "s1", "depends_on": "task-2"},
+        {"id": "task-4", "task": "after missing", "status": "pending", "depends_on": "task-99"},
+        {"id": "task-5", "task": "after later", "status": "pending", "depends_on": "task-6"},
+        {"id": "task-6", "task": "later", "status": "pending", "schedule": "@daily"},
+    ]}))
+    monkeypatch.setattr(heartbeat, 'BASE', tmp_path)
+    monkeypatch.setattr(heartbeat, 'TASKS_PATH', tasks_path)
+    monkeypatch.setattr(heartbeat, 'STATE_PATH', tmp_path / 'heartbeat_state.json')
+    agent = heartbeat._agent()
+    monkeypatch.setattr(agent, 'WEB_HANDS_KEEP', set())
+    calls, plans = [], []
+    monkeypatch.setattr(agent, 'plan_with_openai', lambda task: plans.append(task) or [{'type': 'done'}])
+
+    def fake_run(task_text, apply=False, plan=None, session=None):
+        calls.append((task_text, session, 's1' in agent.WEB_HANDS_KEEP))
+        return 'ok', {'status': 'done'}
+
+    monkeypatch.setattr(heartbeat, 'run_task_inproc', fake_run)
+    closed = []
+    monkeypatch.setattr(agent, 'close_web_session', lambda s: closed.append(s))
+
+    heartbeat.check_once(announce=False)
+    by_id = {t['id']: t for t in json.loads(tasks_path.read_text())['tasks']}
+    assert [c[0] for c in calls] == ['open browser', 'step', 'step']
+    assert all(session == 's1' and kept for _, session, kept in calls)
+    assert closed == ['s1']  # closed once, after the last task on the session
+    assert plans == ['step']  # identical tasks planned once per run
+    assert [by_id[i]['status'] for i in ('task-1', 'task-2', 'task-3')] == ['done'] * 3
+    assert by_id['task-4']['status'] == 'blocked'
+    assert by_id['task-5']['status'] == 'pending'  # waits for task-6
+
+
+def test_heartbeat_runs_planned_web_actions_on_browser_lane(tmp_path, monkeypatch):
+    import threading
+
+    tasks_path = tmp_path / 'tasks.json'
+    tasks_path.write_text(json.dumps({'tasks': [
+        {"id": "task-1", "task": "look up the docs", "status": "pending"},
+        {"id": "task-2", "task": "take a screenshot", "status": "pending"},
+    ]}))
+    monkeypatch.setattr(heartbeat, 'BASE', tmp_path)
+    monkeypatch.setattr(heartbeat, 'TASKS_PATH', tasks_path)
+    monkeypatch.setattr(heartbeat, 'STATE_PATH', tmp_path / 'heartbeat_state.json')
+    agent = heartbeat._agent()
+    web = [{'type': 'web_open', 'url': 'https://docs.python.org'}, {'type': 'done'}]
+    monkeypatch.setattr(agent, 'plan_with_openai',
+                        lambda task: web if 'docs' in task else [{'type': 'screenshot'}, {'type': 'done'}])
+    monkeypatch.setattr(agent, 'close_web_session', lambda s: None)
+    lanes = {}
+
+    def fake_run(task_text, apply=False, plan=None, session=None):
+        lanes[task_text] = (threading.current_thread().name, plan)
+        return 'ok', {'status': 'done'}
+
+    monkeypatch.setattr(heartbeat, 'run_task_inproc', fake_run)
+    heartbeat.check_once(announce=False)
+    # the text says nothing about the web, but its plan does: Playwright needs the session's thread
+    assert lanes['look up the docs'][0].startswith('task-browser:default') and lanes['look up the docs'][1] == web
+    assert lanes['take a screenshot'][0].startswith('task-compute')
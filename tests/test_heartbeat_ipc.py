@@ -0,0 +1,69 @@
+import json
+import os
+import threading
+
+from samus_manus_mvp import heartbeat, heartbeat_ipc
+
+
+def test_control_api_drives_heartbeat_without_restart(tmp_path, monkeypatch):
+    monkeypatch.setattr(heartbeat, 'TASKS_PATH', tmp_path / 'tasks.json')
+    monkeypatch.setattr(heartbeat, 'STATE_PATH', tmp_path / 'heartbeat_state.json')
+    monkeypatch.setattr(heartbeat, 'WAKER', heartbeat.Waker())
+    monkeypatch.setattr(heartbeat_ipc, 'TOKEN_PATH', tmp_path / 'heartbeat_ipc.token')
+    server = heartbeat.start_control_server()
+    try:
+        state = heartbeat.load_state()
+        assert state['ipc_port'] == server.port
+        # the token lives in an owner-only file, not in the shared state file
+        assert not state.get('ipc_token') and heartbeat_ipc.read_token() == server.token
+        if os.name == 'posix':
+            assert os.stat(heartbeat_ipc.TOKEN_PATH).st_mode & 0o777 == 0o600
+
+        got = []
+
+        def listen():
+            for ev in heartbeat_ipc.events(state=state, timeout=5):
+                got.append(ev)
+                if ev['event'] == 'state':
+                    return
+
+        t = threading.Thread(target=listen, daemon=True)
+        t.start()
+        # wait until the SSE subscriber is registered before publishing
+        for _ in range(100):
+            if heartbeat.EVENTS._subs:
+                break
+            threading.Event().wait(0.01)
+
+        assert heartbeat_ipc.set_interval(45, state=state) == {'ok': True, 'interval': 45}
+        assert heartbeat.WAKER.wait(1) == 'interval'
+        assert json.loads((tmp_path / 'heartbeat_state.json').read_text())['interval'] == 45
+        t.join(5)
+        assert got and got[-1]['interval'] == 45
+
+        reply = heartbeat_ipc.enqueue('Take a screenshot', state=state, timeout=30, auto_approve=True,
+                                      actions=[{'type': 'type', 'text': 'x'}])
+        assert reply['task']['id'] == 'task-1'
+        assert heartbeat.WAKER.wait(1) == 'enqueue'
+        stored = json.loads((tmp_path / 'tasks.json').read_text())['tasks'][0]
+        assert stored['timeout'] == 30 and 'auto_approve' not in stored and 'actions' not in stored
+
+        remote = heartbeat_ipc.get_state(state=state)
+        assert remote['pending'] == 1 and 'ipc_token' not in remote
+        assert heartbeat_ipc.trigger(state=state) == {'ok': True}
+        # wrong token is rejected
+        assert heartbeat_ipc.get_state(state=dict(state, ipc_token='nope')) is None
+    finally:
+        server.stop()
+
+
+def test_ui_set_interval_prefers_ipc(tmp_path, monkeypatch):
+    from samus_manus_mvp import heartbeat_ui
+
+    monkeypatch.setattr(heartbeat_ui, 'STATE_PATH', tmp_path / 'heartbeat_state.json')
+    heartbeat_ui.save_state({'ipc_port': 1, 'ipc_token': 't'})
+    sent = []
+    monkeypatch.setattr(heartbeat_ipc, 'set_interval', lambda v, state=None: sent.append(v) or {'ok': True})
+    monkeypatch.setattr(heartbeat_ui, 'stop_heartbeat', lambda: (_ for _ in ()).throw(AssertionError('no restart')))
+    assert heartbeat_ui.set_interval(90, restart=True) is True
+    assert sent == [90]
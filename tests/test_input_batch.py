@@ -0,0 +1,39 @@
+import samus_manus_mvp.samus_agent as agent
+from samus_manus_mvp import hardware_stubs, input_batch
+
+
+def test_keyboard_steps_run_as_one_burst(monkeypatch):
+    pg, clip = hardware_stubs.pyautogui, hardware_stubs.pyperclip
+    monkeypatch.setattr(agent, 'pyautogui', pg)
+    monkeypatch.setattr(input_batch, 'pyperclip', clip)
+    monkeypatch.setattr(pg, 'PAUSE', 0.1)
+    monkeypatch.setattr(pg, 'calls', [])
+    monkeypatch.setattr(clip, 'buffer', 'user clipboard')
+    sleeps = []
+    monkeypatch.setattr(input_batch.time, 'sleep', sleeps.append)
+
+    letter = 'Dear team, ' + 'x' * 300
+    plan = [{'type': 'click', 'x': 10, 'y': 20}, {'type': 'type', 'text': 'Ada'}, {'type': 'press', 'key': 'tab'},
+            {'type': 'type', 'text': 'Lovelace, Analytical Engine'}, {'type': 'press', 'key': 'tab'},
+            {'type': 'type', 'text': letter}, {'type': 'hotkey', 'keys': ['ctrl', 's']},
+            {'type': 'click', 'x': 30, 'y': 40}, {'type': 'done'}]
+    res = agent.run_task('fill the form', apply=True, approve_each=False, plan=plan)
+    assert res['status'] == 'done'
+
+    names = [(c[0], c[2]) for c in pg.calls]
+    assert names == [('click', 0.1), ('write', 0.0), ('press', 0.0), ('write', 0.0), ('press', 0.0),
+                     ('hotkey', 0.0), ('hotkey', 0.0), ('click', 0.1)]
+    writes = [c[1] for c in pg.calls if c[0] == 'write']
+    assert writes[0] == ('Ada', input_batch.TYPE_INTERVAL)
+    assert writes[1][1] < input_batch.TYPE_INTERVAL  # longer text is typed faster
+    assert pg.calls[5][1] == input_batch.PASTE_KEYS and res['steps'][5]['result'].startswith('pasted')
+    assert clip.buffer == 'user clipboard' and pg.PAUSE == 0.1
+    assert sleeps.count(input_batch.SETTLE_PAUSE) == 1  # one settle for the whole burst
+
+
+def test_form_fill_estimate_is_several_times_faster(monkeypatch):
+    monkeypatch.setattr(input_batch, 'pyperclip', hardware_stubs.pyperclip)
+    plan = input_batch.form_fill(10, 30)
+    assert input_batch.estimate_seconds(plan, batched=False) > 3 * input_batch.estimate_seconds(plan, batched=True)
+    long_text = input_batch.form_fill(5, 400)
+    assert input_batch.estimate_seconds(long_text, batched=False) > 10 * input_batch.estimate_seconds(long_text)
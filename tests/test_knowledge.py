@@ -27,3 +27,9 @@ def test_retrieve_memories_and_approvals(tmp_path, monkeypatch):
     assert isinstance(res.get('memory'), list)
     assert len(res.get('approvals', [])) == 1
     assert 'Screenshot' in res['approvals'][0].get('question')
+    # fused list carries provenance for the approval hit
+    assert any('approvals' in h['sources'] for h in res['fused'])
+    assert res['stats']['memory']['ok'] is True
+    # a natural-language task finds the approval through the words it shares with it
+    res = knowledge.retrieve('please take another screenshot of the settings page', top_k=5)
+    assert len(res.get('approvals', [])) == 1
@@ -0,0 +1,58 @@
+import json
+import time
+
+from samus_manus_mvp import heartbeat
+from samus_manus_mvp.metrics import Registry, append_run, summarize
+
+
+def test_registry_renders_prometheus_text():
+    reg = Registry()
+    reg.counter('runs_total', 'Runs').inc(status='done')
+    reg.counter('runs_total').inc(2, status='done')
+    h = reg.histogram('latency_seconds', 'Latency', buckets=(0.1, 1))
+    h.observe(0.05)
+    h.observe(0.1)
+    h.observe(3)
+    text = reg.render()
+    assert '# TYPE runs_total counter' in text
+    assert 'runs_total{status="done"} 3' in text
+    assert 'latency_seconds_bucket{le="0.1"} 2' in text
+    assert 'latency_seconds_bucket{le="+Inf"} 3' in text
+    assert 'latency_seconds_count 3' in text
+    assert h.sum() == 3.15
+
+
+def test_heartbeat_records_run_metrics(tmp_path, monkeypatch):
+    tasks_path = tmp_path / 'tasks.json'
+    tasks_path.write_text(json.dumps({'tasks': [
+        {"id": "task-1", "task": "say hi", "status": "pending", "created_at": int(time.time())}
+    ]}))
+    monkeypatch.setattr(heartbeat, 'BASE', tmp_path)
+    monkeypatch.setattr(heartbeat, 'TASKS_PATH', tasks_path)
+    monkeypatch.setattr(heartbeat, 'STATE_PATH', tmp_path / 'heartbeat_state.json')
+    before = heartbeat.TASKS_TOTAL.get(status='done')
+
+    heartbeat.check_once(announce=False)
+    heartbeat.check_once(announce=False)
+
+    runs = [json.loads(l) for l in (tmp_path / 'heartbeat_metrics.jsonl').read_text().splitlines()]
+    assert [r['tasks'] for r in runs] == [1, 0]
+    assert runs[0]['mem_n'] == 2 and len(runs[0]['task_s']) == 1
+    assert runs[0]['tasks_b'] > 0 and runs[0]['db_b'] > 0
+    assert heartbeat.TASKS_TOTAL.get(status='done') == before + 1
+    assert 'heartbeat_check_seconds_count' in heartbeat.render_prometheus()
+
+    day = summarize(tmp_path / 'heartbeat_metrics.jsonl', days=1)[-1]
+    assert day['runs'] == 2 and day['tasks'] == 1 and day['task_p50'] is not None
+
+
+def test_append_run_rotates(tmp_path, monkeypatch):
+    from samus_manus_mvp import metrics
+
+    monkeypatch.setattr(metrics, 'MAX_LOG_BYTES', 50)
+    path = tmp_path / 'm.jsonl'
+    for i in range(5):
+        append_run(path, {'ts': time.time(), 'dur': i})
+    assert (tmp_path / 'm.jsonl.1').exists()
+    # one rotated generation is kept; records stay in order
+    assert [r['dur'] for r in metrics.load_runs(path)] == [2, 3, 4]
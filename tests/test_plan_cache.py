@@ -0,0 +1,48 @@
+import time
+import types
+
+import samus_manus_mvp.samus_agent as agent
+from samus_manus_mvp.plan_cache import PlanCache, normalize_task
+
+
+def test_keying_ttl_invalidation_and_stats(tmp_path):
+    cache = PlanCache(str(tmp_path / 'plan_cache.db'))
+    plan = [{'type': 'screenshot', 'out': 's.png'}, {'type': 'done'}]
+    assert normalize_task("  Open  Site and CLICK 'More Info'. ") == "open site and click 'More Info'"
+
+    cache.put('Take a screenshot', plan, persona='hanna', model='m1', schema='v1')
+    assert cache.get('take  a SCREENSHOT', persona='hanna', model='m1', schema='v1') == plan
+    assert cache.get('Take a screenshot', persona='other', model='m1', schema='v1') is None
+    assert cache.get('Take a screenshot', persona='hanna', model='m2', schema='v1') is None
+    assert cache.get('Take a screenshot', persona='hanna', model='m1', schema='v2') is None
+
+    cache.put('expiring', plan, ttl=0.01)
+    time.sleep(0.02)
+    assert cache.get('expiring') is None
+
+    assert cache.invalidate('TAKE A SCREENSHOT') == 1
+    assert cache.get('Take a screenshot', persona='hanna', model='m1', schema='v1') is None
+    st = cache.stats()
+    assert (st['hits'], st['misses'], st['stores'], st['expired'], st['invalidated']) == (1, 5, 2, 1, 1)
+    assert st['entries'] == 0 and abs(st['hit_rate'] - 1 / 6) < 1e-9
+
+
+def test_agent_reuses_cached_plan(tmp_path, monkeypatch):
+    calls = []
+
+    def create(**kw):
+        calls.append(kw)
+        msg = types.SimpleNamespace(content='[{"type": "screenshot", "out": "a.png"}, {"type": "done"}]')
+        return types.SimpleNamespace(choices=[types.SimpleNamespace(message=msg)])
+
+    monkeypatch.setenv('OPENAI_API_KEY', 'test')
+    monkeypatch.setattr(agent, 'openai', types.SimpleNamespace(ChatCompletion=types.SimpleNamespace(create=create)))
+    cache = PlanCache(str(tmp_path / 'plan_cache.db'))
+    monkeypatch.setattr(agent, 'get_plan_cache', lambda: cache)
+
+    first = agent.plan_with_openai('Take a screenshot')
+    second = agent.plan_with_openai('take a screenshot')
+    assert first == second and len(calls) == 1
+    agent.plan_with_openai('Take a screenshot', use_cache=False)
+    assert len(calls) == 2
+    assert cache.stats()['hits'] == 1
@@ -0,0 +1,75 @@
+import threading
+import time
+import types
+
+import samus_manus_mvp.samus_agent as agent
+from samus_manus_mvp.plan_cache import PlanCache
+from samus_manus_mvp.plan_race import RacePolicy, is_generic, race
+
+SHOT = [{'type': 'screenshot', 'out': 's.png'}, {'type': 'done'}]
+LLM = [{'type': 'wait_settle', 'timeout': 1.0}, {'type': 'screenshot', 'out': 'llm.png'}, {'type': 'done'}]
+
+
+def test_race_preempts_waits_for_deadline_and_hands_over_late_plans():
+    release, late = threading.Event(), []
+
+    def slow_llm():
+        release.wait(5)
+        return LLM
+
+    policy = RacePolicy([{'effect': 'wait', 'task': 're:.* then '}, {'effect': 'preempt', 'task': 'Take a *', 'after': 0}],
+                        grace=0.05)
+    assert policy.preempt_after('Take a screenshot', SHOT) == 0
+    assert policy.preempt_after('Shot then mail', SHOT) is None
+    assert policy.preempt_after('screenshot please', SHOT) == 0.05
+    assert is_generic('say hi', [{'type': 'type', 'text': 'say hi'}, {'type': 'done'}])
+    assert policy.preempt_after('say hi', [{'type': 'type', 'text': 'say hi'}, {'type': 'done'}]) is None
+
+    # a specific fallback plan pre-empts after the grace period; the slow LLM plan arrives late
+    plan, t = race(slow_llm, lambda: SHOT, deadline=5, preempt_after=lambda p: 0.05, on_late=late.append)
+    assert plan == SHOT and (t['winner'], t['reason'], t['llm_s']) == ('fallback', 'preempted', None)
+    assert t['waited_s'] < 1 and t['fallback_s'] >= 0
+    release.set()
+    for _ in range(100):
+        if late:
+            break
+        time.sleep(0.01)
+    assert late == [LLM]
+
+    # no pre-emption: the deadline decides; a fast LLM wins, a failed one hands over to the fallback
+    plan, t = race(lambda: time.sleep(0.5) or LLM, lambda: SHOT, deadline=0.05)
+    assert plan == SHOT and t['reason'] == 'deadline'
+    plan, t = race(lambda: LLM, lambda: SHOT, deadline=2, preempt_after=lambda p: 1)
+    assert plan == LLM and t['winner'] == 'llm' and t['llm_s'] is not None
+    plan, t = race(lambda: None, lambda: SHOT, deadline=2)
+    assert plan == SHOT and t['reason'] == 'llm_failed' and t['waited_s'] < 1
+
+
+def test_agent_race_records_timings_and_caches_late_llm_plan(tmp_path, monkeypatch, isolate_memory):
+    release, calls = threading.Event(), []
+
+    def create(**kw):
+        calls.append(kw)
+        release.wait(5)
+        msg = types.SimpleNamespace(content='[{"type": "press", "key": "enter"}, {"type": "done"}]')
+        return types.SimpleNamespace(choices=[types.SimpleNamespace(message=msg)])
+
+    monkeypatch.setenv('OPENAI_API_KEY', 'test')
+    monkeypatch.setattr(agent, 'openai', types.SimpleNamespace(ChatCompletion=types.SimpleNamespace(create=create)))
+    monkeypatch.setattr(agent, 'PLAN_DEADLINE', 0.05)
+    cache = PlanCache(str(tmp_path / 'plan_cache.db'))
+    monkeypatch.setattr(agent, 'get_plan_cache', lambda: cache)
+
+    assert agent.plan_with_openai('say hi', race=True) == agent.fallback_plan('say hi')
+    rec = [r for r in isolate_memory.all(20) if r.get('type') == 'plan_race'][0]
+    assert rec['text'] == 'fallback' and rec['metadata']['reason'] == 'deadline'
+    assert rec['metadata']['task'] == 'say hi' and rec['metadata']['llm_s'] is None
+
+    release.set()
+    for _ in range(100):
+        if cache.get('say hi', model=agent.PLANNER_MODEL, schema=agent.ACTION_SCHEMA_VERSION):
+            break
+        time.sleep(0.01)
+    # the late LLM plan was cached, so the next run gets it without another request
+    assert agent.plan_with_openai('say hi', race=True) == [{'type': 'press', 'key': 'enter'}, {'type': 'done'}]
+    assert len(calls) == 1
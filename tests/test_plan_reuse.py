@@ -0,0 +1,59 @@
+import json
+import types
+
+import samus_manus_mvp.samus_agent as agent
+from samus_manus_mvp.plan_reuse import PlanLibrary, extract, find_reusable, savings_report
+
+
+def test_adapts_parameters_and_rejects_unsafe_reuse():
+    plan = [{'type': 'web_open', 'url': 'https://example.com'},
+            {'type': 'web_click', 'selector': 'text=More information...'}, {'type': 'done'}]
+    lib = PlanLibrary([('Open example.com and click "More information..."', plan)])
+    assert extract('Open example.com and click "More information..."')[0] == 'open <url> and click <quoted>'
+
+    hit = find_reusable('open python.org and click "Downloads"', lib)
+    assert hit['plan'][0]['url'] == 'https://python.org'
+    assert hit['plan'][1]['selector'] == 'text=Downloads'
+    # the old plan never mentions the old quoted text literally, so it can't be adapted
+    lib = PlanLibrary([('Open example.com and click "More"', [{'type': 'web_open', 'url': 'https://example.com'}])])
+    assert find_reusable('Open python.org and click "Docs"', lib) is None
+    assert find_reusable('make an approval', lib) is None
+    # a task that differs in a non-parameter word is a different task, however similar
+    lib = PlanLibrary([("Delete every column named 'tmp'", [{'type': 'web_click_text', 'text': 'tmp'}])])
+    assert find_reusable("Delete every row named 'old'", lib) is None
+    assert find_reusable("delete every column named 'old'", lib)['plan'] == [{'type': 'web_click_text', 'text': 'old'}]
+    # only parameter fields are rewritten, never the action type or session name
+    plan = [{'type': 'web_open', 'url': 'https://example.com', 'session': 'open'},
+            {'type': 'web_click_text', 'text': 'open', 'session': 'open'}]
+    lib = PlanLibrary([("Open example.com and click 'open'", plan)])
+    hit = find_reusable("Open example.com and click 'Docs'", lib)
+    assert hit['plan'][1] == {'type': 'web_click_text', 'text': 'Docs', 'session': 'open'}
+    assert hit['plan'][0]['session'] == 'open'
+
+    # the stored plans are replayed: one that never mentions its typed text can't be adapted
+    typed = [{'type': 'type', 'text': 'hi'}, {'type': 'done'}]
+    r = savings_report([('Type hi in Notepad', True, typed), ('Type bye in Notepad', True, None),
+                        ('Type bye in Notepad', True, None), ('Take a screenshot', False, None),
+                        ('Type x in Calc', True, [{'type': 'open_app', 'app': 'calc'}]), ('Type y in Calc', True, None)])
+    assert (r['exact'], r['adapted'], r['llm']) == (0, 2, 4)
+    assert r['examples'] == [('Type bye in Notepad', 'Type hi in Notepad')] * 2
+
+
+def test_agent_reuses_successful_plan_from_memory(monkeypatch):
+    calls = []
+    monkeypatch.setenv('OPENAI_API_KEY', 'test')
+    monkeypatch.setattr(agent, 'openai', types.SimpleNamespace(ChatCompletion=types.SimpleNamespace(
+        create=lambda **kw: calls.append(kw))))
+    mem = agent.get_memory()
+    plan = [{'type': 'press', 'key': 'win'}, {'type': 'type', 'text': 'hello'}, {'type': 'done'}]
+    mem.add('plan', json.dumps(plan), metadata={'task': 'Type hello in Notepad'})
+    mem.add('task_result', 'done', metadata={'task': 'Type hello in Notepad'})
+
+    assert agent.plan_with_openai('Type goodbye in Notepad')[1] == {'type': 'type', 'text': 'goodbye'}
+    assert agent.plan_with_openai('type goodbye in notepad')[1]['text'] == 'goodbye'  # now an exact cache hit
+    assert calls == []
+    # an adapted plan that doesn't validate is neither run nor cached: the planner is asked
+    mem.add('plan', json.dumps([{'type': 'open_app', 'app': 'calc'}, {'type': 'done'}]), metadata={'task': 'Type 1 in Calc'})
+    mem.add('task_result', 'done', metadata={'task': 'Type 1 in Calc'})
+    assert agent.plan_with_openai('Type 2 in Calc') == agent.fallback_plan('Type 2 in Calc')
+    assert len(calls) == 1
@@ -0,0 +1,40 @@
+import threading
+import time
+
+from samus_manus_mvp.retrieval import RetrievalEngine, Source
+
+
+def test_engine_runs_sources_in_parallel_and_fuses():
+    # both sources must be inside their query at once to pass the barrier; run one after
+    # the other, the first would time out waiting for the second
+    both = threading.Barrier(2, timeout=5)
+
+    def overlapping(name, items):
+        def fn(query, top_k):
+            both.wait()
+            return [(s, {'text': t}) for s, t in items]
+        return Source(name, fn)
+
+    engine = RetrievalEngine([
+        overlapping('a', [(0.9, 'open notepad'), (0.5, 'take a screenshot')]),
+        overlapping('b', [(12.0, 'take a screenshot'), (3.0, 'click ok')]),
+    ], budget=10.0)
+    out = engine.search('x', top_k=5)
+    assert out['stats']['a']['ok'] and out['stats']['b']['ok']
+
+    top = out['results'][0]
+    assert top['text'] == 'take a screenshot'
+    assert top['sources'] == {'a': 2, 'b': 1}
+    assert {r['text'] for r in out['results']} == {'open notepad', 'take a screenshot', 'click ok'}
+
+
+def test_engine_drops_sources_over_budget():
+    fast = Source('fast', lambda q, k: [(1.0, {'text': 'fast hit'})])
+    slow = Source('slow', lambda q, k: time.sleep(1.0) or [(1.0, {'text': 'slow hit'})], timeout=0.05)
+    broken = Source('broken', lambda q, k: 1 / 0)
+
+    out = RetrievalEngine([fast, slow, broken], budget=0.5, fusion='weighted').search('q')
+    assert [r['text'] for r in out['results']] == ['fast hit']
+    assert out['stats']['slow']['error'] == 'timeout'
+    assert out['stats']['broken']['ok'] is False
+    assert out['elapsed'] < 0.5
@@ -60,3 +60,15 @@ def test_plan_with_persona_is_sent_to_openai(tmp_path, monkeypatch):
     # ensure persona text was included in the prompt passed to OpenAI
     assert any('Persona: be concise and cautious' in m['content'] for m in called['messages'])
 
+
+
+def test_run_task_returns_structured_steps(tmp_path, monkeypatch):
+    import io
+    import samus_manus_mvp.samus_agent as agent
+
+    buf = io.StringIO()
+    res = run_task('say hello structured', apply=False, approve_each=False, max_steps=10, out=buf)
+    assert res['status'] == 'done'
+    assert [s['action']['type'] for s in res['steps']] == ['type', 'done']
+    assert res['steps'][-1]['result'] == 'DONE'
+    assert 'Task complete' in buf.getvalue()
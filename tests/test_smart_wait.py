@@ -0,0 +1,50 @@
+import samus_manus_mvp.samus_agent as agent
+from samus_manus_mvp import hardware_stubs, smart_wait
+
+
+class FakeClock:
+    def __init__(self):
+        self.now, self.sleeps = 0.0, []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, s):
+        self.sleeps.append(round(s, 4))
+        self.now += s
+
+
+def test_polls_with_backoff_until_condition_or_timeout(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(smart_wait.time, 'monotonic', clock.monotonic)
+    monkeypatch.setattr(smart_wait.time, 'sleep', clock.sleep)
+    calls = iter([None, None, None, (5, 6)])
+    assert smart_wait.poll(lambda: next(calls), timeout=5) == ((5, 6), clock.now, 4)
+    assert clock.sleeps == [0.05, 0.075, 0.1125]
+
+    # the screen redraws twice, then holds still: settled after `stable` seconds, not the timeout
+    frames = iter([b'\x00' * 4, b'\xff' * 4, b'\x00' * 4] + [b'\x00' * 4] * 50)
+    monkeypatch.setattr(smart_wait, 'thumbnail', lambda region=None: next(frames))
+    clock.now = 0.0
+    ok, elapsed, _ = smart_wait.wait_settle(timeout=10, stable=0.3)
+    assert ok and 0.3 <= elapsed < 1.0
+
+    monkeypatch.setattr(smart_wait, 'thumbnail', lambda region=None: b'\x00' * 4)
+    clock.now = 0.0
+    ok, elapsed, _ = smart_wait.wait_change(timeout=2)
+    assert not ok and elapsed == 2
+
+
+def test_agent_runs_condition_waits(monkeypatch):
+    monkeypatch.setattr(agent, 'pyautogui', hardware_stubs.pyautogui)
+    seen = []
+    monkeypatch.setattr(smart_wait, 'wait_settle', lambda region, timeout, stable: (seen.append(timeout), (True, 0.12, 3))[1])
+    monkeypatch.setattr(smart_wait, 'wait_image', lambda img, timeout, confidence: ((10, 20), 0.4, 5))
+    plan = agent.fallback_plan('Take a screenshot')
+    assert plan[0] == {'type': 'wait_settle', 'timeout': 2.0} and not any(a['type'] == 'wait' for a in plan)
+    assert agent.execute_action(plan[0], apply=True) == 'settled after 0.12s (3 polls)' and seen == [2.0]
+    assert agent.execute_action({'type': 'wait_image', 'img': 'ok.png', 'timeout': '3'}, apply=True) == \
+        'ok.png at (10, 20) after 0.40s (5 polls)'
+    assert agent.execute_action(plan[0], apply=False) == '(sim) wait_settle screen'
+    web = agent.fallback_plan("Open example.com and click 'More information...'")
+    assert [a['type'] for a in web][:3] == ['web_open', 'web_click_text', 'web_wait']
@@ -0,0 +1,43 @@
+import json
+import time
+
+from samus_manus_mvp.state_store import StateStore
+
+
+def test_atomic_write_version_and_cached_reads(tmp_path):
+    path = tmp_path / 'heartbeat_state.json'
+    store = StateStore(path)
+    seen = []
+    store.subscribe(seen.append)
+    store.write({'interval': 60})
+    store.update({'auto_apply': True})
+    assert json.loads(path.read_text()) == {'interval': 60, 'auto_apply': True, '_version': 2}
+    assert [s['_version'] for s in seen] == [1, 2]
+    assert not list(tmp_path.glob('*.tmp'))
+
+    reads = store.reads
+    for _ in range(50):
+        assert store.read()['interval'] == 60
+    assert store.reads == reads  # unchanged file is not re-parsed
+
+    # another process rewrites the file: picked up and announced by poll()
+    other = StateStore(path)
+    other.update({'interval': 30})
+    assert store.poll() is True
+    assert seen[-1]['interval'] == 30 and store.version == 3
+
+
+def test_debounced_updates_coalesce_into_one_write(tmp_path):
+    path = tmp_path / 'heartbeat_state.json'
+    store = StateStore(path)
+    store.write({'auto_apply': True})
+    for v in range(10, 20):
+        store.update({'interval': v}, debounce=0.1)
+    assert store.read()['interval'] == 19  # pending value visible in-process
+    assert 'interval' not in json.loads(path.read_text())
+    # a concurrent writer's keys survive the debounced flush
+    StateStore(path).update({'afk_threshold': 5})
+    time.sleep(0.3)
+    data = json.loads(path.read_text())
+    assert data['interval'] == 19 and data['afk_threshold'] == 5 and data['auto_apply'] is True
+    assert data['_version'] == 3
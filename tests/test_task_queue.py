@@ -0,0 +1,74 @@
+import json
+import os
+import sqlite3
+import time
+
+from samus_manus_mvp.task_queue import TaskQueue
+
+
+def test_claim_is_exclusive_and_lease_expires(tmp_path):
+    q = TaskQueue(tmp_path / 'tasks.db')
+    a = q.add('first')
+    q.add({'task': 'second', 'auto_approve': True})
+    assert a['id'] == 'task-1'
+    assert [t['task'] for t in q.claim('hb-1', limit=1)] == ['first']
+    assert [t['task'] for t in q.claim('hb-2')] == ['second']
+    assert q.claim('hb-3') == []
+    assert q.list('running')[1]['auto_approve'] is True
+    # only the lease owner can complete
+    assert not q.complete('task-1', 'hb-2', 'done', result='x')
+    assert q.complete('task-1', 'hb-1', 'done', result='ok')
+    assert q.get('task-1')['result'] == 'ok'
+    # a crashed runner's task becomes claimable once its lease expires
+    q.renew('task-2', 'hb-2', lease=-1)
+    assert [t['id'] for t in q.claim('hb-3', ids=['task-2'])] == ['task-2']
+    assert q.count('pending') == 0
+
+
+def test_json_shim_imports_edits_and_archives(tmp_path):
+    path = tmp_path / 'tasks.json'
+    q = TaskQueue(tmp_path / 'tasks.db')
+    q.add('old')
+    q.claim('hb')
+    q.complete('task-1', 'hb', 'done', result='long output')
+    q.export_json(path)
+    assert q.sync_json(path) == 0  # unchanged since export
+
+    data = json.loads(path.read_text())
+    data['tasks'].append({'task': 'added by hand', 'status': 'pending'})
+    path.write_text(json.dumps(data))
+    os.utime(path, ns=(time.time_ns(), time.time_ns() + 1))
+    assert q.sync_json(path) == 2
+    assert [t['id'] for t in q.list('pending')] == ['task-2']
+    assert json.loads(path.read_text())['tasks'][1]['id'] == 'task-2'
+
+    assert q.archive(older_than=-1) == 1
+    assert q.archived()[0]['result'] == 'long output'
+    q.export_json(path)
+    assert [t['id'] for t in json.loads(path.read_text())['tasks']] == ['task-2']
+    assert q.claim('hb', ids=[]) == []
+
+
+def test_duplicate_ids_and_busy_database_leave_queue_usable(tmp_path):
+    path = tmp_path / 'tasks.json'
+    q = TaskQueue(tmp_path / 'tasks.db')
+    path.write_text(json.dumps({'tasks': [{'id': 'task-7', 'task': 'first'}, {'id': 'task-7', 'task': 'copy'},
+                                          {'task': 'new'}]}))
+    assert q.sync_json(path) == 2
+    assert [(t['id'], t['task']) for t in q.list()] == [('task-7', 'first'), ('task-8', 'new')]
+
+    conn = q._conn
+
+    class Busy:
+        def execute(self, sql, *args):
+            if sql == 'BEGIN IMMEDIATE':
+                raise sqlite3.OperationalError('database is locked')
+            return conn.execute(sql, *args)
+
+    q._conn = Busy()
+    path.write_text(json.dumps({'tasks': [{'id': 'task-7', 'task': 'edited'}]}))
+    os.utime(path, ns=(time.time_ns(), time.time_ns() + 1))
+    assert q.sync_json(path) == 0  # kept as is, and the lock was released
+    q._conn = conn
+    assert q.sync_json(path) == 2
+    assert [t['task'] for t in q.list()] == ['edited']
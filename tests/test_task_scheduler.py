@@ -0,0 +1,109 @@
+import threading
+import time
+
+from samus_manus_mvp.task_scheduler import TaskScheduler, classify, dependency_status
+
+
+def test_classify_by_resource():
+    assert classify({'task': 'Take a screenshot'}, apply=False) == 'compute'
+    assert classify({'task': 'Take a screenshot'}, apply=True) == 'gui'
+    assert classify({'task': 'Open example.com'}) == 'browser:default'
+    assert classify({'task': 'anything', 'session': 'work'}) == 'browser:work'
+    assert classify({'task': 'Open example.com', 'resource': 'compute'}) == 'compute'
+    web = [{'type': 'web_open', 'url': 'https://example.com'}]
+    assert classify({'task': 'look it up', 'actions': web}) == 'browser:default'
+    assert classify({'task': 'look it up'}, apply=True, plan=web) == 'browser:default'
+
+
+def test_runs_compute_in_parallel_and_gui_exclusively():
+    active = {'gui': 0, 'all': 0}
+    peak = {'gui': 0, 'all': 0}
+    lock = threading.Lock()
+
+    def run_fn(t, apply, remaining):
+        with lock:
+            active['all'] += 1
+            peak['all'] = max(peak['all'], active['all'])
+            if apply:
+                active['gui'] += 1
+                peak['gui'] = max(peak['gui'], active['gui'])
+        time.sleep(0.1)
+        with lock:
+            active['all'] -= 1
+            if apply:
+                active['gui'] -= 1
+        return t['id']
+
+    tasks = [{'id': i, 'task': 'sim', 'gui': i < 2} for i in range(6)]
+    start = time.monotonic()
+    done = list(TaskScheduler(max_concurrency=4).run(tasks, run_fn, apply_for=lambda t: t['gui']))
+    assert sorted(o['value'] for _, o in done) == list(range(6))
+    assert peak['gui'] == 1
+    assert 2 <= peak['all'] <= 4
+    assert time.monotonic() - start < 0.5
+
+
+def test_task_that_cannot_start_before_deadline_is_deferred():
+    def run_fn(t, apply, remaining):
+        time.sleep(0.2)
+        return remaining
+
+    tasks = [{'id': 1, 'task': 'a'}, {'id': 2, 'task': 'b'}]
+    out = dict((t['id'], o) for t, o in TaskScheduler(max_concurrency=1).run(tasks, run_fn, timeout_for=lambda t: 0.1))
+    # task 1 overruns its deadline, so task 2 never gets a worker in time
+    assert out[1]['status'] == 'timeout'
+    assert out[2]['status'] == 'deferred'
+
+
+def test_hung_task_times_out_without_blocking_the_run():
+    release = threading.Event()
+
+    def run_fn(t, apply, remaining):
+        if t['id'] == 1:
+            release.wait(5)
+        return t['id']
+
+    tasks = [{'id': 1, 'task': 'hang'}, {'id': 2, 'task': 'b'}]
+    start = time.monotonic()
+    try:
+        out = dict((t['id'], o) for t, o in TaskScheduler(max_concurrency=2).run(tasks, run_fn, timeout_for=lambda t: 0.2))
+        # the scheduler stops waiting at the deadline instead of joining the hung thread
+        assert time.monotonic() - start < 2
+    finally:
+        release.set()
+    assert out[1]['status'] == 'timeout' and out[1]['error'] == 'timed out'
+    assert out[2] == dict(out[2], status='ok', value=2)
+
+
+def test_dependency_graph_orders_branches_and_blocks_failures():
+    order = []
+    lock = threading.Lock()
+
+    def run_fn(t, apply, remaining):
+        time.sleep(0.05)
+        with lock:
+            order.append(t['id'])
+        return 'fail' if t['id'] == 'b' else 'ok'
+
+    tasks = [
+        {'id': 'close', 'task': 'close', 'depends_on': ['c', 'd']},
+        {'id': 'a', 'task': 'open'},
+        {'id': 'b', 'task': 'x', 'depends_on': 'a'},
+        {'id': 'c', 'task': 'y', 'depends_on': 'a'},
+        {'id': 'd', 'task': 'z', 'depends_on': ['b']},
+        {'id': 'e', 'task': 'loop', 'depends_on': ['f']},
+        {'id': 'f', 'task': 'loop', 'depends_on': ['e']},
+    ]
+    out = dict((t['id'], o) for t, o in TaskScheduler(max_concurrency=4).run(
+        tasks, run_fn, succeeded=lambda t, o: o['value'] == 'ok'))
+    assert order[0] == 'a' and set(order[1:]) == {'b', 'c'}
+    assert out['d']['status'] == 'blocked' and out['d']['blocked_by'] == 'b'
+    assert out['close']['status'] == 'blocked'  # transitively, through d
+    assert out['e']['status'] == out['f']['status'] == 'blocked'
+
+    lookup = {'x': {'status': 'done'}, 'y': {'status': 'pending'}, 'z': {'status': 'failed'}}.get
+    assert dependency_status({'depends_on': ['x']}, lookup) == ('ready', None)
+    assert dependency_status({'depends_on': ['x', 'y']}, lookup) == ('waiting', 'y')
+    assert dependency_status({'depends_on': ['y']}, lookup, batch=['y']) == ('ready', None)
+    assert dependency_status({'depends_on': ['z']}, lookup) == ('blocked', 'z')
+    assert dependency_status({'depends_on': ['nope']}, lookup) == ('blocked', 'nope')
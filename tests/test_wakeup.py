@@ -0,0 +1,34 @@
+import threading
+import time
+from datetime import datetime
+
+from samus_manus_mvp.wakeup import Waker, next_run, next_wake
+
+
+def _ts(*args):
+    return datetime(*args).timestamp()
+
+
+def test_cron_next_run_is_exact():
+    assert next_run('*/15 * * * *', _ts(2024, 1, 1, 10, 7, 30)) == _ts(2024, 1, 1, 10, 15)
+    # weekdays at 09:00; Saturday 2024-01-06 -> Monday 2024-01-08
+    assert next_run('0 9 * * mon-fri', _ts(2024, 1, 6, 8, 0)) == _ts(2024, 1, 8, 9, 0)
+    assert next_run('@monthly', _ts(2024, 1, 31, 12, 0)) == _ts(2024, 2, 1, 0, 0)
+    assert next_run('30 6 29 feb *', _ts(2024, 3, 1)) == _ts(2028, 2, 29, 6, 30)
+    assert next_run(90, 1000.0) == 1090.0
+
+
+def test_next_wake_and_waker(tmp_path):
+    now = time.time()
+    tasks = [{'status': 'pending', 'next_run_at': now + 5}, {'status': 'pending'}, {'status': 'done', 'next_run_at': now}]
+    assert 4.9 < next_wake(tasks, now, 1800) <= 5
+
+    watched = tmp_path / 'tasks.json'
+    w = Waker([watched], poll=0.02)
+    assert w.wait(0.05) == 'timeout'
+    threading.Timer(0.05, lambda: watched.write_text('{}')).start()
+    start = time.monotonic()
+    assert w.wait(5) == 'changed:tasks.json'
+    assert time.monotonic() - start < 1
+    w.notify('enqueue')
+    assert w.wait(5) == 'enqueue'
@@ -72,6 +72,22 @@ class WebHands:
     def wait(self, seconds: float) -> None:
         time.sleep(seconds)
 
+    def wait_for_selector(self, selector: str, timeout: int = 10000, state: str = "visible") -> bool:
+        """Wait until `selector` reaches `state` (visible / attached / hidden / detached); False on timeout."""
+        try:
+            self.page.wait_for_selector(selector, state=state, timeout=timeout)
+            return True
+        except PWTimeoutError:
+            return False
+
+    def wait_for_idle(self, timeout: int = 10000) -> bool:
+        """Wait for network idle (no requests for 500 ms); False on timeout."""
+        try:
+            self.page.wait_for_load_state("networkidle", timeout=timeout)
+            return True
+        except PWTimeoutError:
+            return False
+
     def close(self) -> None:
         try:
             self.context.close()